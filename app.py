@@ -1,23 +1,59 @@
 import streamlit as st
-import folium
-from streamlit_folium import st_folium
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import time
-import random
-
-# Page configuration
-st.set_page_config(
-    page_title="CECECO-SIM | Simulation & Integration Module",
-    page_icon="🌍",
-    layout="wide",
-    initial_sidebar_state="expanded"
+import math
+import os
+import threading
+
+from cececo.engine import (
+    ENERGY_TYPES,
+    GAZETTE_SOURCE,
+    GAZETTE_STORE,
+    MAP_METRICS,
+    PROJECTION_BASIS,
+    REFERENCE,
+    compare_conditions,
+    condition_years,
+    conditions_as_of,
+    gazette_version,
+    get_agent_client,
+    get_agent_status,
+    get_boundaries,
+    get_cash_flow,
+    get_cash_flow_totals,
+    get_catalog,
+    get_gazette_events,
+    get_knowledge_graph,
+    get_normalized_catalog,
+    get_projection,
+    get_regulatory_index,
+    get_sensitivity,
+    get_similarity,
+    get_similarity_matrix,
+    get_site_index,
+    get_source_countries,
+    get_source_project,
+    map_metric,
+    money_bases,
+    nearest_site,
+    optimize_portfolio,
+    projection_scale,
+    similar_projects,
+    yield_comparison,
+)
+from cececo.figures import (
+    cached_figure,
+    cash_flow_figure,
+    fan_figure,
+    portfolio_figure,
+    regulatory_figure,
+    sunburst_figure,
+    tornado_figure,
 )
+from cececo.gazette import GazetteWatcher
+from cececo.metrics import profiler
+from cececo.pipeline import PipelineRunner
 
 # Dark Theme CSS
-st.markdown("""
+DARK_THEME_CSS = """
     <style>
     /* Dark Theme Base */
     .stApp {
@@ -184,202 +220,1126 @@ st.markdown("""
         background: transparent !important;
     }
     </style>
-""", unsafe_allow_html=True)
-
-# CECECO Countries Data with Regions
-CECECO_COUNTRIES = {
-    "Turkey": {
-        "lat": 39.9334, 
-        "lon": 32.8597, 
-        "code": "TR", 
-        "color": "#FF6B6B",
-        "regions": {
-            "Kırıkkale": {"lat": 39.8436, "lon": 33.5083, "projects": 3},
-            "İzmir": {"lat": 38.4237, "lon": 27.1428, "projects": 5},
-            "Çanakkale": {"lat": 40.1553, "lon": 26.4142, "projects": 4},
-            "Balıkesir": {"lat": 39.6484, "lon": 27.8826, "projects": 6},
-            "Manisa": {"lat": 38.6140, "lon": 27.4296, "projects": 3}
-        }
-    },
-    "Azerbaijan": {
-        "lat": 40.1431, 
-        "lon": 47.5769, 
-        "code": "AZ", 
-        "color": "#4ECDC4",
-        "regions": {
-            "Absheron": {"lat": 40.4675, "lon": 49.8200, "projects": 2},
-            "Ganja": {"lat": 40.6828, "lon": 46.3606, "projects": 1},
-            "Shirvan": {"lat": 39.9317, "lon": 48.9206, "projects": 2},
-            "Sumgayit": {"lat": 40.5897, "lon": 49.6686, "projects": 1},
-            "Lankaran": {"lat": 38.7542, "lon": 48.8506, "projects": 1}
+"""
+
+# Page configuration and theme, applied when the app runs rather than on import
+def configure_page():
+    st.set_page_config(
+        page_title="CECECO-SIM | Simulation & Integration Module",
+        page_icon="🌍",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(DARK_THEME_CSS, unsafe_allow_html=True)
+
+# Project markers drawn individually before switching to grid clusters
+MAX_PROJECT_MARKERS = 300
+# (south, west, north, east) viewport used before the map reports its bounds,
+# and the base map's initial zoom
+DEFAULT_MAP_BOUNDS = (-90.0, -180.0, 90.0, 180.0)
+DEFAULT_MAP_ZOOM = 4
+# Boundary outlines exported for the browser, served from /app/static/
+# (server.enableStaticServing in .streamlit/config.toml)
+BOUNDARY_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "boundaries")
+
+# Choropleth layer of the base map: it fetches each level's outlines from
+# the static files the first time its zoom band is shown and keeps them, and
+# metric layers only restyle it with bind({metric, values, colors}) or
+# hide it with bind(null)
+BOUNDARY_LAYER_JS = """
+{% macro script(this, kwargs) %}
+window.cececoBoundaries = (function(map, levels) {
+    var layers = {}, current = null, binding = null;
+    function levelFor(zoom) {
+        for (var i = 0; i < levels.length; i++) {
+            if (zoom <= levels[i][0]) return levels[i];
         }
-    },
-    "Pakistan": {"lat": 30.3753, "lon": 69.3451, "code": "PK", "color": "#95E1D3", "regions": {}},
-    "Kazakhstan": {"lat": 48.0196, "lon": 66.9237, "code": "KZ", "color": "#F38181", "regions": {}},
-    "Uzbekistan": {"lat": 41.3775, "lon": 64.5853, "code": "UZ", "color": "#AA96DA", "regions": {}},
-    "Kyrgyzstan": {"lat": 41.2044, "lon": 74.7661, "code": "KG", "color": "#FCBAD3", "regions": {}}
-}
-
-# Enhanced Project Data with Historical Context
-MOCK_PROJECTS = {
-    "Turkey": {
-        "Kırıkkale Wind Farm": {
-            "year": 2016,
-            "region": "Kırıkkale",
-            "capacity": "150 MW",
-            "investment": "$180M",
-            "success_rate": 95,
-            "then_conditions": {
-                "Steel Price": "$850/ton",
-                "YEKDEM Incentive": "Active ($0.073/kWh)",
-                "Regulatory Framework": "Favorable - Fast track permits",
-                "Wind Speed": "7.2 m/s avg",
-                "Currency Rate": "1 USD = 3.0 TRY",
-                "Interest Rate": "12%",
-                "Tax Incentive": "50% reduction for 5 years"
-            },
-            "profit_loss": {
-                "year_1": {"revenue": 28.5, "cost": 22.0, "profit": 6.5},
-                "year_2": {"revenue": 31.2, "cost": 20.5, "profit": 10.7},
-                "year_3": {"revenue": 33.8, "cost": 19.8, "profit": 14.0},
-                "year_4": {"revenue": 35.5, "cost": 19.2, "profit": 16.3},
-                "year_5": {"revenue": 37.2, "cost": 18.5, "profit": 18.7},
-                "total_roi": 45.2
-            },
-            "regulatory_evolution": [
-                {"year": 2016, "event": "YEKDEM Law Active", "impact": "High incentive support"},
-                {"year": 2017, "event": "Permit Process Simplified", "impact": "Faster approvals"},
-                {"year": 2019, "event": "YEKDEM Extended", "impact": "Extended support period"},
-                {"year": 2021, "event": "New YEKDEM Rates", "impact": "Reduced rates, still favorable"},
-                {"year": 2023, "event": "Green Certificate System", "impact": "Additional revenue stream"}
-            ]
+        return levels[levels.length - 1];
+    }
+    function style(feature) {
+        return {color: "#ffffff", weight: 1, fillOpacity: 0.55, fillColor: binding.colors[feature.properties.index]};
+    }
+    function tooltip(layer) {
+        var properties = layer.feature.properties, value = binding.values[properties.index];
+        return properties.name + "<br>" + binding.metric + ": " + (value === null ? "N/A" : value);
+    }
+    function load(level) {
+        layers[level[0]] = null;
+        fetch(level[1])
+            .then(function(response) {
+                if (!response.ok) throw new Error(response.statusText);
+                return response.json();
+            })
+            .then(function(outlines) {
+                layers[level[0]] = L.geoJson(outlines).bindTooltip(tooltip, {sticky: true});
+                show();
+            })
+            .catch(function() { delete layers[level[0]]; });
+    }
+    function show() {
+        var level = levelFor(map.getZoom()), layer = layers[level[0]];
+        if (current && (current !== layer || !binding)) {
+            map.removeLayer(current);
+            current = null;
         }
-    },
-    "Azerbaijan": {
-        "Absheron Wind Project": {
-            "year": 2018,
-            "region": "Absheron",
-            "capacity": "80 MW",
-            "investment": "$95M",
-            "success_rate": 88,
-            "then_conditions": {
-                "Steel Price": "$920/ton",
-                "Government Support": "High - Direct investment",
-                "Regulatory Framework": "Moderate - New framework",
-                "Wind Speed": "6.8 m/s avg",
-                "Currency Rate": "1 USD = 1.7 AZN",
-                "Interest Rate": "8%",
-                "Tax Incentive": "10-year tax holiday"
-            },
-            "profit_loss": {
-                "year_1": {"revenue": 12.5, "cost": 11.0, "profit": 1.5},
-                "year_2": {"revenue": 14.2, "cost": 10.5, "profit": 3.7},
-                "year_3": {"revenue": 15.8, "cost": 10.0, "profit": 5.8},
-                "year_4": {"revenue": 17.5, "cost": 9.5, "profit": 8.0},
-                "year_5": {"revenue": 19.2, "cost": 9.0, "profit": 10.2},
-                "total_roi": 28.4
-            },
-            "regulatory_evolution": [
-                {"year": 2018, "event": "Renewable Energy Law", "impact": "Foundation for sector"},
-                {"year": 2019, "event": "Feed-in Tariff Introduced", "impact": "Price guarantee"},
-                {"year": 2020, "event": "Grid Connection Simplified", "impact": "Easier integration"},
-                {"year": 2022, "event": "Green Energy Targets Set", "impact": "Policy commitment"},
-                {"year": 2023, "event": "Auction System Proposed", "impact": "Competitive pricing"}
-            ]
+        if (!binding) return;
+        if (layer === undefined) return load(level);
+        if (layer === null) return;
+        layer.setStyle(style);
+        if (!current) {
+            current = layer.addTo(map);
+            current.bringToBack();
         }
     }
-}
-
-# Current Conditions (2024)
-CURRENT_CONDITIONS = {
-    "Turkey": {
-        "Steel Price": "$1,150/ton",
-        "YEKDEM Incentive": "Active ($0.055/kWh)",
-        "Regulatory Framework": "Mature - Streamlined",
-        "Wind Speed": "7.5 m/s avg",
-        "Currency Rate": "1 USD = 32.0 TRY",
-        "Interest Rate": "45%",
-        "Tax Incentive": "30% reduction for 3 years"
-    },
-    "Azerbaijan": {
-        "Steel Price": "$980/ton",
-        "Government Support": "Very High - Strategic priority",
-        "Regulatory Framework": "Improved - Clear guidelines",
-        "Wind Speed": "7.0 m/s avg",
-        "Currency Rate": "1 USD = 1.7 AZN",
-        "Interest Rate": "7%",
-        "Tax Incentive": "15-year tax holiday"
-    },
-    "Kazakhstan": {
-        "Steel Price": "$1,050/ton",
-        "Government Support": "Moderate",
-        "Regulatory Framework": "Developing",
-        "Wind Speed": "6.5 m/s avg",
-        "Currency Rate": "1 USD = 450 KZT",
-        "Interest Rate": "16%",
-        "Tax Incentive": "Under discussion"
-    }
-}
-
-# Mock AI Agent Status
-def get_agent_status():
-    agents = [
-        {"name": "Researcher Agent", "status": "active", "task": "Scanning Official Gazettes"},
-        {"name": "Gap Analysis Agent", "status": "analyzing", "task": "Comparing regulations"},
-        {"name": "Similarity Engine", "status": "complete", "task": "Calculating similarity scores"},
-        {"name": "Policy Transfer Agent", "status": "active", "task": "Simulating policy transfer"}
+    map.on("zoomend", show);
+    return {bind: function(next) { binding = next; show(); }};
+})({{ this._parent.get_name() }}, {{ this.levels|tojson }});
+{% endmacro %}
+"""
+# Circle markers of one layer as [lat, lon, options, tooltip, popup] rows.
+# st_folium renders the base map and every overlay again on each call, and
+# folium renders each marker (and its tooltip and popup) through templates of
+# its own, so layers of many markers are drawn in the browser from one array
+CIRCLE_MARKERS_JS = """
+{% macro script(this, kwargs) %}
+(function(layer, markers) {
+    markers.forEach(function(marker) {
+        var circle = L.circleMarker([marker[0], marker[1]], marker[2]).bindTooltip(marker[3]);
+        if (marker[4]) circle.bindPopup(marker[4]);
+        circle.addTo(layer);
+    });
+})({{ this._parent.get_name() }}, {{ this.markers|tojson }});
+{% endmacro %}
+"""
+BOUNDARY_BIND_JS = """
+{% macro script(this, kwargs) %}
+window.cececoBoundaries && window.cececoBoundaries.bind({{ this.binding|tojson }});
+{% endmacro %}
+"""
+
+def format_percent(value):
+    return "N/A" if math.isnan(value) else f"{value:.0f}%"
+
+# Amount in millions of a basis currency, e.g. "$180.0M" or "543.6M TRY"
+def format_money(value, basis):
+    return f"${value:,.1f}M" if basis.currency == "USD" else f"{value:,.1f}M {basis.currency}"
+
+def add_circle_markers(parent, markers):
+    import folium
+    from folium.template import Template
+    
+    element = folium.MacroElement()
+    element._template = Template(CIRCLE_MARKERS_JS)
+    element.markers = markers
+    return element.add_to(parent)
+
+# (max zoom, URL) of each level's boundary outlines, exported to the static
+# files once per boundary cache version
+@st.cache_resource(max_entries=4)
+def get_boundary_urls(version):
+    from cececo.boundaries import export_outlines
+    
+    boundaries = get_boundaries()
+    base_path = st.get_option("server.baseUrlPath").strip("/")
+    prefix = f"/{base_path}/app/static/boundaries/" if base_path else "/app/static/boundaries/"
+    return tuple((max_zoom, prefix + name) for max_zoom, name in export_outlines(boundaries, BOUNDARY_STATIC_DIR))
+
+# Base regional map with every country and region marker and, with a
+# boundary cache, the choropleth layer; built once per process (and boundary
+# version) and shared by all sessions
+@st.cache_resource(max_entries=4)
+def get_base_map(boundary_urls):
+    import folium
+    from folium.template import Template
+    
+    # Create map with dark theme
+    m = folium.Map(
+        location=[40, 60],
+        zoom_start=4,
+        tiles='CartoDB dark_matter'  # Dark theme map
+    )
+    
+    # Country markers, each followed by its region markers
+    markers = []
+    for country in REFERENCE.countries.values():
+        style = {"color": country.color, "fill": True, "fillColor": country.color}
+        markers.append((country.lat, country.lon, {**style, "radius": 15, "fillOpacity": 0.7},
+                        country.name, f"{country.name} ({country.code})"))
+        markers += [
+            (region.lat, region.lon, {**style, "radius": 8, "fillOpacity": 0.5},
+             region.name, f"{region.name} ({region.projects} projects)")
+            for region in country.regions.values()
+        ]
+    add_circle_markers(m, markers)
+    
+    if boundary_urls:
+        boundary_layer = folium.MacroElement()
+        boundary_layer._template = Template(BOUNDARY_LAYER_JS)
+        boundary_layer.levels = [list(level) for level in boundary_urls]
+        boundary_layer.add_to(m)
+    
+    # Render once up front so st_folium can skip the figure render per call
+    m.get_root().render()
+    return m
+
+# Source/target highlight markers for one selection as plain
+# (location, popup, color, icon) tuples, drawn as an overlay on the base map
+@st.cache_data(max_entries=256)
+def get_highlight_markers(selected_country, selected_region, source_country, source_project_name):
+    source_project = get_source_project(source_country, source_project_name)
+    markers = []
+    
+    # Highlight selected countries and regions
+    target = REFERENCE.countries.get(selected_country)
+    if target:
+        markers.append(([target.lat, target.lon], f"🎯 Target: {selected_country}", 'red', 'target'))
+        
+        region = target.regions.get(selected_region)
+        if region:
+            markers.append(([region.lat, region.lon], f"🎯 Target Region: {selected_region}", 'orange', 'map-marker'))
+    
+    source = REFERENCE.countries.get(source_country)
+    if source and source_project:
+        markers.append(([source.lat, source.lon], f"📦 Source: {source_country}", 'blue', 'database'))
+        
+        region = source.regions.get(source_project.get("region"))
+        if region:
+            markers.append(([region.lat, region.lon], f"📦 Source Project: {source_project_name}", 'lightblue', 'industry'))
+    
+    return markers
+
+# Folium elements accumulate output each time they are rendered, so the
+# overlay layer is rebuilt from the cached marker tuples on every call
+def build_highlight_layer(markers):
+    import folium
+    
+    layer = folium.FeatureGroup(name="Selection")
+    for location, popup, color, icon in markers:
+        folium.Marker(
+            location,
+            popup=popup,
+            icon=folium.Icon(color=color, icon=icon, prefix='fa')
+        ).add_to(layer)
+    return layer
+
+@st.cache_resource
+def get_map_lock():
+    return threading.Lock()
+
+# Project sites in the current viewport as (lat, lon, count, tooltip) tuples:
+# one marker per project while few are in view, grid clusters beyond that
+@st.cache_data(max_entries=256)
+def get_project_markers(bounds, zoom, catalog_version):
+    from cececo.spatial import PROJECT, cluster_degrees
+    
+    index = get_site_index()
+    south, west, north, east = bounds
+    visible = index.within(south, west, north, east, kinds=[PROJECT])
+    if len(visible) <= MAX_PROJECT_MARKERS:
+        return [(float(index.lats[i]), float(index.lons[i]), 1, index.keys[i][2]) for i in visible]
+    return [
+        (cluster.lat, cluster.lon, cluster.count,
+         index.keys[cluster.site][2] if cluster.count == 1 else f"{cluster.count:,} projects")
+        for cluster in index.clusters(visible, cluster_degrees(zoom))
+    ]
+
+def build_project_layer(markers):
+    import folium
+    
+    layer = folium.FeatureGroup(name="Projects")
+    add_circle_markers(layer, [
+        (lat, lon, {
+            "radius": 4 + 3 * math.log10(count),
+            "color": '#ffd166',
+            "weight": 1,
+            "fill": True,
+            "fillColor": '#ffd166',
+            "fillOpacity": 0.6 if count > 1 else 0.9
+        }, tooltip, None)
+        for lat, lon, count, tooltip in markers
+    ])
+    return layer
+
+# Choropleth of the selected metric: per-feature values and colors bound to
+# the base map's boundary layer (which hides it for metric None), or colored
+# site markers when no boundary cache has been built
+def build_metric_layer(metric, values):
+    import folium
+    from folium.template import Template
+    
+    boundaries = get_boundaries()
+    values = {key: round(value, 1) for key, value in values.items()}
+    layer = folium.FeatureGroup(name=metric)
+    if boundaries is not None:
+        binding = folium.MacroElement()
+        binding._template = Template(BOUNDARY_BIND_JS)
+        binding.binding = None if metric == "None" else {"metric": metric, **boundaries.bind(values)}
+        binding.add_to(layer)
+        return layer
+    
+    from cececo.boundaries import value_colors
+    
+    sites = [(("country", name), country, 18) for name, country in REFERENCE.countries.items()]
+    sites += [
+        (("region", name, region.name), region, 10)
+        for name, country in REFERENCE.countries.items()
+        for region in country.regions.values()
     ]
-    return agents
+    colors = value_colors([values.get(key, math.nan) for key, _, _ in sites])
+    markers = []
+    for (key, location, radius), color in zip(sites, colors):
+        value = values.get(key, math.nan)
+        markers.append((
+            location.lat, location.lon,
+            {"radius": radius, "color": color, "fill": True, "fillColor": color, "fillOpacity": 0.8},
+            f"{key[-1]}: {'N/A' if math.isnan(value) else value}", None
+        ))
+    add_circle_markers(layer, markers)
+    return layer
+
+# Viewport of the last map render, or the whole map before the first one
+# and while only clicks are returned
+def map_viewport(map_state):
+    bounds = (map_state or {}).get("bounds") or {}
+    south_west, north_east = bounds.get("_southWest"), bounds.get("_northEast")
+    if not (south_west and north_east and south_west.get("lat") is not None):
+        return DEFAULT_MAP_BOUNDS, DEFAULT_MAP_ZOOM
+    bounds = (south_west["lat"], south_west["lng"], north_east["lat"], north_east["lng"])
+    # Rounded so small pans reuse cached markers
+    return tuple(round(value, 1) for value in bounds), int(map_state.get("zoom") or DEFAULT_MAP_ZOOM)
+
+# Resolves a new map click to the nearest country, region or project and
+# queues it as the sidebar selection for the next run
+def select_from_map_click(map_state, selected_country, zoom):
+    from cececo.spatial import KM_PER_DEGREE, cluster_degrees
+    
+    map_state = map_state or {}
+    clicked_object = map_state.get("last_object_clicked")
+    clicked_point = map_state.get("last_clicked")
+    signature = (str(clicked_object), str(clicked_point))
+    if not (clicked_object or clicked_point) or st.session_state.get("map_clicks_seen") == signature:
+        return
+    
+    previous = st.session_state.get("map_clicks_seen") or (None, None)
+    st.session_state["map_clicks_seen"] = signature
+    on_marker = clicked_object and signature[0] != previous[0]
+    point = clicked_object if on_marker else clicked_point
+    site = nearest_site(point["lat"], point["lng"])
+    # Clicks on empty map only select sites within about one cluster cell
+    if site is None or (not on_marker and site["distance_km"] > cluster_degrees(zoom) * KM_PER_DEGREE):
+        return
+    
+    kind, country, *rest = site["key"]
+    if kind == "project" and country == selected_country:
+        st.caption(f"📍 {rest[0]} is in the target country; pick a target elsewhere to use it as the source project.")
+        return
+    st.session_state["map_selection"] = site["key"]
+    st.rerun()
+
+# st_folium attaches the overlays to the map it is given, so calls on the
+# shared base map are serialized and the overlays are detached afterwards
+def show_regional_map(overlays, clicks_only, boundary_urls):
+    from streamlit_folium import st_folium
+    
+    base_map = get_base_map(boundary_urls)
+    with get_map_lock():
+        try:
+            return st_folium(
+                base_map,
+                key="regional_map",
+                width=1200,
+                height=600,
+                feature_group_to_add=overlays,
+                # Panning and zooming only rerun the app when their state is returned
+                returned_objects=["last_clicked", "last_object_clicked", "last_object_clicked_tooltip"] if clicks_only else None,
+                render=False
+            )
+        finally:
+            for overlay in overlays:
+                base_map._children.pop(overlay.get_name(), None)
+
+# Tab 1: Regional Map
+@st.fragment
+@profiler.timed("tab/regional_map")
+def render_regional_map_tab(selected_country, selected_region, source_country, source_project_name, energy_type):
+    st.header("CECECO Region Overview")
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        metric = st.selectbox("Color countries and regions by", ["None", *MAP_METRICS], key="map_metric")
+    with col2:
+        clicks_only = st.toggle(
+            "Rerun only on marker clicks",
+            value=True,
+            help="Pan and zoom without rerunning the app; clicking a marker still updates the view. "
+                 "Turn off to load the project sites of the current view as you pan and zoom."
+        )
+    bounds, zoom = map_viewport(None if clicks_only else st.session_state.get("regional_map"))
+    boundaries = get_boundaries()
+    boundary_urls = () if boundaries is None else get_boundary_urls(boundaries.version)
+    layers = []
+    if metric != "None":
+        with profiler.span("data/map_metric"):
+            values = map_metric(metric, source_country, source_project_name, energy_type)
+        with profiler.span("map/metric_layer"):
+            layers.append(build_metric_layer(metric, values))
+        finite = [value for value in values.values() if not math.isnan(value)]
+        if finite:
+            st.caption(f"{metric}: {min(finite):.1f} (red) to {max(finite):.1f} (green); grey where not available.")
+        if boundaries is None:
+            st.caption("No boundary cache found, so sites are colored instead of areas. "
+                       "Build one with `python -m cececo.boundaries build`.")
+    elif boundaries is not None:
+        # Hides the choropleth of a previous metric
+        layers.append(build_metric_layer(metric, {}))
+    with profiler.span("map/layers"):
+        overlay = build_highlight_layer(
+            get_highlight_markers(selected_country, selected_region, source_country, source_project_name)
+        )
+        layers.append(build_project_layer(get_project_markers(bounds, zoom, get_catalog().version)))
+        layers.append(overlay)
+    with profiler.span("map/render"):
+        map_state = show_regional_map(layers, clicks_only, boundary_urls)
+    
+    if map_state and map_state.get("last_object_clicked_tooltip"):
+        st.caption(f"📍 Selected on map: {map_state['last_object_clicked_tooltip']}")
+    select_from_map_click(map_state, selected_country, zoom)
+    
+    # Regional details
+    target = REFERENCE.countries.get(selected_country)
+    if target and target.regions:
+        st.subheader(f"📍 Regions in {selected_country}")
+        cols = st.columns(len(target.regions))
+        for i, region in enumerate(target.regions.values()):
+            with cols[i]:
+                st.markdown(f"""
+                    <div class="region-card">
+                        <h4>{region.name}</h4>
+                        <p><strong>Projects:</strong> {region.projects}</p>
+                    </div>
+                """, unsafe_allow_html=True)
+
+# Then/Now years for condition comparisons, defaulting to the project year
+# and the latest observations
+def select_comparison_years(project_year, key):
+    first_year, last_year = condition_years()
+    if first_year >= last_year:
+        return first_year, last_year
+    return st.slider(
+        "Compare conditions between",
+        first_year,
+        last_year,
+        (min(max(project_year, first_year), last_year), last_year),
+        key=key
+    )
+
+# Tab 2: Project Analysis - Then vs Now
+@st.fragment
+@profiler.timed("tab/project_analysis")
+def render_project_analysis_tab(selected_country, selected_region, source_country, source_project_name, money_basis):
+    source_project = get_source_project(source_country, source_project_name)
+    st.header("📊 Case-Based Reasoning Analysis: Then vs Now")
+    
+    if not source_project:
+        st.warning("Please select a source project from the sidebar.")
+        return
+    
+    # Conditions on both sides are as-of lookups in the condition time series
+    then_year, now_year = select_comparison_years(
+        source_project['year'], f"analysis_years_{source_country}_{source_project_name}"
+    )
+    
+    investment = get_normalized_catalog(money_basis).project_investment(source_country, source_project_name)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader(f"📦 Source Project: {source_project_name}")
+        st.markdown(f"""
+            <div class="project-card">
+                <h3>{source_project_name}</h3>
+                <p><strong>Year:</strong> {source_project['year']}</p>
+                <p><strong>Region:</strong> {source_project['region']}</p>
+                <p><strong>Capacity:</strong> {source_project['capacity']}</p>
+                <p><strong>Investment:</strong> {format_money(investment, money_basis)} ({money_basis.label}; reported {source_project['investment']})</p>
+                <p><strong>Success Rate:</strong> {source_project['success_rate']}%</p>
+            </div>
+        """, unsafe_allow_html=True)
+        
+        st.subheader(f"🔙 Conditions Then ({then_year})")
+        then_conditions = conditions_as_of(source_country, then_year)
+        if not then_conditions:
+            st.info(f"No conditions recorded for {source_country} by {then_year}")
+        for factor, value in then_conditions.items():
+            st.write(f"📌 **{factor}**: {value}")
+    
+    with col2:
+        st.subheader(f"🎯 Target: {selected_country}" + (f" - {selected_region}" if selected_region else ""))
+        
+        # Conditions as of the "now" year
+        now_conditions = conditions_as_of(selected_country, now_year)
+        st.subheader(f"🔄 Conditions Now ({now_year})")
+        for factor, value in now_conditions.items():
+            st.write(f"📌 **{factor}**: {value}")
+        
+        # Comparison
+        st.divider()
+        st.subheader("📈 Change Analysis")
+        
+        if now_conditions:
+            with profiler.span("data/compare_conditions"):
+                changes = compare_conditions(source_country, then_year, selected_country, now_year)
+            
+            for change in changes[:5]:  # Show first 5
+                if change["change"] == "Improved":
+                    st.success(f"✅ **{change['factor']}**: {change['then']} → {change['now']}")
+                elif change["change"] == "Deteriorated":
+                    st.error(f"❌ **{change['factor']}**: {change['then']} → {change['now']}")
+                else:
+                    st.info(f"➖ **{change['factor']}**: {change['then']} → {change['now']} ({change['change']})")
+    
+    # Similarity Score
+    st.divider()
+    similarity_matrix = get_similarity_matrix()
+    similarity = similarity_matrix.score(source_country, source_project_name, selected_country)
+    similarity_score = round(similarity.overall) if not math.isnan(similarity.overall) else None
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Overall Similarity", format_percent(similarity.overall),
+                  delta=f"{similarity_score-80}%" if similarity_score is not None else None)
+    with col2:
+        st.metric("Regulatory Match", format_percent(similarity.regulatory))
+    with col3:
+        st.metric("Economic Match", format_percent(similarity.economic))
+    
+    # Most transferable past projects for this target: an ANN shortlist over
+    # project snapshots (conditions, scale and location), ranked by the same
+    # overall similarity as above
+    with profiler.span("data/similar_projects"):
+        top_sources = similar_projects(selected_country, selected_region, k=5)
+    if top_sources:
+        import pandas as pd
+        
+        st.subheader(f"🏆 Best Source Projects for {selected_country}")
+        st.dataframe(
+            pd.DataFrame(
+                [{"Project": name, "Country": country, "Overall Similarity": format_percent(overall),
+                  "Profile Match": format_percent(match)}
+                 for country, name, overall, match in top_sources]
+            ),
+            hide_index=True,
+            width="stretch"
+        )
+        st.caption("Ranked by Overall Similarity among the projects whose then-conditions, scale and location "
+                   "are closest to the target (Profile Match).")
+    
+    # Recommendation
+    st.divider()
+    st.subheader("💡 AI Recommendation")
+    if similarity_score is None:
+        st.info(f"""
+        ℹ️ **NO ASSESSMENT**: Current conditions for {selected_country} are not available yet, 
+        so transferability cannot be scored.
+        """)
+    elif similarity_score >= 85:
+        st.success(f"""
+        ✅ **HIGH TRANSFERABILITY**: The project from {source_country} has a {similarity_score}% 
+        similarity match with {selected_country}. Key success factors align well, with minor 
+        adjustments needed for regulatory framework.
+        """)
+    elif similarity_score >= 70:
+        st.warning(f"""
+        ⚠️ **MODERATE TRANSFERABILITY**: The project shows {similarity_score}% similarity. 
+        Significant adjustments required, particularly in incentive programs and regulatory alignment.
+        """)
+    else:
+        st.error(f"""
+        ❌ **LOW TRANSFERABILITY**: Only {similarity_score}% similarity detected. 
+        Major policy and economic reforms needed before project transfer is viable.
+        """)
+
+# Tab 3: Profit/Loss Analysis
+@st.fragment
+@profiler.timed("tab/profit_loss")
+def render_profit_loss_tab(selected_country, selected_region, source_country, source_project_name, energy_type,
+                           money_basis):
+    source_project = get_source_project(source_country, source_project_name)
+    st.header("💰 Profit/Loss Analysis: Source Country Performance")
+    
+    if not source_project:
+        st.warning("Please select a source project from the sidebar.")
+        return
+    
+    st.subheader(f"Financial Performance: {source_project_name}")
+    st.caption(f"Amounts in {money_basis.label}")
+    
+    # Profit/Loss data: the catalog's cash flows, restated in the selected
+    # basis once per process rather than on every rerun
+    cash_flow = get_cash_flow(source_country, source_project_name, money_basis)
+    revenues, costs, profits = cash_flow.T
+    years = [f"Year {i+1}" for i in range(len(cash_flow))]
+    
+    # Metrics
+    col1, col2, col3, col4 = st.columns(4)
+    total_revenue, total_cost, total_profit = get_cash_flow_totals(source_country, source_project_name, money_basis)
+    roi = source_project['total_roi']
+    
+    with col1:
+        st.metric(f"Total Revenue ({len(years)} Years)", format_money(total_revenue, money_basis),
+                  delta=f"+{total_revenue*0.1:.1f}M")
+    with col2:
+        st.metric(f"Total Cost ({len(years)} Years)", format_money(total_cost, money_basis),
+                  delta=f"-{total_cost*0.05:.1f}M")
+    with col3:
+        st.metric(f"Total Profit ({len(years)} Years)", format_money(total_profit, money_basis), 
+                 delta=f"+{total_profit*0.15:.1f}M" if total_profit > 0 else f"{total_profit:.1f}M")
+    with col4:
+        st.metric("ROI", f"{roi}%", delta=f"+{roi*0.1:.1f}%")
+    
+    # Profit/Loss Chart, shared across sessions through the figure cache
+    with profiler.span("chart/cash_flow"):
+        st.plotly_chart(cached_figure(cash_flow_figure, revenues, costs, profits, unit=money_basis.unit),
+                        width="stretch")
+    
+    # Yearly breakdown
+    st.subheader("📅 Yearly Breakdown")
+    for year, revenue, cost, profit in zip(years, revenues, costs, profits):
+        profit_class = "profit-card" if profit > 0 else "loss-card"
+        st.markdown(f"""
+            <div class="project-card {profit_class}">
+                <h4>{year}</h4>
+                <p><strong>Revenue:</strong> {format_money(revenue, money_basis)} | 
+                <strong>Cost:</strong> {format_money(cost, money_basis)} | 
+                <strong>Profit:</strong> {format_money(profit, money_basis)}</p>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    # Projected performance for target country
+    st.divider()
+    st.subheader(f"📊 Projected Performance in {selected_country}")
+    similarity = get_similarity_matrix().score(source_country, source_project_name, selected_country)
+    if math.isnan(similarity.overall):
+        st.warning(f"Current conditions for {selected_country} are not available, so no projection can be made.")
+        return
+    
+    # Annual energy of the selected technology at the target site against the
+    # source project's site, from the hourly yield engines; it scales revenue
+    yields = yield_comparison(source_country, source_project_name, selected_country, selected_region, energy_type)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"Annual Energy in {selected_region or selected_country}", f"{yields['target_mwh'] / 1000:,.0f} GWh",
+                  delta=f"{(yields['ratio'] - 1) * 100:+.0f}% vs source site")
+    with col2:
+        st.metric(f"Capacity Factor ({energy_type})", f"{yields['target_capacity_factor']:.1%}",
+                  delta=f"{(yields['target_capacity_factor'] - yields['source_capacity_factor']) * 100:+.1f} pts")
+    with col3:
+        st.metric("Source Site Energy", f"{yields['source_mwh'] / 1000:,.0f} GWh",
+                  help=f"{yields['capacity_mw']:,.0f} MW {yields['source_technology']} in {source_project['region']}")
+    
+    # Distributions come from a seeded, cached Monte Carlo run over the
+    # source project's cash flows under the target's current conditions
+    with profiler.span("data/projection"):
+        projection = get_projection(source_country, source_project_name, selected_country, similarity.overall,
+                                    energy_type=energy_type, target_region=selected_region)
+    roi_p10, roi_p50, roi_p90 = projection.percentiles("roi")
+    # Projections run in constant current-year dollars; they are shown in
+    # constant prices of the selected currency
+    projection_basis = PROJECTION_BASIS._replace(currency=money_basis.currency)
+    scale = projection_scale(projection_basis.currency)
+    if scale is None:
+        projection_basis, scale = PROJECTION_BASIS, 1.0
+    npv_p10, npv_p50, npv_p90 = (value * scale for value in projection.percentiles("npv"))
+    irr_p10, irr_p50, irr_p90 = projection.percentiles("irr")
+    st.info(f"""
+    Based on similarity analysis and current conditions in {selected_country}, 
+    the projected ROI is estimated at **{roi_p50:.1f}%** (P10 {roi_p10:.1f}% – P90 {roi_p90:.1f}%, 
+    {projection.n_paths:,} scenarios).
+    
+    Key factors affecting projection:
+    - Regulatory environment similarity: {format_percent(similarity.regulatory)}
+    - Economic conditions match: {format_percent(similarity.economic)}
+    - Geographic proximity: {format_percent(similarity.geographic)}
+    """)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Projected NPV (P50)", format_money(npv_p50, projection_basis),
+                  help=f"P10 {format_money(npv_p10, projection_basis)} – P90 {format_money(npv_p90, projection_basis)} "
+                       f"in {projection_basis.label}")
+    with col2:
+        st.metric("Projected IRR (P50)", "N/A" if math.isnan(irr_p50) else f"{irr_p50:.1f}%",
+                  help=f"P10 {irr_p10:.1f}% – P90 {irr_p90:.1f}% over scenarios where the IRR is defined")
+    with col3:
+        st.metric("Probability NPV > 0", f"{projection.probability_positive_npv():.0%}")
+    
+    # Fan chart of cumulative net cash flow
+    fan_p10, fan_p50, fan_p90 = projection.fan * scale
+    with profiler.span("chart/fan"):
+        st.plotly_chart(cached_figure(
+            fan_figure, projection.fan_years, fan_p10, fan_p50, fan_p90,
+            f'Projected Cumulative Net Cash Flow in {selected_country} ({projection_basis.unit})',
+            unit=projection_basis.unit
+        ), width="stretch")
+    
+    # Tornado of the condition factors: every factor swept over its range,
+    # all sweeps evaluated as one batched, cached simulation
+    st.subheader(f"🌪️ What Drives the Outcome in {selected_country}")
+    with profiler.span("data/sensitivity"):
+        sensitivity = get_sensitivity(source_country, source_project_name, selected_country, energy_type,
+                                      selected_region)
+    outcome = st.radio("Outcome", ["Median NPV", "Median ROI"], horizontal=True, key="sensitivity_metric")
+    metric, scale_by, axis_title = (
+        ("npv", scale, f"Median NPV ({projection_basis.unit})") if outcome == "Median NPV"
+        else ("roi", 1.0, "Median ROI (%)")
+    )
+    rows = sensitivity.tornado(metric)
+    labels = [f"{row['factor']} ({row['low']:,.4g} – {row['high']:,.4g} {row['unit']})" for row in rows]
+    with profiler.span("chart/tornado"):
+        st.plotly_chart(cached_figure(
+            tornado_figure, labels, [row["at_low"] * scale_by for row in rows],
+            [row["at_high"] * scale_by for row in rows], sensitivity.base[metric] * scale_by,
+            f'{outcome} Sensitivity in {selected_region or selected_country}', axis_title
+        ), width="stretch")
+    top = rows[0]
+    swing = format_money(top["swing"] * scale, projection_basis) if metric == "npv" else f"{top['swing']:.1f} pts"
+    st.caption(f"Each bar moves one condition from the low to the high end of its range with the others at "
+               f"today's values ({sensitivity.n_paths:,} scenarios per point). **{top['factor']}** moves the "
+               f"{outcome.lower()} most, by {swing}.")
+
+# Tab 4: Regulatory Evolution
+@st.fragment
+@profiler.timed("tab/regulatory")
+def render_regulatory_tab(selected_country, source_country, source_project_name):
+    source_project = get_source_project(source_country, source_project_name)
+    st.header("📜 Regulatory Evolution Timeline")
+    
+    if not source_project:
+        st.warning("Please select a source project from the sidebar.")
+        return
+    
+    st.subheader(f"Regulatory Changes: {source_country} ({source_project['year']} - 2024)")
+    
+    # Events are classified once per data version into a (country, year)
+    # index; the chart, cards and as-of lookups read from it
+    index = get_regulatory_index()
+    years, levels = index.timeline(source_country)
+    curve_years, curve = index.favorability_curve(source_country)
+    
+    # Create timeline chart
+    with profiler.span("chart/regulatory"):
+        st.plotly_chart(cached_figure(regulatory_figure, years, levels, curve_years, curve), width="stretch")
+    
+    # Timeline events
+    st.subheader("📅 Timeline Events")
+    for event in index.events(source_country):
+        if event['favorability'] < 0:
+            impact_color = "#ef4444"
+        elif event['impact_label'] == "High":
+            impact_color = "#10b981"
+        else:
+            impact_color = "#f59e0b"
+        st.markdown(f"""
+            <div class="timeline-item" style="border-left-color: {impact_color};">
+                <h4>{event['year']}: {event['event']}</h4>
+                <p style="color: #b0b0b0;">{event['impact']} ({event['impact_label']} impact)</p>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    # Regulatory state as of a chosen year
+    if len(years) and years[0] < years[-1]:
+        as_of_year = st.slider(
+            "Regulatory status as of",
+            int(years[0]),
+            int(years[-1]),
+            int(years[-1]),
+            key=f"regulatory_as_of_{source_country}"
+        )
+        state = index.as_of(source_country, as_of_year)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Cumulative Favorability", state['favorability'])
+        col2.metric("Events So Far", state['events'])
+        col3.metric("Latest Event", state['latest']['event'] if state['latest'] else "None")
+    
+    # Current regulatory status
+    st.divider()
+    st.subheader("🔄 Current Regulatory Status (2024)")
+    if selected_country in REFERENCE.conditions:
+        current_reg = REFERENCE.conditions[selected_country]
+        st.markdown(f"""
+            <div class="project-card">
+                <h4>{selected_country} - Current Framework</h4>
+                <p><strong>Regulatory Framework:</strong> {current_reg.get('Regulatory Framework', 'N/A')}</p>
+                <p><strong>Incentive Status:</strong> {current_reg.get('YEKDEM Incentive', current_reg.get('Government Support', 'N/A'))}</p>
+                <p><strong>Tax Incentive:</strong> {current_reg.get('Tax Incentive', 'N/A')}</p>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    # Latest events the Researcher Agent extracted from Official Gazettes
+    gazette_events = get_gazette_events(selected_country)
+    if gazette_events:
+        st.subheader(f"📰 Official Gazette Updates: {selected_country}")
+        for event in gazette_events[-5:][::-1]:
+            st.markdown(f"""
+                <div class="timeline-item">
+                    <h4>{event.get('date') or event['year']}: {event['event']}</h4>
+                    <p style="color: #b0b0b0;">{event['impact']}</p>
+                </div>
+            """, unsafe_allow_html=True)
+    
+    # Comparison
+    st.subheader("📊 Regulatory Comparison: Then vs Now")
+    then_year, now_year = select_comparison_years(
+        source_project['year'], f"regulatory_years_{source_country}_{source_project_name}"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write(f"**Then ({source_country}, {then_year}):**")
+        st.json(conditions_as_of(source_country, then_year))
+    with col2:
+        st.write(f"**Now ({selected_country}, {now_year}):**")
+        now_conditions = conditions_as_of(selected_country, now_year)
+        if now_conditions:
+            st.json(now_conditions)
+        else:
+            st.info("Data not available for this country")
+
+# Researcher Agent: one background gazette ingestion loop per process
+@st.cache_resource
+def get_gazette_watcher():
+    return GazetteWatcher(GAZETTE_SOURCE, GAZETTE_STORE, interval=30).start()
+
+# Process-wide agent pipeline runner shared by all sessions
+@st.cache_resource
+def get_pipeline_runner():
+    return PipelineRunner(simulated_latency=0.5)
+
+# Agent progress for an in-flight or finished pipeline run
+def show_pipeline_progress(run):
+    progress_bar = st.progress(run.progress)
+    status_text = st.empty()
+    
+    if run.failed:
+        status_text.error(f"❌ Analysis failed: {run.error}")
+    elif run.done:
+        status_text.success("✅ Analysis Complete!")
+    else:
+        active = run.active_steps()
+        status_text.text(" | ".join(f"🔄 {step.agent}: {step.action}" for step in active) or "🔄 Scheduling agents...")
+
+# Polls the background run without blocking the script thread, then hands
+# back to the tab once the run has finished
+@st.fragment(run_every=0.25)
+@profiler.timed("pipeline/poll")
+def poll_pipeline_progress(run):
+    show_pipeline_progress(run)
+    if run.done:
+        st.rerun()
+
+# Tab 5: AI Simulation
+@st.fragment
+@profiler.timed("tab/simulation")
+def render_simulation_tab(selected_country, source_country, source_project_name, energy_type):
+    st.header("🤖 Multi-AI Agent Simulation")
+    st.caption("Watch the AI agents work in real-time (simulated)")
+    
+    # Agents run as a DAG on a background loop; runs are cached per source
+    # project, target country and energy type, and start over when the
+    # catalog or the ingested gazette events change
+    run = get_pipeline_runner().submit(
+        (source_country, source_project_name, selected_country, energy_type, get_catalog().version,
+         gazette_version()),
+        {
+            "source_country": source_country,
+            "source_project_name": source_project_name,
+            "source_project": get_source_project(source_country, source_project_name),
+            "selected_country": selected_country,
+            "current_conditions": REFERENCE.conditions.get(selected_country, {}),
+            "gazette_events": get_gazette_events(selected_country),
+            "knowledge_graph": get_knowledge_graph(),
+            "energy_type": energy_type,
+            # Scores and policy-lever sweeps of the pair, as Tabs 2 and 3 show them
+            "similarity": get_similarity(source_country, source_project_name, selected_country),
+            "sensitivity": get_sensitivity(source_country, source_project_name, selected_country, energy_type),
+            # Model calls are cached on disk, shared between sessions and batched
+            "agent_client": get_agent_client()
+        }
+    )
+    
+    if not run.done:
+        poll_pipeline_progress(run)
+        return
+    
+    show_pipeline_progress(run)
+    if run.failed:
+        return
+    
+    # Tree of Thought visualization
+    st.subheader("🌳 Tree of Thought - AI Reasoning Process")
+    
+    similarity = run.results["Similarity Engine"]
+    policy = run.results["Policy Transfer Agent"]
+    reasoning_tree = {
+        "Root": f"Can project from {source_country} be transferred to {selected_country}?",
+        "Branch 1": {
+            "Regulatory": f"Legal framework ({format_percent(similarity['regulatory'])} match)",
+            "Economic": f"Economic conditions ({format_percent(similarity['economic'])} match)",
+            "Geographic": f"Distance between sites ({format_percent(similarity['geographic'])} proximity)"
+        },
+        "Branch 2": {
+            "Policy Gap": policy["policy_gap"],
+            "Recommendation": policy["recommendation"],
+            "Expected Impact": "N/A" if policy["expected_impact"] is None
+            else f"{policy['expected_impact']:+.1f} pts median ROI from the best policy lever"
+        }
+    }
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.json(reasoning_tree)
+    
+    with col2:
+        # Visualization
+        with profiler.span("chart/sunburst"):
+            st.plotly_chart(cached_figure(
+                sunburst_figure,
+                ["Root", "Regulatory", "Economic", "Geographic", "Policy Gap", "Recommendation"],
+                ["", "Root", "Root", "Root", "Root", "Policy Gap"],
+                [100, *(0.0 if math.isnan(similarity[component]) else similarity[component]
+                        for component in ("regulatory", "economic", "geographic")), 50, 15],
+                ['#667eea', '#10b981', '#f59e0b', '#10b981', '#ef4444', '#764ba2'],
+                "Decision Tree Visualization"
+            ), width="stretch")
+    
+    # Knowledge graph: how the source project connects to the target country,
+    # and which regulations came before high-ROI projects next door
+    graph = run.results["Knowledge Graph Builder"]
+    if "path" in graph:
+        st.subheader("🕸️ Knowledge Graph")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Nodes", f"{graph['nodes']:,}")
+        col2.metric("Edges", f"{graph['graph_edges']:,}")
+        col3.metric("Precedents", len(graph["precedents"]))
+        
+        if graph["path"]:
+            st.markdown("**Connection:** " + " → ".join(graph["path"]))
+        
+        if graph["precedents"]:
+            import pandas as pd
+            
+            st.write(f"**Regulations preceding high-ROI projects in countries bordering {selected_country}:**")
+            st.dataframe(
+                pd.DataFrame(graph["precedents"]).rename(columns={
+                    "country": "Country",
+                    "project": "Project",
+                    "roi": "ROI (%)",
+                    "project_year": "Project Year",
+                    "regulation": "Regulation",
+                    "regulation_year": "Regulation Year"
+                }),
+                width="stretch",
+                hide_index=True
+            )
+        else:
+            st.info(f"No high-ROI projects found in countries bordering {selected_country}")
+
+# Tab 6: Portfolio Optimizer - which source projects to transfer where
+# within a capital budget and risk limits
+@st.fragment
+@profiler.timed("tab/portfolio")
+def render_portfolio_tab(energy_type):
+    st.header("🧮 Portfolio Optimizer")
+    st.markdown(f"Choose the set of project transfers with the highest expected return for a capital budget. "
+                f"Every catalog project is scored at every target site for **{energy_type}**.")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        budget = st.number_input("Capital Budget (Million USD)", min_value=10.0, value=1000.0, step=50.0,
+                                 key="portfolio_budget",
+                                 help=f"Investments and returns are in {PROJECTION_BASIS.label}")
+    with col2:
+        min_similarity = st.slider("Minimum Similarity (%)", 0, 100, 0, key="portfolio_min_similarity")
+    with col3:
+        max_loss = st.slider("Max. Probability NPV < 0 (%)", 0, 100, 100, key="portfolio_max_loss",
+                             help="Transfers more likely than this to lose money are left out")
+    with col4:
+        max_country_share = st.slider("Max. Budget Share per Country (%)", 10, 100, 50, key="portfolio_country_share")
+    
+    with profiler.span("data/portfolio"):
+        portfolio = optimize_portfolio(budget, energy_type, min_similarity=min_similarity,
+                                       max_loss_probability=max_loss / 100, max_country_share=max_country_share / 100)
+    transfers = portfolio.transfers()
+    if not transfers:
+        st.warning("No transfer fits the budget and risk limits. Raise the budget or relax the limits.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Capital Deployed", f"${portfolio.cost:,.1f}M", delta=f"{portfolio.cost / budget:.0%} of budget",
+                  delta_color="off")
+    with col2:
+        st.metric("Expected Return", f"${portfolio.expected_return:,.1f}M")
+    with col3:
+        st.metric("Portfolio ROI (P50)", f"{portfolio.roi:.1f}%")
+    with col4:
+        st.metric("Transfers", len(transfers), help=f"Chosen from {len(portfolio.candidates):,} candidates "
+                  f"by the {portfolio.method} solver in {portfolio.seconds * 1000:.0f} ms")
+    
+    totals = portfolio.country_totals()
+    with profiler.span("chart/portfolio"):
+        st.plotly_chart(cached_figure(
+            portfolio_figure, [row["country"] for row in totals], [row["investment"] for row in totals],
+            [row["expected_return"] for row in totals]
+        ), width="stretch")
+    
+    import pandas as pd
+    
+    st.subheader("🌍 Totals per Country")
+    st.dataframe(
+        pd.DataFrame(totals).rename(columns={
+            "country": "Country",
+            "transfers": "Transfers",
+            "investment": "Investment ($M)",
+            "expected_return": "Expected Return ($M)",
+            "roi": "ROI (%)",
+            "budget_share": "Budget Share"
+        }).round(2),
+        width="stretch",
+        hide_index=True
+    )
+    
+    st.subheader("📋 Chosen Transfers")
+    st.dataframe(
+        pd.DataFrame(transfers).rename(columns={
+            "source_country": "Source Country",
+            "source_project": "Project",
+            "target_country": "Target Country",
+            "target_region": "Target Region",
+            "investment": "Investment ($M)",
+            "expected_return": "Expected Return ($M)",
+            "roi_p50": "ROI P50 (%)",
+            "roi_p10": "ROI P10 (%)",
+            "loss_probability": "P(NPV < 0)",
+            "similarity": "Similarity (%)"
+        }).round(2),
+        width="stretch",
+        hide_index=True
+    )
+
+# A site picked on the map becomes the sidebar selection: countries and
+# regions set the target, projects set the source project
+def apply_map_selection():
+    selection = st.session_state.pop("map_selection", None)
+    if selection is None:
+        return
+    kind, country, *rest = selection
+    if kind == "project":
+        st.session_state["source_country"] = country
+        st.session_state["source_project"] = rest[0]
+    else:
+        st.session_state["target_country"] = country
+        if kind == "region":
+            st.session_state["target_region"] = rest[0]
+        else:
+            st.session_state.pop("target_region", None)
+
+# Drops a stored selection that is no longer among a selectbox's options
+# (e.g. the source country after it was picked as the target on the map),
+# so the widget falls back to its default
+def keep_valid_selection(key, options):
+    if key in st.session_state and st.session_state[key] not in options:
+        del st.session_state[key]
+
+# Rolling per-section latencies of this process, shown when profiling is
+# enabled with CECECO_PROFILE
+def show_profiler_panel():
+    st.divider()
+    with st.expander("⏱️ Rerun Latency", expanded=False):
+        rows = profiler.summary()
+        if not rows:
+            st.caption("No timings recorded yet.")
+            return
+        st.dataframe(
+            [{key: round(value, 1) if isinstance(value, float) else value for key, value in row.items()} for row in rows],
+            hide_index=True
+        )
+        st.download_button("Prometheus metrics", profiler.prometheus_text(), file_name="cececo.prom", mime="text/plain")
 
 # Main App
+@profiler.timed("rerun")
 def main():
+    configure_page()
+    
     # Header
     st.markdown('<h1 class="main-header">🌍 CECECO-SIM</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Simulation & Integration Module | Multi-AI Agent Architecture</p>', unsafe_allow_html=True)
     
+    catalog = get_catalog()
+    apply_map_selection()
+    
     # Sidebar
-    with st.sidebar:
+    with st.sidebar, profiler.span("sidebar"):
         st.header("🎛️ Control Panel")
+        target_countries = REFERENCE.country_names
+        keep_valid_selection("target_country", target_countries)
         selected_country = st.selectbox(
             "Select Target Country",
-            list(CECECO_COUNTRIES.keys())
+            target_countries,
+            key="target_country"
         )
         
+        source_countries = get_source_countries(selected_country)
+        keep_valid_selection("source_country", source_countries)
         source_country = st.selectbox(
             "Select Source Project Country",
-            [c for c in CECECO_COUNTRIES.keys() if c != selected_country and c in MOCK_PROJECTS],
-            index=0 if "Turkey" in [c for c in CECECO_COUNTRIES.keys() if c != selected_country and c in MOCK_PROJECTS] else 0
+            source_countries,
+            key="source_country"
         )
         
         # Region selection if available
-        if source_country in CECECO_COUNTRIES and CECECO_COUNTRIES[source_country].get("regions"):
-            source_regions = list(CECECO_COUNTRIES[source_country]["regions"].keys())
+        source_projects = catalog.project_names(source_country)
+        keep_valid_selection("source_project", source_projects)
+        if source_country in REFERENCE.countries and REFERENCE.countries[source_country].regions:
             source_project_name = st.selectbox(
                 "Select Source Project",
-                [p for p in MOCK_PROJECTS.get(source_country, {}).keys()],
-                format_func=lambda x: f"{x} ({MOCK_PROJECTS[source_country][x]['year']})"
+                source_projects,
+                format_func=lambda x: f"{x} ({catalog.record(source_country, x)['year']})",
+                key="source_project"
             )
         else:
-            source_project_name = list(MOCK_PROJECTS.get(source_country, {}).keys())[0] if MOCK_PROJECTS.get(source_country) else None
+            source_project_name = st.session_state.get("source_project", next(iter(source_projects), None))
         
-        if selected_country in CECECO_COUNTRIES and CECECO_COUNTRIES[selected_country].get("regions"):
-            target_regions = list(CECECO_COUNTRIES[selected_country]["regions"].keys())
+        if selected_country in REFERENCE.countries and REFERENCE.countries[selected_country].regions:
+            target_regions = REFERENCE.countries[selected_country].region_names
+            keep_valid_selection("target_region", target_regions)
             selected_region = st.selectbox(
                 "Select Target Region",
-                target_regions
+                target_regions,
+                key="target_region"
             )
         else:
             selected_region = None
         
         energy_type = st.selectbox(
             "Energy Type",
-            ["Wind Energy", "Solar Energy", "Hydro Energy"]
+            ENERGY_TYPES
+        )
+        
+        # Money amounts restated in constant prices and/or a local currency
+        money_options = money_bases(source_country, selected_country)
+        keep_valid_selection("money_basis", money_options)
+        money_basis = st.selectbox(
+            "Monetary Basis",
+            money_options,
+            format_func=lambda basis: basis.label[0].upper() + basis.label[1:],
+            key="money_basis",
+            help="Constant prices deflate each year's amounts with the currency's CPI; "
+                 "local currencies convert at each year's average exchange rate"
         )
         
         st.divider()
         
         st.header("🤖 AI Agents Status")
-        agents = get_agent_status()
+        agents = get_agent_status(get_gazette_watcher().stats, get_agent_client().stats())
         for agent in agents:
             status_class = f"status-{agent['status']}"
             st.markdown(f"""
@@ -392,446 +1352,48 @@ def main():
         st.divider()
         st.info("💡 This is a demo prototype. Features are simulated for demonstration purposes.")
     
-    # Get source project data
-    source_project = None
-    if source_country in MOCK_PROJECTS and source_project_name:
-        source_project = MOCK_PROJECTS[source_country][source_project_name]
-    
     # Main Content
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    # Tabs track the selected tab and rerun on switch, so only the open tab's
+    # fragment executes. Each fragment receives just the sidebar inputs it
+    # depends on and reruns on its own for interactions inside the tab.
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
         "🗺️ Regional Map", 
         "📊 Project Analysis", 
         "💰 Profit/Loss Analysis",
         "📜 Regulatory Evolution",
-        "🤖 AI Simulation"
-    ])
+        "🤖 AI Simulation",
+        "🧮 Portfolio Optimizer"
+    ], key="active_tab", on_change="rerun")
     
-    # Tab 1: Regional Map
-    with tab1:
-        st.header("CECECO Region Overview")
-        
-        # Create map with dark theme
-        m = folium.Map(
-            location=[40, 60],
-            zoom_start=4,
-            tiles='CartoDB dark_matter'  # Dark theme map
-        )
-        
-        # Add country markers
-        for country, data in CECECO_COUNTRIES.items():
-            folium.CircleMarker(
-                location=[data["lat"], data["lon"]],
-                radius=15,
-                popup=f"{country} ({data['code']})",
-                tooltip=country,
-                color=data["color"],
-                fill=True,
-                fillColor=data["color"],
-                fillOpacity=0.7
-            ).add_to(m)
-            
-            # Add regional markers if available
-            if "regions" in data and data["regions"]:
-                for region_name, region_data in data["regions"].items():
-                    folium.CircleMarker(
-                        location=[region_data["lat"], region_data["lon"]],
-                        radius=8,
-                        popup=f"{region_name} ({region_data['projects']} projects)",
-                        tooltip=region_name,
-                        color=data["color"],
-                        fill=True,
-                        fillColor=data["color"],
-                        fillOpacity=0.5
-                    ).add_to(m)
-        
-        # Highlight selected countries and regions
-        if selected_country in CECECO_COUNTRIES:
-            target = CECECO_COUNTRIES[selected_country]
-            folium.Marker(
-                [target["lat"], target["lon"]],
-                popup=f"🎯 Target: {selected_country}",
-                icon=folium.Icon(color='red', icon='target', prefix='fa')
-            ).add_to(m)
-            
-            if selected_region and selected_region in target.get("regions", {}):
-                region = target["regions"][selected_region]
-                folium.Marker(
-                    [region["lat"], region["lon"]],
-                    popup=f"🎯 Target Region: {selected_region}",
-                    icon=folium.Icon(color='orange', icon='map-marker', prefix='fa')
-                ).add_to(m)
-        
-        if source_country in CECECO_COUNTRIES and source_project:
-            source = CECECO_COUNTRIES[source_country]
-            folium.Marker(
-                [source["lat"], source["lon"]],
-                popup=f"📦 Source: {source_country}",
-                icon=folium.Icon(color='blue', icon='database', prefix='fa')
-            ).add_to(m)
-            
-            if source_project.get("region") in source.get("regions", {}):
-                region = source["regions"][source_project["region"]]
-                folium.Marker(
-                    [region["lat"], region["lon"]],
-                    popup=f"📦 Source Project: {source_project_name}",
-                    icon=folium.Icon(color='lightblue', icon='industry', prefix='fa')
-                ).add_to(m)
-        
-        st_folium(m, width=1200, height=600)
-        
-        # Regional details
-        if selected_country in CECECO_COUNTRIES and CECECO_COUNTRIES[selected_country].get("regions"):
-            st.subheader(f"📍 Regions in {selected_country}")
-            regions_data = CECECO_COUNTRIES[selected_country]["regions"]
-            cols = st.columns(len(regions_data))
-            for i, (region_name, region_info) in enumerate(regions_data.items()):
-                with cols[i]:
-                    st.markdown(f"""
-                        <div class="region-card">
-                            <h4>{region_name}</h4>
-                            <p><strong>Projects:</strong> {region_info['projects']}</p>
-                        </div>
-                    """, unsafe_allow_html=True)
-    
-    # Tab 2: Project Analysis - Then vs Now
-    with tab2:
-        st.header("📊 Case-Based Reasoning Analysis: Then vs Now")
-        
-        if not source_project:
-            st.warning("Please select a source project from the sidebar.")
-            return
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader(f"📦 Source Project: {source_project_name}")
-            st.markdown(f"""
-                <div class="project-card">
-                    <h3>{source_project_name}</h3>
-                    <p><strong>Year:</strong> {source_project['year']}</p>
-                    <p><strong>Region:</strong> {source_project['region']}</p>
-                    <p><strong>Capacity:</strong> {source_project['capacity']}</p>
-                    <p><strong>Investment:</strong> {source_project['investment']}</p>
-                    <p><strong>Success Rate:</strong> {source_project['success_rate']}%</p>
-                </div>
-            """, unsafe_allow_html=True)
-            
-            st.subheader("🔙 Conditions Then (Project Year)")
-            for factor, value in source_project['then_conditions'].items():
-                st.write(f"📌 **{factor}**: {value}")
-        
-        with col2:
-            st.subheader(f"🎯 Target: {selected_country}" + (f" - {selected_region}" if selected_region else ""))
-            
-            # Current conditions
-            current_cond = CURRENT_CONDITIONS.get(selected_country, {})
-            st.subheader("🔄 Conditions Now (2024)")
-            for factor, value in current_cond.items():
-                st.write(f"📌 **{factor}**: {value}")
-            
-            # Comparison
-            st.divider()
-            st.subheader("📈 Change Analysis")
-            
-            if selected_country in CURRENT_CONDITIONS:
-                changes = []
-                for key in source_project['then_conditions'].keys():
-                    if key in current_cond:
-                        then_val = source_project['then_conditions'][key]
-                        now_val = current_cond[key]
-                        # Simple comparison (in real app, would parse and compare)
-                        changes.append({
-                            "factor": key,
-                            "then": then_val,
-                            "now": now_val,
-                            "change": "Improved" if random.random() > 0.3 else "Deteriorated"
-                        })
-                
-                for change in changes[:5]:  # Show first 5
-                    if change["change"] == "Improved":
-                        st.success(f"✅ **{change['factor']}**: {change['then']} → {change['now']}")
-                    else:
-                        st.error(f"❌ **{change['factor']}**: {change['then']} → {change['now']}")
-        
-        # Similarity Score
-        st.divider()
-        similarity_score = random.randint(70, 95)
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Overall Similarity", f"{similarity_score}%", delta=f"{similarity_score-80}%")
-        with col2:
-            st.metric("Regulatory Match", f"{random.randint(75, 95)}%")
-        with col3:
-            st.metric("Economic Match", f"{random.randint(65, 85)}%")
-        
-        # Recommendation
-        st.divider()
-        st.subheader("💡 AI Recommendation")
-        if similarity_score >= 85:
-            st.success(f"""
-            ✅ **HIGH TRANSFERABILITY**: The project from {source_country} has a {similarity_score}% 
-            similarity match with {selected_country}. Key success factors align well, with minor 
-            adjustments needed for regulatory framework.
-            """)
-        elif similarity_score >= 70:
-            st.warning(f"""
-            ⚠️ **MODERATE TRANSFERABILITY**: The project shows {similarity_score}% similarity. 
-            Significant adjustments required, particularly in incentive programs and regulatory alignment.
-            """)
-        else:
-            st.error(f"""
-            ❌ **LOW TRANSFERABILITY**: Only {similarity_score}% similarity detected. 
-            Major policy and economic reforms needed before project transfer is viable.
-            """)
-    
-    # Tab 3: Profit/Loss Analysis
-    with tab3:
-        st.header("💰 Profit/Loss Analysis: Source Country Performance")
-        
-        if not source_project:
-            st.warning("Please select a source project from the sidebar.")
-            return
-        
-        st.subheader(f"Financial Performance: {source_project_name}")
-        
-        # Profit/Loss data
-        pl_data = source_project['profit_loss']
-        years = [f"Year {i+1}" for i in range(5)]
-        revenues = [pl_data[f"year_{i+1}"]["revenue"] for i in range(5)]
-        costs = [pl_data[f"year_{i+1}"]["cost"] for i in range(5)]
-        profits = [pl_data[f"year_{i+1}"]["profit"] for i in range(5)]
-        
-        # Metrics
-        col1, col2, col3, col4 = st.columns(4)
-        total_revenue = sum(revenues)
-        total_cost = sum(costs)
-        total_profit = sum(profits)
-        roi = pl_data['total_roi']
-        
-        with col1:
-            st.metric("Total Revenue (5 Years)", f"${total_revenue:.1f}M", delta=f"+{total_revenue*0.1:.1f}M")
-        with col2:
-            st.metric("Total Cost (5 Years)", f"${total_cost:.1f}M", delta=f"-{total_cost*0.05:.1f}M")
-        with col3:
-            st.metric("Total Profit (5 Years)", f"${total_profit:.1f}M", 
-                     delta=f"+{total_profit*0.15:.1f}M" if total_profit > 0 else f"{total_profit:.1f}M")
-        with col4:
-            st.metric("ROI", f"{roi}%", delta=f"+{roi*0.1:.1f}%")
-        
-        # Profit/Loss Chart
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=years,
-            y=revenues,
-            name='Revenue',
-            marker_color='#10b981',
-            opacity=0.8
-        ))
-        fig.add_trace(go.Bar(
-            x=years,
-            y=costs,
-            name='Cost',
-            marker_color='#ef4444',
-            opacity=0.8
-        ))
-        fig.add_trace(go.Scatter(
-            x=years,
-            y=profits,
-            name='Net Profit',
-            mode='lines+markers',
-            line=dict(color='#667eea', width=3),
-            marker=dict(size=10)
-        ))
-        
-        fig.update_layout(
-            title='Annual Financial Performance (Million USD)',
-            xaxis_title='Year',
-            yaxis_title='Amount (Million USD)',
-            barmode='group',
-            height=500,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e0e0e0'),
-            legend=dict(bgcolor='rgba(0,0,0,0)')
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Yearly breakdown
-        st.subheader("📅 Yearly Breakdown")
-        for i, year in enumerate(years):
-            year_data = pl_data[f"year_{i+1}"]
-            profit_class = "profit-card" if year_data["profit"] > 0 else "loss-card"
-            st.markdown(f"""
-                <div class="project-card {profit_class}">
-                    <h4>{year}</h4>
-                    <p><strong>Revenue:</strong> ${year_data['revenue']:.1f}M | 
-                    <strong>Cost:</strong> ${year_data['cost']:.1f}M | 
-                    <strong>Profit:</strong> ${year_data['profit']:.1f}M</p>
-                </div>
-            """, unsafe_allow_html=True)
-        
-        # Projected performance for target country
-        st.divider()
-        st.subheader(f"📊 Projected Performance in {selected_country}")
-        st.info(f"""
-        Based on similarity analysis and current conditions in {selected_country}, 
-        the projected ROI is estimated at **{roi * (similarity_score/100) * random.uniform(0.85, 1.15):.1f}%**.
-        
-        Key factors affecting projection:
-        - Regulatory environment similarity: {random.randint(70, 95)}%
-        - Economic conditions match: {random.randint(65, 90)}%
-        - Geographic compatibility: {random.randint(80, 95)}%
-        """)
+    if tab1.open:
+        with tab1:
+            render_regional_map_tab(selected_country, selected_region, source_country, source_project_name, energy_type)
     
-    # Tab 4: Regulatory Evolution
-    with tab4:
-        st.header("📜 Regulatory Evolution Timeline")
-        
-        if not source_project:
-            st.warning("Please select a source project from the sidebar.")
-            return
-        
-        st.subheader(f"Regulatory Changes: {source_country} ({source_project['year']} - 2024)")
-        
-        # Timeline visualization
-        evolution = source_project['regulatory_evolution']
-        
-        # Create timeline chart
-        fig = go.Figure()
-        
-        years = [e['year'] for e in evolution]
-        impacts = []
-        for e in evolution:
-            if "High" in e['impact'] or "Extended" in e['impact']:
-                impacts.append(3)
-            elif "Moderate" in e['impact'] or "Improved" in e['impact']:
-                impacts.append(2)
-            else:
-                impacts.append(1)
-        
-        fig.add_trace(go.Scatter(
-            x=years,
-            y=impacts,
-            mode='lines+markers',
-            name='Regulatory Impact',
-            line=dict(color='#667eea', width=3),
-            marker=dict(size=15, color='#764ba2')
-        ))
-        
-        fig.update_layout(
-            title='Regulatory Evolution Impact Over Time',
-            xaxis_title='Year',
-            yaxis_title='Impact Level',
-            height=400,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#e0e0e0'),
-            yaxis=dict(tickmode='array', tickvals=[1, 2, 3], ticktext=['Low', 'Moderate', 'High'])
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Timeline events
-        st.subheader("📅 Timeline Events")
-        for event in evolution:
-            impact_color = "#10b981" if "High" in event['impact'] or "Extended" in event['impact'] else "#f59e0b"
-            st.markdown(f"""
-                <div class="timeline-item" style="border-left-color: {impact_color};">
-                    <h4>{event['year']}: {event['event']}</h4>
-                    <p style="color: #b0b0b0;">{event['impact']}</p>
-                </div>
-            """, unsafe_allow_html=True)
-        
-        # Current regulatory status
-        st.divider()
-        st.subheader("🔄 Current Regulatory Status (2024)")
-        if selected_country in CURRENT_CONDITIONS:
-            current_reg = CURRENT_CONDITIONS[selected_country]
-            st.markdown(f"""
-                <div class="project-card">
-                    <h4>{selected_country} - Current Framework</h4>
-                    <p><strong>Regulatory Framework:</strong> {current_reg.get('Regulatory Framework', 'N/A')}</p>
-                    <p><strong>Incentive Status:</strong> {current_reg.get('YEKDEM Incentive', current_reg.get('Government Support', 'N/A'))}</p>
-                    <p><strong>Tax Incentive:</strong> {current_reg.get('Tax Incentive', 'N/A')}</p>
-                </div>
-            """, unsafe_allow_html=True)
-        
-        # Comparison
-        st.subheader("📊 Regulatory Comparison: Then vs Now")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.write("**Then (Project Year):**")
-            st.json(source_project['then_conditions'])
-        with col2:
-            st.write("**Now (2024):**")
-            if selected_country in CURRENT_CONDITIONS:
-                st.json(CURRENT_CONDITIONS[selected_country])
-            else:
-                st.info("Data not available for this country")
-    
-    # Tab 5: AI Simulation
-    with tab5:
-        st.header("🤖 Multi-AI Agent Simulation")
-        st.caption("Watch the AI agents work in real-time (simulated)")
-        
-        # Simulation steps
-        steps = [
-            {"agent": "Researcher Agent", "action": "Scanning Official Gazettes", "status": "complete"},
-            {"agent": "Data Parser", "action": "Extracting regulatory data", "status": "complete"},
-            {"agent": "Knowledge Graph Builder", "action": "Building relationship graph", "status": "in_progress"},
-            {"agent": "Gap Analysis Agent", "action": "Comparing regulations", "status": "pending"},
-            {"agent": "Similarity Engine", "action": "Calculating cosine similarity", "status": "pending"},
-            {"agent": "Policy Transfer Agent", "action": "Simulating policy transfer", "status": "pending"}
-        ]
-        
-        # Animated progress
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i, step in enumerate(steps):
-            status_text.text(f"🔄 {step['agent']}: {step['action']}")
-            progress_bar.progress((i + 1) / len(steps))
-            time.sleep(0.5)
-        
-        status_text.success("✅ Analysis Complete!")
-        
-        # Tree of Thought visualization
-        st.subheader("🌳 Tree of Thought - AI Reasoning Process")
-        
-        reasoning_tree = {
-            "Root": f"Can project from {source_country} be transferred to {selected_country}?",
-            "Branch 1": {
-                "Regulatory": f"✅ Similar legal framework ({random.randint(75, 95)}% match)",
-                "Economic": f"⚠️ Different incentive structure ({random.randint(60, 80)}% match)",
-                "Geographic": f"✅ Comparable wind patterns ({random.randint(80, 95)}% match)"
-            },
-            "Branch 2": {
-                "Policy Gap": "Missing equivalent incentive program",
-                "Recommendation": "Implement adapted feed-in tariff system",
-                "Expected Impact": f"+{random.randint(10, 20)}% project viability"
-            }
-        }
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.json(reasoning_tree)
-        
-        with col2:
-            # Visualization
-            fig = go.Figure(go.Sunburst(
-                labels=["Root", "Regulatory", "Economic", "Geographic", "Policy Gap", "Recommendation"],
-                parents=["", "Root", "Root", "Root", "Root", "Policy Gap"],
-                values=[100, 85, 65, 90, 50, 15],
-                branchvalues="total",
-                marker=dict(colors=['#667eea', '#10b981', '#f59e0b', '#10b981', '#ef4444', '#764ba2'])
-            ))
-            fig.update_layout(
-                title="Decision Tree Visualization",
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='#e0e0e0')
-            )
-            st.plotly_chart(fig, use_container_width=True)
+    if tab2.open:
+        with tab2:
+            render_project_analysis_tab(selected_country, selected_region, source_country, source_project_name,
+                                        money_basis)
+    
+    if tab3.open:
+        with tab3:
+            render_profit_loss_tab(selected_country, selected_region, source_country, source_project_name, energy_type,
+                                   money_basis)
+    
+    if tab4.open:
+        with tab4:
+            render_regulatory_tab(selected_country, source_country, source_project_name)
+    
+    if tab5.open:
+        with tab5:
+            render_simulation_tab(selected_country, source_country, source_project_name, energy_type)
+    
+    if tab6.open:
+        with tab6:
+            render_portfolio_tab(energy_type)
+    
+    if profiler.enabled:
+        with st.sidebar:
+            show_profiler_panel()
     
     # Footer
     st.markdown("""
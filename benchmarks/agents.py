@@ -0,0 +1,136 @@
+"""Agent model-call benchmark against the local stub model server.
+
+Usage::
+
+    python benchmarks/agents.py --sessions 8 32 --questions 20 --distinct 50 --latency 0.2
+
+``--sessions`` concurrent sessions each ask ``--questions`` questions drawn
+(with repeats, as sessions browsing popular selections do) from
+``--distinct`` possible ones. The stub model server answers a batch after
+``--latency`` seconds plus ``--per-request-latency`` per request. Three
+setups are compared:
+
+- direct: one HTTP request per call, no cache;
+- client, cold: ``AgentClient`` with an empty on-disk cache;
+- client, warm: the same client asked again, answering from the cache.
+
+For each the benchmark reports wall time, call latency percentiles and
+the requests and batches the model server saw.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo.agents import DEFAULT_MODEL, AgentClient, HttpModel, ResponseCache, StubModel, StubModelServer  # noqa: E402
+from cececo.pipeline import POLICY_PROMPT  # noqa: E402
+
+
+def workload(sessions, questions, distinct, seed=0):
+    """Questions per session; popular questions are asked more often (Zipf-like)."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, distinct + 1)
+    picks = rng.choice(distinct, size=(sessions, questions), p=weights / weights.sum())
+    return [[{"target": f"Country {pick}", "missing_factors": [f"Factor {pick % 7}"]} for pick in row]
+            for row in picks]
+
+
+def run_sessions(ask, questions):
+    latencies = []
+    lock = threading.Lock()
+
+    def session(inputs_list):
+        for inputs in inputs_list:
+            started = time.perf_counter()
+            ask(inputs)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=session, args=(inputs_list,)) for inputs_list in questions]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, np.array(latencies)
+
+
+def measure(session_counts, questions, distinct, latency, per_request_latency, max_concurrency, batch_window):
+    results = []
+    for sessions in session_counts:
+        stub = StubModel(latency, per_request_latency)
+        server = StubModelServer(stub).start()
+        cache_dir = tempfile.mkdtemp(prefix="cececo-agent-cache-")
+        try:
+            work = workload(sessions, questions, distinct)
+            model = HttpModel(server.url)
+
+            def direct(inputs):
+                return model.complete(DEFAULT_MODEL, [
+                    {"agent": "Policy Transfer Agent", "prompt": POLICY_PROMPT, "inputs": inputs}
+                ])[0]
+
+            client = AgentClient(model, ResponseCache(cache_dir), max_concurrency=max_concurrency,
+                                 batch_window=batch_window)
+
+            def cached(inputs):
+                return client.call("Policy Transfer Agent", POLICY_PROMPT, inputs)
+
+            for setup, ask in (("direct", direct), ("client, cold", cached), ("client, warm", cached)):
+                requests, batches = stub.requests, stub.batches
+                seconds, latencies = run_sessions(ask, work)
+                p50, p95 = np.percentile(latencies, (50, 95)) * 1000
+                results.append({
+                    "sessions": sessions,
+                    "setup": setup,
+                    "calls": len(latencies),
+                    "seconds": seconds,
+                    "p50_ms": p50,
+                    "p95_ms": p95,
+                    "model_requests": stub.requests - requests,
+                    "model_batches": stub.batches - batches,
+                })
+            client.close()
+        finally:
+            server.close()
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cached, batched agent model calls offline.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[8, 32], help="concurrent sessions")
+    parser.add_argument("--questions", type=int, default=20, help="calls per session")
+    parser.add_argument("--distinct", type=int, default=50, help="distinct questions in the workload")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub model seconds per batch")
+    parser.add_argument("--per-request-latency", type=float, default=0.005, help="stub model seconds per request")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="client batches in flight")
+    parser.add_argument("--batch-window", type=float, default=0.01, help="client batching window in seconds")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = measure(args.sessions, args.questions, args.distinct, args.latency, args.per_request_latency,
+                      args.max_concurrency, args.batch_window)
+    print(f"{'sessions':>9} {'setup':<14}{'calls':>7}{'wall s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'requests':>10}{'batches':>9}")
+    for result in results:
+        print(f"{result['sessions']:>9} {result['setup']:<14}{result['calls']:>7}{result['seconds']:>9.2f}"
+              f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['model_requests']:>10}"
+              f"{result['model_batches']:>9}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
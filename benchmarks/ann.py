@@ -0,0 +1,122 @@
+"""Recall-vs-latency benchmark for the IVF project index against brute force.
+
+Usage::
+
+    python benchmarks/ann.py --snapshots 100000 --queries 200 --json ann.json
+
+Synthetic project snapshots are drawn around cluster centres in the
+featurizer's space (the same dimensionality as real project vectors) and
+indexed with ``IVFIndex``. For each ``n_probe`` setting the median query
+latency and recall@k against exact search over all vectors are reported,
+along with build, incremental insert and save/load times.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo.ann import IVFIndex, ProjectFeaturizer  # noqa: E402
+from cececo.data import CECECO_COUNTRIES  # noqa: E402
+from cececo.engine import get_catalog, get_factor_table  # noqa: E402
+
+
+def synthetic_vectors(n, dim, n_clusters=64, spread=0.35, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(n_clusters, dim))
+    vectors = centres[rng.integers(0, n_clusters, n)] + spread * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def _median_ms(samples):
+    return statistics.median(samples) * 1000
+
+
+def measure(n_snapshots, n_queries, k=10, probes=(1, 2, 4, 8, 16, 32), inserts=10_000, seed=0):
+    catalog = get_catalog()
+    dim = ProjectFeaturizer.fit(get_factor_table(), catalog.projects, CECECO_COUNTRIES).dim
+    vectors = synthetic_vectors(n_snapshots + inserts + n_queries, dim, seed=seed)
+    base, extra, queries = np.split(vectors, [n_snapshots, n_snapshots + inserts])
+    keys = list(range(len(base)))
+
+    started = time.perf_counter()
+    index = IVFIndex.build(keys, base, seed=seed)
+    build_seconds = time.perf_counter() - started
+
+    # Incremental inserts in small batches, as new snapshots arrive
+    started = time.perf_counter()
+    for start in range(0, inserts, 100):
+        batch = extra[start:start + 100]
+        index.add(range(len(index), len(index) + len(batch)), batch)
+    insert_seconds = time.perf_counter() - started
+
+    exact, exact_times = [], []
+    for query in queries:
+        started = time.perf_counter()
+        exact.append({key for key, _ in index.exact_search(query, k)})
+        exact_times.append(time.perf_counter() - started)
+
+    results = []
+    for n_probe in probes:
+        recalls, times = [], []
+        for query, truth in zip(queries, exact):
+            started = time.perf_counter()
+            found = index.search(query, k, n_probe)
+            times.append(time.perf_counter() - started)
+            recalls.append(len(truth & {key for key, _ in found}) / k)
+        results.append({"n_probe": n_probe, "recall": float(np.mean(recalls)), "latency_ms": _median_ms(times)})
+
+    with tempfile.TemporaryDirectory() as path:
+        started = time.perf_counter()
+        index.save(path)
+        save_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        IVFIndex.load(path)
+        load_seconds = time.perf_counter() - started
+
+    return {
+        "snapshots": len(index),
+        "dim": dim,
+        "n_lists": index.n_lists,
+        "k": k,
+        "build_seconds": build_seconds,
+        "inserts_per_second": inserts / insert_seconds if insert_seconds else float("inf"),
+        "save_seconds": save_seconds,
+        "load_seconds": load_seconds,
+        "brute_force_ms": _median_ms(exact_times),
+        "ivf": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark IVF recall and latency against brute-force search.")
+    parser.add_argument("--snapshots", type=int, default=100_000, help="indexed project snapshots")
+    parser.add_argument("--queries", type=int, default=200, help="queries per setting")
+    parser.add_argument("-k", type=int, default=10, help="neighbours per query")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    summary = measure(args.snapshots, args.queries, args.k)
+    print(f"index               {summary['snapshots']:,} snapshots x {summary['dim']} dims, {summary['n_lists']} lists")
+    print(f"build               {summary['build_seconds'] * 1000:8.1f} ms")
+    print(f"inserts             {summary['inserts_per_second']:8,.0f} /s")
+    print(f"save / load         {summary['save_seconds'] * 1000:8.1f} / {summary['load_seconds'] * 1000:.1f} ms")
+    print(f"brute force         {summary['brute_force_ms']:8.3f} ms")
+    for row in summary["ivf"]:
+        print(f"ivf n_probe={row['n_probe']:<3d}     {row['latency_ms']:8.3f} ms  recall@{summary['k']} {row['recall']:.3f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Project catalog benchmark: load time, lookup latency and memory per session.
+
+Usage::
+
+    python benchmarks/catalog.py --projects 5000 --years 25 --sessions 200
+
+A synthetic catalog is written to a temporary directory and loaded through
+``CatalogCache``. Each simulated session then renders Tab 3's data for a
+random project (cash-flow view plus column totals) the way ``app.py`` does.
+Resident memory is sampled after loading and after all sessions. The cash
+flows are memory-mapped and shared, so growth is bounded by the pages of the
+file that were touched, not by the number of sessions.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo.catalog import CatalogCache, catalog_from_projects, synthetic_projects, write_catalog  # noqa: E402
+
+
+def resident_mb():
+    """Current resident set size in MB (Linux), or NaN where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return float("nan")
+
+
+def measure(n_projects, n_years, sessions, seed=0):
+    with tempfile.TemporaryDirectory() as path:
+        write_catalog(catalog_from_projects(synthetic_projects(n_projects, n_years, seed)), path)
+        baseline_mb = resident_mb()
+
+        started = time.perf_counter()
+        catalog = CatalogCache(path).get()
+        load_seconds = time.perf_counter() - started
+        loaded_mb = resident_mb()
+
+        rng = np.random.default_rng(seed)
+        lookups = []
+        for i in rng.integers(0, len(catalog), sessions):
+            started = time.perf_counter()
+            country, name = catalog.keys[i]
+            cash_flow = catalog.cash_flow(country, name)
+            revenues, costs, profits = cash_flow.T
+            cash_flow.sum(axis=0)
+            lookups.append(time.perf_counter() - started)
+        sessions_mb = resident_mb()
+
+        return {
+            "projects": len(catalog),
+            "years": catalog.cash_flows.shape[1],
+            "cash_flow_mb": catalog.cash_flows.nbytes / (1024 * 1024),
+            "load_seconds": load_seconds,
+            "lookup_us_median": statistics.median(lookups) * 1e6,
+            "sessions": sessions,
+            "rss_load_delta_mb": loaded_mb - baseline_mb,
+            "rss_sessions_delta_mb": sessions_mb - loaded_mb,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the memory-mapped project catalog.")
+    parser.add_argument("--projects", type=int, default=5000, help="synthetic projects in the catalog")
+    parser.add_argument("--years", type=int, default=25, help="cash-flow years per project")
+    parser.add_argument("--sessions", type=int, default=200, help="simulated Tab 3 renders")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    summary = measure(args.projects, args.years, args.sessions)
+    print(f"catalog             {summary['projects']:,} projects x {summary['years']} years "
+          f"({summary['cash_flow_mb']:.1f} MB of cash flows)")
+    print(f"load                {summary['load_seconds'] * 1000:8.1f} ms")
+    print(f"tab 3 lookup        {summary['lookup_us_median']:8.1f} us (median)")
+    print(f"RSS after load      {summary['rss_load_delta_mb']:+8.1f} MB")
+    print(f"RSS after sessions  {summary['rss_sessions_delta_mb']:+8.1f} MB over {summary['sessions']} sessions")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
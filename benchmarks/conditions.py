@@ -0,0 +1,115 @@
+"""Condition time-series store benchmark: load time and as-of / range latency.
+
+Usage::
+
+    python benchmarks/conditions.py --years 50 --queries 2000
+
+A store with ``--years`` of synthetic monthly observations for every factor
+of all six CECECO countries is written to a temporary directory and loaded
+through ``ConditionStoreCache``. Reported are the load time, the median
+latency of single as-of lookups ("Turkey interest rate as of 2019-06"),
+of ten-year range slices and of a full then-vs-now comparison between two
+countries at random dates.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo.data import CECECO_COUNTRIES, CURRENT_CONDITIONS  # noqa: E402
+from cececo.timeseries import (  # noqa: E402
+    ConditionStoreCache,
+    format_month,
+    store_from_observations,
+    synthetic_observations,
+    write_store,
+)
+
+
+def _median_us(samples):
+    return statistics.median(samples) * 1e6
+
+
+def measure(n_years, n_queries, seed=0):
+    countries = list(CECECO_COUNTRIES)
+    started = time.perf_counter()
+    store = store_from_observations(synthetic_observations(CURRENT_CONDITIONS, n_years, seed=seed, countries=countries))
+    build_seconds = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as path:
+        write_store(store, path)
+        size_kb = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 1024
+        started = time.perf_counter()
+        store = ConditionStoreCache(path).get()
+        load_seconds = time.perf_counter() - started
+
+        first, last = store.date_range()
+        rng = np.random.default_rng(seed)
+        keys = [store.keys[i] for i in rng.integers(0, len(store.keys), n_queries)]
+        months = [format_month(month) for month in rng.integers(first, last + 1, n_queries)]
+
+        as_of, ranges, compares = [], [], []
+        for (country, factor), month in zip(keys, months):
+            started = time.perf_counter()
+            store.as_of(country, factor, month)
+            as_of.append(time.perf_counter() - started)
+
+            year = int(month[:4])
+            started = time.perf_counter()
+            store.series(country, factor, year - 10, year)
+            ranges.append(time.perf_counter() - started)
+
+        for then_country, now_country, then_month, now_month in zip(
+            rng.choice(countries, n_queries), rng.choice(countries, n_queries), months, months[::-1]
+        ):
+            started = time.perf_counter()
+            store.compare(then_country, then_month, now_country, now_month)
+            compares.append(time.perf_counter() - started)
+
+        return {
+            "observations": len(store),
+            "series": len(store.keys),
+            "countries": len(store.countries),
+            "first_month": format_month(first),
+            "last_month": format_month(last),
+            "disk_kb": size_kb,
+            "build_seconds": build_seconds,
+            "load_ms": load_seconds * 1000,
+            "as_of_us": _median_us(as_of),
+            "range_us": _median_us(ranges),
+            "compare_us": _median_us(compares),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the condition time-series store.")
+    parser.add_argument("--years", type=int, default=50, help="years of monthly history per series")
+    parser.add_argument("--queries", type=int, default=2000, help="lookups per measurement")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    summary = measure(args.years, args.queries)
+    print(f"store               {summary['observations']:,} observations in {summary['series']} series, "
+          f"{summary['countries']} countries ({summary['first_month']} to {summary['last_month']}, "
+          f"{summary['disk_kb']:.0f} KB)")
+    print(f"build               {summary['build_seconds'] * 1000:8.1f} ms")
+    print(f"load                {summary['load_ms']:8.2f} ms")
+    print(f"as-of lookup        {summary['as_of_us']:8.1f} us (median)")
+    print(f"10-year range       {summary['range_us']:8.1f} us (median)")
+    print(f"then-vs-now compare {summary['compare_us']:8.1f} us (median)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Figure benchmark: build time, cached lookup time and JSON payload per chart.
+
+Usage::
+
+    python benchmarks/figures.py --periods 25 300 10000 100000 --events 500
+
+For each series length the Profit/Loss cash-flow chart and the projected
+cash-flow fan chart are built from synthetic data, and the Regulatory
+Evolution chart from ``--events`` synthetic events. Reported per chart are
+the cold build time, the cached lookup time (hashing the inputs), the time
+to serialize the figure as Streamlit does and the JSON payload size. Each
+length is measured with downsampling and, for comparison, without it
+(every point drawn as SVG, cash flows as bars).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo.figures import (  # noqa: E402
+    FigureCache,
+    cash_flow_figure,
+    fan_figure,
+    regulatory_figure,
+)
+
+
+def _timed(function, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples) * 1000
+
+
+def _charts(n_periods, n_events, rng):
+    revenues = 50 * np.cumprod(rng.normal(1.0005, 0.01, n_periods))
+    costs = 30 * np.cumprod(rng.normal(1.0002, 0.01, n_periods))
+    profits = revenues - costs
+    fan = np.cumsum(profits) + np.multiply.outer([-1.0, 0.0, 1.0], np.sqrt(np.arange(n_periods)) * 5)
+    years = np.sort(rng.integers(1990, 2025, n_events)).astype(np.int32)
+    levels = rng.integers(1, 4, n_events).astype(np.int8)
+    cumulative = np.cumsum(levels * rng.choice([-1, 1], n_events, p=[0.2, 0.8])).astype(np.int32)
+    return {
+        "cash_flow": (cash_flow_figure, (revenues, costs, profits)),
+        "fan": (fan_figure, (np.arange(n_periods), *fan, "Projected Cumulative Net Cash Flow")),
+        "regulatory": (regulatory_figure, (years, levels, years, cumulative)),
+    }
+
+
+def measure(periods, n_events, repeats=3, seed=0):
+    import plotly.io
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for n_periods in periods:
+        for name, (builder, args) in _charts(n_periods, n_events, rng).items():
+            if name == "regulatory" and n_periods != periods[0]:
+                # Only depends on the number of events
+                continue
+            for downsample in (True, False):
+                kwargs = {} if downsample else {"max_points": None}
+                cache = FigureCache()
+                figure, build_ms = _timed(lambda: builder(*args, **kwargs), repeats)
+                cache.get(builder, *args, **kwargs)
+                _, cached_ms = _timed(lambda: cache.get(builder, *args, **kwargs), repeats)
+                payload, json_ms = _timed(lambda: plotly.io.to_json(figure.to_dict(), validate=False), repeats)
+                results.append({
+                    "chart": name,
+                    "periods": n_periods,
+                    "events": n_events,
+                    "downsampled": downsample,
+                    "traces": [trace.type for trace in figure.data],
+                    "points": sum(len(trace.y) for trace in figure.data if trace.y is not None),
+                    "build_ms": build_ms,
+                    "cached_ms": cached_ms,
+                    "json_ms": json_ms,
+                    "payload_kb": len(payload) / 1024,
+                })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark figure building, caching and payload size.")
+    parser.add_argument("--periods", type=int, nargs="+", default=[25, 300, 10000, 100000],
+                        help="cash-flow series lengths")
+    parser.add_argument("--events", type=int, default=500, help="regulatory events")
+    parser.add_argument("--repeats", type=int, default=3, help="timed repeats per measurement (median)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = measure(args.periods, args.events, args.repeats)
+    print(f"{'chart':<11}{'periods':>9} {'mode':<11}{'traces':<24}{'points':>9}"
+          f"{'build ms':>10}{'cached ms':>11}{'json ms':>9}{'payload KB':>12}")
+    for result in results:
+        print(f"{result['chart']:<11}{result['periods']:>9} "
+              f"{'downsample' if result['downsampled'] else 'full':<11}{','.join(result['traces']):<24}"
+              f"{result['points']:>9,}{result['build_ms']:>10.1f}{result['cached_ms']:>11.2f}"
+              f"{result['json_ms']:>9.1f}{result['payload_kb']:>12.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Knowledge graph benchmark: build, memory and query latency at millions of edges.
+
+Usage::
+
+    python benchmarks/graph.py --projects 200000 --queries 200 --json graph.json
+
+A synthetic graph is generated with the same node and edge types the app
+builds: countries with regions and borders, projects hung off regions with
+dated regulatory events and shared condition buckets. The report covers
+CSR build time and footprint, median latency of neighbourhood, 2-hop and
+shortest-path queries and ``preceding_regulations``, and the cost of adding
+a batch of new gazette events to the built graph and recompacting.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo.graph import (  # noqa: E402
+    BORDERS,
+    CONDITION,
+    COUNTRY,
+    HAS_CONDITION,
+    HAS_PROJECT,
+    HAS_REGION,
+    ISSUED,
+    PROJECT,
+    REGION,
+    REGULATED_BY,
+    REGULATION,
+    KnowledgeGraph,
+)
+
+
+def synthetic_graph(n_projects, n_countries=50, regions_per_country=20, n_conditions=500,
+                    regulations_per_project=4, conditions_per_project=6, seed=0):
+    rng = np.random.default_rng(seed)
+    graph = KnowledgeGraph()
+    countries = [graph.add_node(("country", f"C{c}"), COUNTRY) for c in range(n_countries)]
+    regions = []
+    for c in range(n_countries):
+        for r in range(regions_per_country):
+            regions.append(graph.add_node(("region", f"C{c}", f"R{r}"), REGION))
+    graph.add_edges(np.repeat(countries, regions_per_country), regions, HAS_REGION)
+    # Ring of borders plus a few random ones
+    pairs = [(c, (c + 1) % n_countries) for c in range(n_countries)]
+    pairs += [tuple(rng.choice(n_countries, 2, replace=False)) for _ in range(n_countries)]
+    graph.add_edges([countries[a] for a, _ in pairs], [countries[b] for _, b in pairs], BORDERS)
+    conditions = [graph.add_node(("condition", f"F{i % 12}", "pct", i), CONDITION) for i in range(n_conditions)]
+
+    project_regions = rng.integers(0, len(regions), n_projects)
+    years = rng.integers(2000, 2025, n_projects)
+    rois = rng.uniform(0, 40, n_projects)
+    projects = np.empty(n_projects, dtype=np.int64)
+    regulations = np.empty((n_projects, regulations_per_project), dtype=np.int64)
+    for p in range(n_projects):
+        country = f"C{project_regions[p] // regions_per_country}"
+        projects[p] = graph.add_node(("project", country, f"P{p}"), PROJECT, year=int(years[p]), value=rois[p])
+        for e in range(regulations_per_project):
+            year = int(years[p]) - e
+            regulations[p, e] = graph.add_node(("regulation", country, year, f"Law {p}.{e}"), REGULATION, year=year)
+    graph.add_edges(np.asarray(regions)[project_regions], projects, HAS_PROJECT)
+    graph.add_edges(np.repeat(projects, regulations_per_project), regulations.ravel(), REGULATED_BY)
+    region_countries = np.asarray(countries)[project_regions // regions_per_country]
+    graph.add_edges(np.repeat(region_countries, regulations_per_project), regulations.ravel(), ISSUED)
+    graph.add_edges(
+        np.repeat(projects, conditions_per_project),
+        np.asarray(conditions)[rng.integers(0, n_conditions, n_projects * conditions_per_project)],
+        HAS_CONDITION,
+    )
+    return graph, countries, projects
+
+
+def _median_ms(samples):
+    return statistics.median(samples) * 1000
+
+
+def _time_queries(queries, run):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        run(query)
+        samples.append(time.perf_counter() - started)
+    return _median_ms(samples)
+
+
+def measure(n_projects, n_queries, new_events=1000, seed=0):
+    started = time.perf_counter()
+    graph, countries, projects = synthetic_graph(n_projects, seed=seed)
+    load_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    n_edges = graph.n_edges
+    compact_seconds = time.perf_counter() - started
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(projects, n_queries)
+    targets = rng.choice(countries, n_queries)
+    latency = {
+        "neighbors_ms": _time_queries(sample, graph.neighbors),
+        "k_hop_2_ms": _time_queries(sample, lambda node: graph.k_hop(node, 2)),
+        "shortest_path_ms": _time_queries(
+            zip(sample, targets), lambda pair: graph.shortest_path(int(pair[0]), int(pair[1]))
+        ),
+        "preceding_regulations_ms": _time_queries(
+            rng.choice(len(countries), min(n_queries, 20)),
+            lambda c: graph.preceding_regulations(f"C{c}", min_roi=38.0),
+        ),
+    }
+
+    # New gazette events arriving on a built graph
+    started = time.perf_counter()
+    for i in range(new_events):
+        graph.add_regulation(f"C{i % len(countries)}", 2025, f"Gazette event {i}")
+    graph.n_edges
+    incremental_seconds = time.perf_counter() - started
+
+    return {
+        "nodes": len(graph),
+        "edges": n_edges,
+        "load_seconds": load_seconds,
+        "compact_seconds": compact_seconds,
+        "mb": graph.nbytes() / (1024 * 1024),
+        **latency,
+        "new_events": new_events,
+        "incremental_seconds": incremental_seconds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CSR knowledge graph.")
+    parser.add_argument("--projects", type=int, default=200_000, help="synthetic projects in the graph")
+    parser.add_argument("--queries", type=int, default=200, help="queries per measurement")
+    parser.add_argument("--events", type=int, default=1000, help="gazette events added after the build")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    summary = measure(args.projects, args.queries, args.events)
+    print(f"graph               {summary['nodes']:,} nodes, {summary['edges']:,} edges ({summary['mb']:.1f} MB)")
+    print(f"load / compact      {summary['load_seconds'] * 1000:8.1f} / {summary['compact_seconds'] * 1000:.1f} ms")
+    print(f"neighbors           {summary['neighbors_ms']:8.3f} ms")
+    print(f"2-hop               {summary['k_hop_2_ms']:8.3f} ms")
+    print(f"shortest path       {summary['shortest_path_ms']:8.3f} ms")
+    print(f"preceding regs      {summary['preceding_regulations_ms']:8.3f} ms")
+    print(f"+{summary['new_events']:,} events         {summary['incremental_seconds'] * 1000:8.1f} ms")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
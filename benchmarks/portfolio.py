@@ -0,0 +1,112 @@
+"""Portfolio optimizer benchmark: solve time and optimality gap.
+
+Usage::
+
+    python benchmarks/portfolio.py --candidates 1000 10000 100000 --budget 5000
+
+Synthetic candidate transfers (integer costs of $20-400M, ROI, loss
+probability and similarity drawn at random over six target countries) are
+optimized under the budget twice:
+
+- with the side constraints: one transfer per project and country, at
+  most 30% of the budget per country and a minimum similarity;
+- as a plain knapsack, whose exact optimum is found by dynamic programming
+  over integer costs (up to ``--exact-max`` candidates).
+
+The knapsack run reports how far the greedy-with-repair solution is from
+that optimum. The MILP solver is included when SciPy is installed.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo.portfolio import Candidates, optimize  # noqa: E402
+
+COUNTRIES = ("Azerbaijan", "Kazakhstan", "Kyrgyzstan", "Pakistan", "Turkey", "Uzbekistan")
+
+
+def synthetic_candidates(n, seed=0, projects=None):
+    """``n`` random candidates; with ``projects``, several sites share each project."""
+    rng = np.random.default_rng(seed)
+    projects = projects or n
+    project = rng.integers(0, projects, n)
+    target = rng.integers(0, len(COUNTRIES), n)
+    keys = [("Source", f"Project {p}", COUNTRIES[t], f"Site {i}") for i, (p, t) in enumerate(zip(project, target))]
+    cost = rng.integers(20, 401, n).astype(np.float64)
+    roi_p50 = rng.normal(12.0, 8.0, n)
+    return Candidates(
+        keys, cost, roi_p50 - rng.uniform(5, 20, n), roi_p50, rng.uniform(0, 1, n), rng.uniform(20, 95, n)
+    )
+
+
+def knapsack_optimum(costs, values, budget):
+    """Largest total value of items with integer ``costs`` fitting ``budget``."""
+    best = np.zeros(int(budget) + 1)
+    for cost, value in zip(costs.astype(np.int64), values):
+        if value <= 0 or cost > budget:
+            continue
+        candidate = best[:len(best) - cost] + value
+        best[cost:] = np.maximum(best[cost:], candidate)
+    return float(best[-1])
+
+
+def measure(sizes, budget, exact_max=5000, seed=0):
+    try:
+        import scipy  # noqa: F401
+        methods = ("greedy", "milp")
+    except ImportError:
+        methods = ("greedy",)
+    results = []
+    for n in sizes:
+        constrained = synthetic_candidates(n, seed, projects=max(n // 8, 1))
+        plain = synthetic_candidates(n, seed)
+        optimum = knapsack_optimum(plain.cost, plain.expected_return, budget) if n <= exact_max else None
+        for method in methods:
+            limited = optimize(constrained, budget, min_similarity=40, max_country_share=0.3, method=method)
+            unlimited = optimize(plain, budget, method=method)
+            results.append({
+                "candidates": n,
+                "method": limited.method,
+                "constrained_ms": limited.seconds * 1000,
+                "constrained_transfers": len(limited.chosen),
+                "constrained_return": limited.expected_return,
+                "knapsack_ms": unlimited.seconds * 1000,
+                "knapsack_return": unlimited.expected_return,
+                "knapsack_optimum": optimum,
+                "gap_percent": None if optimum is None else (1 - unlimited.expected_return / optimum) * 100,
+            })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the portfolio optimizer against the exact knapsack.")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="numbers of candidate transfers")
+    parser.add_argument("--budget", type=float, default=5000, help="budget in millions of USD")
+    parser.add_argument("--exact-max", type=int, default=5000, help="largest size solved exactly by DP")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = measure(args.candidates, args.budget, args.exact_max)
+    print(f"{'candidates':>11} {'method':<8}{'limits ms':>11}{'chosen':>8}{'return $M':>11}"
+          f"{'knapsack ms':>13}{'return $M':>11}{'optimum $M':>12}{'gap':>8}")
+    for result in results:
+        optimum = "-" if result["knapsack_optimum"] is None else f"{result['knapsack_optimum']:.1f}"
+        gap = "-" if result["gap_percent"] is None else f"{result['gap_percent']:.2f}%"
+        print(f"{result['candidates']:>11,} {result['method']:<8}{result['constrained_ms']:>11.1f}"
+              f"{result['constrained_transfers']:>8}{result['constrained_return']:>11.1f}"
+              f"{result['knapsack_ms']:>13.1f}{result['knapsack_return']:>11.1f}{optimum:>12}{gap:>8}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Headless rerun benchmark suite with baselines and a regression gate.
+
+Usage::
+
+    python benchmarks/reruns.py --save-baseline baseline.json
+    python benchmarks/reruns.py --baseline baseline.json --tolerance 0.3
+    python benchmarks/reruns.py --countries Turkey Azerbaijan --sessions 1 4 8
+
+``app.py`` is driven through Streamlit's ``AppTest`` over a matrix of
+sidebar selections (target country x tab). For every scenario the suite
+reports:
+
+- the median wall time of a full rerun, after one warm-up run;
+- the peak Python allocation during one rerun (``tracemalloc``);
+- the serialized size of the page, and of the map component and Plotly
+  figures in it.
+
+It also reports cold-start import times from ``startup.py`` and the
+process's peak RSS.
+
+``--save-baseline`` writes the results as JSON. ``--baseline`` compares
+against a saved file and exits non-zero when a scenario's rerun time
+exceeds its baseline by more than ``--tolerance`` (relative) plus
+``--slack-ms`` (absolute, to absorb timer noise on fast scenarios), or
+its page size grows by more than ``--tolerance``.
+
+``--sessions`` runs each listed number of concurrent sessions, each its
+own ``AppTest`` on a thread of this one process as a server would host
+them. Every session cycles through the scenarios, and the rerun latency
+percentiles show how reruns degrade under load.
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from unittest import mock
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cececo.data import CECECO_COUNTRIES  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+
+TABS = {
+    "map": "🗺️ Regional Map",
+    "analysis": "📊 Project Analysis",
+    "profit_loss": "💰 Profit/Loss Analysis",
+    "regulatory": "📜 Regulatory Evolution",
+    "simulation": "🤖 AI Simulation",
+    "portfolio": "🧮 Portfolio Optimizer",
+}
+
+
+def _app_test():
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(APP, default_timeout=300)
+
+
+def _run(at, country, tab):
+    # AppTest does not carry the tab selection over to the next run, so every
+    # run sets both sidebar and tab state the way a browser session would send them
+    at.session_state["target_country"] = country
+    at.session_state["active_tab"] = TABS[tab]
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def _payload(at):
+    """Serialized bytes of the page, the map component and the Plotly figures."""
+    sizes = {"page_kb": 0, "map_kb": 0, "figures_kb": 0}
+
+    def walk(node):
+        proto = getattr(node, "proto", None)
+        if proto is not None and hasattr(proto, "ByteSize"):
+            size = proto.ByteSize() / 1024
+            sizes["page_kb"] += size
+            kind = type(node).__name__
+            if kind == "UnknownElement" and hasattr(proto, "json_args") and "feature_group" in proto.json_args:
+                sizes["map_kb"] += size
+            elif kind == "PlotlyChart" or (kind == "UnknownElement" and hasattr(proto, "spec")):
+                sizes["figures_kb"] += size
+        children = getattr(node, "children", None)
+        for child in (children.values() if isinstance(children, dict) else children or ()):
+            walk(child)
+
+    walk(at._tree)
+    return sizes
+
+
+def measure_scenarios(countries, tabs, repeats=3, memory=True):
+    at = _app_test()
+    results = []
+    for country in countries:
+        for tab in tabs:
+            _run(at, country, tab)
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                _run(at, country, tab)
+                samples.append(time.perf_counter() - started)
+            result = {
+                "scenario": f"{country}/{tab}",
+                "rerun_ms": statistics.median(samples) * 1000,
+                **_payload(at),
+            }
+            if memory:
+                tracemalloc.start()
+                _run(at, country, tab)
+                result["peak_alloc_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+            results.append(result)
+    return results
+
+
+@contextmanager
+def _shared_runtime():
+    """Share one mock Streamlit runtime and script cache between ``AppTest`` sessions.
+
+    Each ``AppTest.run`` installs its own mock runtime as the global
+    singleton and clears it when the script ends, which breaks sessions
+    still running on other threads, and compiles the script again into a
+    fresh script cache. A server has one runtime and one script cache for
+    all its sessions, so the concurrent sessions share them here too.
+    """
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.bidi_component_registry = BidiComponentManager()
+    runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    script_cache = ScriptCache()
+    with mock.patch.object(Runtime, "instance", classmethod(lambda cls: runtime)), \
+            mock.patch.object(Runtime, "exists", classmethod(lambda cls: True)), \
+            mock.patch("streamlit.testing.v1.app_test.ScriptCache", lambda: script_cache), \
+            mock.patch("streamlit.testing.v1.local_script_runner.ScriptCache", lambda: script_cache):
+        yield
+
+
+def measure_concurrency(countries, tabs, sessions, rounds=2):
+    """Rerun latency percentiles with ``sessions`` concurrent sessions."""
+    scenarios = [(country, tab) for country in countries for tab in tabs]
+    latencies, errors = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(sessions)
+
+    def session(offset):
+        try:
+            at = _app_test()
+            _run(at, *scenarios[offset % len(scenarios)])
+            barrier.wait()
+            for i in range(rounds * len(scenarios)):
+                # Sessions start at different scenarios so they do not move in lockstep
+                country, tab = scenarios[(i + offset) % len(scenarios)]
+                started = time.perf_counter()
+                _run(at, country, tab)
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+        except Exception as error:  # noqa: BLE001 - reported with the results
+            with lock:
+                errors.append(repr(error))
+            barrier.abort()
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    with _shared_runtime():
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    if errors:
+        raise RuntimeError(errors[0])
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) * 1000
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "reruns_per_second": len(latencies) / elapsed,
+    }
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Regression messages for scenarios slower or heavier than the baseline."""
+    previous = {result["scenario"]: result for result in baseline["scenarios"]}
+    regressions = []
+    for result in results["scenarios"]:
+        base = previous.get(result["scenario"])
+        if base is None:
+            continue
+        limit = base["rerun_ms"] * (1 + tolerance) + slack_ms
+        if result["rerun_ms"] > limit:
+            regressions.append(f"{result['scenario']}: rerun {result['rerun_ms']:.1f} ms "
+                               f"> {limit:.1f} ms (baseline {base['rerun_ms']:.1f} ms)")
+        if result["page_kb"] > base["page_kb"] * (1 + tolerance) + 1:
+            regressions.append(f"{result['scenario']}: page {result['page_kb']:.1f} KB "
+                               f"> baseline {base['page_kb']:.1f} KB + {tolerance:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless app reruns across sidebar selections.")
+    parser.add_argument("--countries", nargs="+", default=list(CECECO_COUNTRIES), help="target countries")
+    parser.add_argument("--tabs", nargs="+", choices=list(TABS), default=list(TABS), help="tabs to open")
+    parser.add_argument("--repeats", "-n", type=int, default=3, help="timed reruns per scenario (median)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run per scenario")
+    parser.add_argument("--no-startup", action="store_true", help="skip the fresh-process import benchmark")
+    parser.add_argument("--sessions", type=int, nargs="*", default=[],
+                        help="concurrent session counts to simulate, e.g. 1 4 8")
+    parser.add_argument("--rounds", type=int, default=2, help="passes over the scenarios per concurrent session")
+    parser.add_argument("--baseline", help="fail when results regress against this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative slowdown or growth")
+    parser.add_argument("--slack-ms", type=float, default=25.0, help="allowed absolute slowdown per rerun")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {"scenarios": measure_scenarios(args.countries, args.tabs, args.repeats, not args.no_memory)}
+    print(f"{'scenario':<28}{'rerun ms':>10}{'page KB':>10}{'map KB':>9}{'figs KB':>9}{'peak MB':>9}")
+    for result in results["scenarios"]:
+        print(f"{result['scenario']:<28}{result['rerun_ms']:>10.1f}{result['page_kb']:>10.1f}"
+              f"{result['map_kb']:>9.1f}{result['figures_kb']:>9.1f}{result.get('peak_alloc_mb', float('nan')):>9.1f}")
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS            {results['peak_rss_mb']:8.1f} MB")
+
+    if not args.no_startup:
+        import startup
+
+        results["startup"] = startup.measure(repeats=1)
+        print(f"engine import       {results['startup']['engine_import'] * 1000:8.1f} ms")
+        print(f"app import          {results['startup']['app_import'] * 1000:8.1f} ms")
+        print(f"first paint         {results['startup']['first_paint'] * 1000:8.1f} ms")
+
+    results["concurrency"] = []
+    for sessions in args.sessions:
+        load = measure_concurrency(args.countries, args.tabs, sessions, args.rounds)
+        results["concurrency"].append(load)
+        print(f"{sessions:>3} sessions        p50 {load['p50_ms']:8.1f} ms  p95 {load['p95_ms']:8.1f} ms  "
+              f"p99 {load['p99_ms']:8.1f} ms  {load['reruns_per_second']:.1f} reruns/s")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.slack_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
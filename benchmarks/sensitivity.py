@@ -0,0 +1,91 @@
+"""Sensitivity sweep benchmark: one batched simulation vs. a loop of projections.
+
+Usage::
+
+    python benchmarks/sensitivity.py --steps 5 11 21 --paths 2000
+
+For one source project in every target country, the sweep's scenarios
+(factors x steps per target, plus each target's base) are evaluated
+
+- batched: ``simulate_scenarios`` over all of them at once, as
+  ``cececo.engine.sensitivity_batch`` does;
+- looped: one full ``simulate_projection`` per scenario.
+
+Both use the same seed, so the medians must agree; the largest difference
+is reported next to the timings.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo import engine  # noqa: E402
+from cececo.projection import simulate_projection, simulate_scenarios  # noqa: E402
+from cececo.sensitivity import sensitivity_scenarios  # noqa: E402
+
+
+def sweep_scenarios(source_country, source_project, energy_type, steps):
+    catalog = engine.get_catalog()
+    scenarios = []
+    for country in engine.CECECO_COUNTRIES:
+        if country == source_country:
+            continue
+        target = engine._sensitivity_target(catalog, source_country, source_project, country, None, energy_type)
+        if target is not None:
+            inputs, conditions, wind_energy = target
+            scenarios.extend(sensitivity_scenarios(inputs, conditions, steps, wind_energy=wind_energy)[2])
+    return scenarios
+
+
+def measure(steps_list, n_paths, source_country, source_project, energy_type, seed=0):
+    results = []
+    for steps in steps_list:
+        scenarios = sweep_scenarios(source_country, source_project, energy_type, steps)
+        started = time.perf_counter()
+        batched = simulate_scenarios(scenarios, n_paths, seed).percentiles("npv")
+        batched_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        looped = np.array([simulate_projection(inputs, n_paths, seed).percentiles("npv", (50,))[0]
+                           for inputs in scenarios])
+        looped_seconds = time.perf_counter() - started
+        results.append({
+            "steps": steps,
+            "scenarios": len(scenarios),
+            "paths": n_paths,
+            "batched_ms": batched_seconds * 1000,
+            "looped_ms": looped_seconds * 1000,
+            "speedup": looped_seconds / batched_seconds,
+            "max_npv_difference": float(np.max(np.abs(batched - looped))),
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark batched sensitivity sweeps against looped projections.")
+    parser.add_argument("--steps", type=int, nargs="+", default=[5, 11, 21], help="values per factor range")
+    parser.add_argument("--paths", type=int, default=2000, help="Monte Carlo paths per scenario")
+    parser.add_argument("--source-country", default="Azerbaijan")
+    parser.add_argument("--source-project", default="Absheron Wind Project")
+    parser.add_argument("--energy-type", default="Wind Energy")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = measure(args.steps, args.paths, args.source_country, args.source_project, args.energy_type)
+    print(f"{'steps':>6}{'scenarios':>11}{'batched ms':>12}{'looped ms':>11}{'speedup':>9}{'max NPV diff':>14}")
+    for result in results:
+        print(f"{result['steps']:>6}{result['scenarios']:>11}{result['batched_ms']:>12.1f}{result['looped_ms']:>11.1f}"
+              f"{result['speedup']:>8.1f}x{result['max_npv_difference']:>14.2g}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Map spatial index benchmark: click resolution and viewport marker latency.
+
+Usage::
+
+    python benchmarks/spatial.py --projects 50000 --queries 2000
+
+``--projects`` synthetic projects are scattered around the CECECO regions
+and indexed together with the countries and regions. Reported are the
+index build time, the median latency of resolving a click to the nearest
+site (checked against a brute-force scan), and for a 1200 x 600 px map
+view at several zoom levels the latency of culling the viewport and
+clustering it plus the number of markers that would be serialized.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cececo.ann import project_location  # noqa: E402
+from cececo.catalog import synthetic_projects  # noqa: E402
+from cececo.data import CECECO_COUNTRIES  # noqa: E402
+from cececo.spatial import PROJECT, TILE_PIXELS, SiteIndex, cluster_degrees, haversine_km, map_sites  # noqa: E402
+
+MAP_WIDTH, MAP_HEIGHT = 1200, 600
+ZOOMS = (4, 6, 8, 10)
+
+
+def _median_us(samples):
+    return statistics.median(samples) * 1e6
+
+
+def _viewport(lat, lon, zoom):
+    degrees_per_pixel = 360.0 / (TILE_PIXELS * 2 ** zoom)
+    half_width = MAP_WIDTH / 2 * degrees_per_pixel
+    # Web Mercator squeezes latitude spans by cos(latitude)
+    half_height = MAP_HEIGHT / 2 * degrees_per_pixel * math.cos(math.radians(lat))
+    return lat - half_height, lon - half_width, lat + half_height, lon + half_width
+
+
+def measure(n_projects, n_queries, spread=3.0, seed=0):
+    projects = synthetic_projects(n_projects, 1, seed=seed, spread=spread)
+    sites = list(map_sites(CECECO_COUNTRIES, projects,
+                           lambda country, project: project_location(project, country, CECECO_COUNTRIES)))
+    started = time.perf_counter()
+    index = SiteIndex.from_sites(sites)
+    build_seconds = time.perf_counter() - started
+
+    rng = np.random.default_rng(seed)
+    anchors = rng.integers(0, len(index), n_queries)
+    lats = index.lats[anchors] + rng.normal(0.0, 0.5, n_queries)
+    lons = index.lons[anchors] + rng.normal(0.0, 0.5, n_queries)
+
+    nearest, mismatches = [], 0
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        started = time.perf_counter()
+        position, distance = index.nearest(lat, lon)
+        nearest.append(time.perf_counter() - started)
+        if i < 200 and not math.isclose(distance, haversine_km(lat, lon, index.lats, index.lons).min()):
+            mismatches += 1
+
+    views = {}
+    for zoom in ZOOMS:
+        culls, markers = [], []
+        for lat, lon in zip(lats[:n_queries // 4], lons[:n_queries // 4]):
+            started = time.perf_counter()
+            visible = index.within(*_viewport(lat, lon, zoom), kinds=[PROJECT])
+            clusters = index.clusters(visible, cluster_degrees(zoom))
+            culls.append(time.perf_counter() - started)
+            markers.append(len(clusters))
+        views[zoom] = {"cull_cluster_us": _median_us(culls), "max_markers": max(markers)}
+
+    return {
+        "sites": len(index),
+        "projects": int((index.kinds == PROJECT).sum()),
+        "build_ms": build_seconds * 1000,
+        "nearest_us": _median_us(nearest),
+        "nearest_p99_us": float(np.percentile(nearest, 99)) * 1e6,
+        "nearest_mismatches": mismatches,
+        "views": views,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the map spatial index.")
+    parser.add_argument("--projects", type=int, default=50000, help="synthetic project sites")
+    parser.add_argument("--queries", type=int, default=2000, help="clicks per measurement")
+    parser.add_argument("--spread", type=float, default=3.0, help="project scatter around regions, degrees")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    summary = measure(args.projects, args.queries, args.spread)
+    print(f"index               {summary['sites']:,} sites ({summary['projects']:,} projects)")
+    print(f"build               {summary['build_ms']:8.1f} ms")
+    print(f"nearest site        {summary['nearest_us']:8.1f} us (median), "
+          f"{summary['nearest_p99_us']:.1f} us (p99), {summary['nearest_mismatches']} mismatches vs brute force")
+    for zoom, view in summary["views"].items():
+        print(f"viewport zoom {zoom:<2}    {view['cull_cluster_us']:8.1f} us (median cull + cluster), "
+              f"at most {view['max_markers']:,} markers")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
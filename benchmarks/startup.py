@@ -0,0 +1,105 @@
+"""Cold-start benchmark: import times and time-to-first-paint.
+
+Usage::
+
+    python benchmarks/startup.py --repeats 5 --json startup.json
+
+Every measurement runs in a fresh interpreter so nothing is already cached
+in ``sys.modules``:
+
+- ``engine import``: ``import cececo.engine`` (stdlib + NumPy only)
+- ``streamlit import``: ``import streamlit`` alone, the floor for the UI
+- ``app import``: ``import app``, plus the heavy UI libraries it pulled in
+  beyond those Streamlit loads itself
+- ``first paint``: importing Streamlit's test harness and running ``app.py``
+  once to completion with the default selection, as a first page load does
+
+Medians over the repeats are printed, and optionally written as JSON.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries app.py must only import once the tab that needs them renders
+HEAVY_MODULES = ("folium", "streamlit_folium", "pandas", "plotly")
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": elapsed, "heavy_modules": loaded}}))
+"""
+
+_FIRST_PAINT_PROBE = """
+import json, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+finished = time.perf_counter()
+if at.exception:
+    raise SystemExit(str(at.exception[0].message))
+print(json.dumps({"seconds": finished - started, "script_seconds": finished - imported}))
+"""
+
+
+def _probe(source):
+    completed = subprocess.run(
+        [sys.executable, "-c", source], cwd=ROOT, capture_output=True, text=True, check=False
+    )
+    if completed.returncode:
+        raise RuntimeError(completed.stderr.strip() or completed.stdout.strip())
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(repeats=5):
+    samples = {name: [] for name in ("engine_import", "streamlit_import", "app_import", "first_paint", "first_paint_script")}
+    heavy = set()
+    for _ in range(repeats):
+        samples["engine_import"].append(_probe(_IMPORT_PROBE.format(module="cececo.engine", heavy=HEAVY_MODULES))["seconds"])
+        streamlit = _probe(_IMPORT_PROBE.format(module="streamlit", heavy=HEAVY_MODULES))
+        samples["streamlit_import"].append(streamlit["seconds"])
+        app = _probe(_IMPORT_PROBE.format(module="app", heavy=HEAVY_MODULES))
+        samples["app_import"].append(app["seconds"])
+        # Streamlit registers its Plotly theme on import; only count what app.py adds
+        heavy.update(set(app["heavy_modules"]) - set(streamlit["heavy_modules"]))
+        paint = _probe(_FIRST_PAINT_PROBE)
+        samples["first_paint"].append(paint["seconds"])
+        samples["first_paint_script"].append(paint["script_seconds"])
+    summary = {name: statistics.median(values) for name, values in samples.items()}
+    summary["repeats"] = repeats
+    summary["app_heavy_imports"] = sorted(heavy)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure CECECO-SIM cold-start import time and time-to-first-paint.")
+    parser.add_argument("--repeats", "-n", type=int, default=5, help="fresh-process runs per measurement")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    summary = measure(args.repeats)
+    print(f"engine import       {summary['engine_import'] * 1000:8.1f} ms")
+    print(f"streamlit import    {summary['streamlit_import'] * 1000:8.1f} ms")
+    print(f"app import          {summary['app_import'] * 1000:8.1f} ms")
+    print(f"first paint         {summary['first_paint'] * 1000:8.1f} ms "
+          f"(script run {summary['first_paint_script'] * 1000:.1f} ms)")
+    print(f"heavy imports by app: {', '.join(summary['app_heavy_imports']) or 'none'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    # Importing app.py must stay free of the map and charting libraries
+    return 1 if summary["app_heavy_imports"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
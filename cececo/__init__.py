@@ -0,0 +1 @@
+"""Compute core for CECECO-SIM, importable without the Streamlit UI."""
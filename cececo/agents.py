@@ -0,0 +1,438 @@
+"""Cached, deduplicated and batched model calls for the LLM-backed agents.
+
+Usage::
+
+    python -m cececo.agents --port 8765 --latency 0.5
+    CECECO_MODEL_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Agents ask the model through an ``AgentClient``, which sits between every
+session and the model server:
+
+- responses are stored on disk by a content hash of (model version, agent,
+  prompt, inputs), and the least recently used ones are evicted beyond a
+  size and an entry limit (``ResponseCache``);
+- concurrent calls for the same request, e.g. from sessions showing the
+  same selection, share one in-flight call;
+- requests arriving within ``batch_window`` of each other are sent to the
+  model as one batch per model version, of at most ``max_batch_size``;
+- at most ``max_concurrency`` batches are in flight at once; requests
+  queue up meanwhile and go out in the next batches.
+
+The model is anything with ``complete(model, requests)`` returning one
+response dict per request. ``StubModel`` answers deterministically after a
+fixed latency per batch plus a small one per request, like a batched
+inference server. ``StubModelServer`` serves it over HTTP for
+``HttpModel``, so the whole path runs and can be benchmarked offline.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+
+DEFAULT_MODEL = "cececo-stub-1"
+# Endpoint of the batch protocol spoken by StubModelServer and HttpModel
+COMPLETE_PATH = "/v1/complete"
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(model, request):
+    """Content hash of a request to ``model``; ``request`` has agent, prompt and inputs."""
+    payload = json.dumps(
+        [model, request["agent"], request["prompt"], request.get("inputs")],
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Model responses on disk, one JSON file per request hash, evicted least recently used first.
+
+    Recency is kept in the files' modification times, so it survives
+    restarts. Processes may share a directory: an entry evicted by another
+    process reads as a miss.
+    """
+
+    def __init__(self, path, max_bytes=64 * 2 ** 20, max_entries=20_000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + ".json")
+
+    def _load(self):
+        found = []
+        try:
+            shards = os.scandir(self.path)
+        except FileNotFoundError:
+            return
+        with shards:
+            for shard in shards:
+                if not shard.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(shard.path) as files:
+                    for entry in files:
+                        if entry.name.endswith(".json"):
+                            stat = entry.stat()
+                            found.append((stat.st_mtime_ns, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def get(self, key):
+        """The cached response for ``key``, or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._file(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                response = json.load(f)["response"]
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self._bytes -= self._entries.pop(key, 0)
+            return None
+        return response
+
+    def put(self, key, model, request, response):
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"model": model, "request": request, "response": response}, ensure_ascii=False,
+                          default=str).encode("utf-8")
+        # Written aside and renamed, so readers never see a partial file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            while self._entries:
+                key, _ = self._entries.popitem()
+                try:
+                    os.remove(self._file(key))
+                except FileNotFoundError:
+                    pass
+            self._bytes = 0
+
+
+@dataclass
+class ClientStats:
+    calls: int = 0
+    cache_hits: int = 0
+    # Calls that joined another session's in-flight call
+    deduplicated: int = 0
+    model_requests: int = 0
+    batches: int = 0
+    errors: int = 0
+    # Responses answered but not cached (e.g. full disk or read-only cache)
+    cache_errors: int = 0
+
+    @property
+    def hit_rate(self):
+        """Share of calls answered without a model request of their own."""
+        return (self.cache_hits + self.deduplicated) / self.calls if self.calls else 0.0
+
+
+class AgentClient:
+    """Thread-safe model call layer shared by all sessions of a process."""
+
+    def __init__(self, model, cache=None, model_version=DEFAULT_MODEL, max_batch_size=16, batch_window=0.01,
+                 max_concurrency=4):
+        self.model = model
+        self.cache = cache
+        self.model_version = model_version
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self._stats = ClientStats()
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="cececo-model")
+        self._dispatcher = threading.Thread(target=self._dispatch, name="cececo-model-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def stats(self):
+        with self._lock:
+            return replace(self._stats)
+
+    def submit(self, agent, prompt, inputs=None, model_version=None) -> Future:
+        """Future of the model's response dict to ``prompt`` with ``inputs`` for ``agent``."""
+        model_version = model_version or self.model_version
+        request = {"agent": agent, "prompt": prompt, "inputs": inputs or {}}
+        key = request_key(model_version, request)
+        response = self.cache.get(key) if self.cache is not None else None
+        with self._lock:
+            self._stats.calls += 1
+            if response is not None:
+                self._stats.cache_hits += 1
+                future = Future()
+                future.set_result(response)
+                return future
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats.deduplicated += 1
+                return future
+            future = self._in_flight[key] = Future()
+        self._queue.put((model_version, key, request, future))
+        return future
+
+    def call(self, agent, prompt, inputs=None, model_version=None, timeout=None):
+        """The model's response dict, from the cache, a shared in-flight call or a new batch."""
+        return self.submit(agent, prompt, inputs, model_version).result(timeout)
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            pending = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                pending.append(item)
+            # Requests are compatible when they go to the same model version
+            batches = {}
+            for item in pending:
+                batches.setdefault(item[0], []).append(item[1:])
+            for model_version, batch in batches.items():
+                # Waiting for a free slot lets more requests queue up for the next batch
+                self._slots.acquire()
+                self._executor.submit(self._send, model_version, batch)
+
+    def _send(self, model_version, batch):
+        try:
+            responses = self.model.complete(model_version, [request for _, request, _ in batch])
+            if len(responses) != len(batch):
+                raise ValueError(f"Model returned {len(responses)} responses for {len(batch)} requests")
+        except Exception as error:  # noqa: BLE001 - handed to every caller in the batch
+            with self._lock:
+                self._stats.errors += len(batch)
+                for key, _, _ in batch:
+                    self._in_flight.pop(key, None)
+            for _, _, future in batch:
+                future.set_exception(error)
+            return
+        finally:
+            self._slots.release()
+        with self._lock:
+            self._stats.batches += 1
+            self._stats.model_requests += len(batch)
+        for (key, request, future), response in zip(batch, responses):
+            try:
+                # Cached before the in-flight entry goes, so a new caller finds one or the other
+                if self.cache is not None:
+                    self.cache.put(key, model_version, request, response)
+            except Exception:  # noqa: BLE001 - a cache failure must not lose the answer
+                logger.exception("Could not cache the %s response for %s", model_version, request.get("agent"))
+                with self._lock:
+                    self._stats.cache_errors += 1
+            finally:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+                future.set_result(response)
+
+    def close(self):
+        self._queue.put(None)
+        self._dispatcher.join(timeout=1)
+        self._executor.shutdown(wait=True)
+
+
+# Canned answers of the stub model per agent; unknown agents get a generic one
+STUB_REPLIES = {
+    "Policy Transfer Agent": (
+        "Implement adapted feed-in tariff system",
+        "Introduce USD-indexed renewable energy auctions",
+        "Extend the corporate tax holiday to wind and solar developers",
+        "Guarantee grid connection within twelve months of permitting",
+        "Set up a one-stop permitting office for renewable projects",
+    ),
+    "Researcher Agent": (
+        "No new gazette entries affect this transfer",
+        "A recent gazette entry revises renewable energy incentives",
+    ),
+    "Gap Analysis Agent": (
+        "The incentive structure is the main regulatory gap",
+        "Permitting timelines are the main regulatory gap",
+    ),
+}
+
+
+class StubModel:
+    """Deterministic stand-in for a batched model server."""
+
+    def __init__(self, latency=0.5, per_request_latency=0.01):
+        self.latency = latency
+        self.per_request_latency = per_request_latency
+        self.requests = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def complete(self, model, requests):
+        with self._lock:
+            self.requests += len(requests)
+            self.batches += 1
+        time.sleep(self.latency + self.per_request_latency * len(requests))
+        return [self.respond(model, request) for request in requests]
+
+    @staticmethod
+    def respond(model, request):
+        key = request_key(model, request)
+        replies = STUB_REPLIES.get(request["agent"])
+        if replies is None:
+            text = f"{request['agent']} reviewed the inputs ({key[:8]})"
+        else:
+            text = replies[int(key[:8], 16) % len(replies)]
+        return {"text": text, "model": model}
+
+
+class StubModelServer:
+    """``StubModel`` over HTTP on a daemon thread.
+
+    ``POST /v1/complete`` with ``{"model": ..., "requests": [...]}`` returns
+    ``{"responses": [...]}``. Port 0 picks a free port; see ``url``.
+    """
+
+    def __init__(self, model=None, host="127.0.0.1", port=0):
+        self.model = model or StubModel()
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def start(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        model = self.model
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != COMPLETE_PATH:
+                    self.send_error(404)
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    payload = {"responses": model.complete(body["model"], body["requests"])}
+                except (ValueError, KeyError, TypeError) as error:
+                    self.send_error(400, str(error))
+                    return
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            # Room for every session's connection when clients call without batching
+            request_queue_size = 256
+
+        self._server = Server((self.host, self.port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="cececo-stub-model", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join(timeout=1)
+
+
+class HttpModel:
+    """Model server client for the batch protocol of ``StubModelServer``."""
+
+    def __init__(self, url, timeout=120):
+        self.url = url.rstrip("/") + COMPLETE_PATH
+        self.timeout = timeout
+
+    def complete(self, model, requests):
+        import urllib.request
+
+        body = json.dumps({"model": model, "requests": requests}, default=str).encode("utf-8")
+        request = urllib.request.Request(self.url, body, {"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)["responses"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the stub model for offline agent runs and benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per batch")
+    parser.add_argument("--per-request-latency", type=float, default=0.01, help="extra seconds per request in a batch")
+    args = parser.parse_args(argv)
+
+    server = StubModelServer(StubModel(args.latency, args.per_request_latency), args.host, args.port).start()
+    print(f"Stub model serving {server.url}{COMPLETE_PATH} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
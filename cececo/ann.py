@@ -0,0 +1,367 @@
+"""Embedded approximate-nearest-neighbour index over project snapshots.
+
+``ProjectFeaturizer`` turns a project (then-conditions, capacity, investment
+and region coordinates) or a target (current conditions and coordinates)
+into a unit vector. Conditions are standardized per factor exactly as for
+the similarity matrix; capacity and investment are log-scaled. Targets have
+no capacity or investment, so those dimensions are zero in queries and only
+the conditions and location decide the match.
+
+``IVFIndex`` is an inverted-file index: spherical k-means centroids
+partition the vectors into lists stored contiguously, and a query scans
+only the ``n_probe`` lists whose centroids are closest. Inserts go to a
+small unsorted tail that is scanned exactly and merged into the lists once
+it grows. Indexes persist to a directory with ``save`` / ``load``.
+"""
+
+import json
+import math
+import os
+import re
+
+import numpy as np
+
+from cececo.conditions import NO_UNIT, parse_condition
+from cececo.projection import parse_investment
+from cececo.similarity import factor_scaling
+
+# Relative weight of each feature group before normalization
+CONDITION_WEIGHT = 1.0
+SCALE_WEIGHT = 0.5
+LOCATION_WEIGHT = 0.5
+
+SCALE_FEATURES = ("log_capacity_mw", "log_investment_musd")
+LOCATION_FEATURES = ("lat", "lon")
+
+_CAPACITY = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*(GW|MW|kW)", re.IGNORECASE)
+_CAPACITY_SCALE = {"gw": 1000.0, "mw": 1.0, "kw": 0.001}
+
+
+def parse_capacity(text):
+    """Capacity string such as ``"150 MW"`` in MW, or NaN if unrecognized."""
+    match = _CAPACITY.search(text or "")
+    if not match:
+        return math.nan
+    return float(match.group(1).replace(",", "")) * _CAPACITY_SCALE[match.group(2).lower()]
+
+
+def project_location(project, country, countries):
+    """(lat, lon) of a project's own site, else its region, else its country."""
+    if project.get("lat") is not None and project.get("lon") is not None:
+        return project["lat"], project["lon"]
+    country_data = countries.get(country, {})
+    region = (country_data.get("regions") or {}).get(project.get("region"))
+    location = region or country_data
+    return location.get("lat", math.nan), location.get("lon", math.nan)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _zscore(values, mean, std):
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scaled = (values - mean) / std
+    return np.where(np.isfinite(scaled) & (std > 0), scaled, 0.0)
+
+
+class ProjectFeaturizer:
+    """Fixed feature scaling, so vectors built at different times stay comparable."""
+
+    def __init__(self, factors, units, directions, mean, std, extra_mean, extra_std):
+        self.factors = tuple(factors)
+        self.units = tuple(units)
+        self.directions = np.asarray(directions, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.extra_mean = np.asarray(extra_mean, dtype=np.float64)
+        self.extra_std = np.asarray(extra_std, dtype=np.float64)
+        self.weights = np.concatenate([
+            np.full(len(self.factors), CONDITION_WEIGHT / math.sqrt(max(len(self.factors), 1))),
+            np.full(len(SCALE_FEATURES), SCALE_WEIGHT / math.sqrt(len(SCALE_FEATURES))),
+            np.full(len(LOCATION_FEATURES), LOCATION_WEIGHT / math.sqrt(len(LOCATION_FEATURES))),
+        ])
+
+    @property
+    def dim(self):
+        return len(self.weights)
+
+    @classmethod
+    def fit(cls, factor_table, projects, countries):
+        """Scaling from a factor table and the projects it was compiled from."""
+        scaling = factor_scaling(factor_table)
+        extras = np.array([
+            cls._raw_extras(projects[country][name], country, countries)
+            for country, name in factor_table.project_rows
+        ]).reshape(-1, len(SCALE_FEATURES) + len(LOCATION_FEATURES))
+        with np.errstate(invalid="ignore"):
+            extra_mean = np.nan_to_num(np.nanmean(extras, axis=0)) if len(extras) else np.zeros(extras.shape[1])
+            extra_std = np.nan_to_num(np.nanstd(extras, axis=0)) if len(extras) else np.zeros(extras.shape[1])
+        return cls(
+            factor_table.factors,
+            [factor_table.units[code] for code in scaling.units],
+            factor_table.directions,
+            scaling.mean,
+            scaling.std,
+            extra_mean,
+            extra_std,
+        )
+
+    @staticmethod
+    def _raw_extras(project, country, countries):
+        investment = parse_investment(project["investment"]) if project.get("investment") else math.nan
+        capacity = parse_capacity(project.get("capacity"))
+        return (
+            math.log(capacity) if capacity > 0 else math.nan,
+            math.log(investment) if investment > 0 else math.nan,
+            *project_location(project, country, countries),
+        )
+
+    def _conditions(self, conditions):
+        values = np.full(len(self.factors), np.nan)
+        for j, factor in enumerate(self.factors):
+            if factor not in conditions:
+                continue
+            parsed = parse_condition(factor, conditions[factor])
+            if parsed is not None and parsed.unit in (self.units[j], NO_UNIT):
+                values[j] = parsed.value
+        return _zscore(values, self.mean, self.std) * self.directions
+
+    def _finish(self, conditions, extras):
+        extras = _zscore(extras, self.extra_mean, self.extra_std)
+        return _normalize(np.concatenate([conditions, extras]) * self.weights)
+
+    def project_vector(self, project, country, countries):
+        """Unit vector for one project record."""
+        extras = self._raw_extras(project, country, countries)
+        return self._finish(self._conditions(project.get("then_conditions", {})), extras)
+
+    def project_matrix(self, factor_table, projects, countries):
+        """Unit vectors for every project row of ``factor_table``, in ``project_rows`` order."""
+        keys = list(factor_table.project_rows)
+        rows = np.array([factor_table.project_rows[key] for key in keys], dtype=np.intp)
+        values = factor_table.values[rows]
+        unit_index = {unit: code for code, unit in enumerate(factor_table.units)}
+        expected = np.array([unit_index.get(unit, -1) for unit in self.units])
+        units = factor_table.unit_codes[rows]
+        comparable = np.isfinite(values) & ((units == expected) | (units == unit_index[NO_UNIT]))
+        conditions = np.where(comparable, _zscore(values, self.mean, self.std) * self.directions, 0.0)
+        extras = np.array([
+            self._raw_extras(projects[country][name], country, countries) for country, name in keys
+        ]).reshape(len(keys), -1)
+        extras = _zscore(extras, self.extra_mean, self.extra_std)
+        return keys, _normalize(np.concatenate([conditions, extras], axis=1) * self.weights)
+
+    def query_vector(self, conditions, location):
+        """Unit vector for a target: its current conditions at ``location`` (lat, lon)."""
+        conditions = self._conditions(conditions)
+        extras = np.concatenate([
+            np.zeros(len(SCALE_FEATURES)),
+            _zscore(location, self.extra_mean[len(SCALE_FEATURES):], self.extra_std[len(SCALE_FEATURES):]),
+        ])
+        return _normalize(np.concatenate([conditions, extras]) * self.weights)
+
+    def to_dict(self):
+        return {
+            "factors": list(self.factors),
+            "units": list(self.units),
+            "directions": self.directions.tolist(),
+            "mean": self.mean.tolist(),
+            "std": self.std.tolist(),
+            "extra_mean": self.extra_mean.tolist(),
+            "extra_std": self.extra_std.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def _spherical_kmeans(vectors, n_lists, iterations, rng):
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=n_lists)
+        # Empty lists restart from random vectors
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index for inner-product search over unit vectors.
+
+    ``keys`` may be any JSON-serializable values (tuples round-trip as
+    tuples). Search results are ``(key, score)`` pairs, best first, with
+    the cosine score in [-1, 1].
+    """
+
+    def __init__(self, centroids, tail_fraction=0.05, min_tail=1024):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.dim = self.centroids.shape[1]
+        self.keys = []
+        self._tail_fraction = tail_fraction
+        self._min_tail = min_tail
+        # Vectors grouped by list: list l occupies offsets[l]:offsets[l + 1]
+        self._vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+        # Recent inserts, scanned exactly until merged into the lists
+        self._tail_vectors = []
+        self._tail_ids = []
+
+    @classmethod
+    def train(cls, vectors, n_lists=None, iterations=10, seed=0, sample_size=50_000):
+        """Fit centroids on (a sample of) ``vectors``; add the vectors separately."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(vectors):
+            return cls(np.zeros((1, vectors.shape[1]), dtype=np.float32))
+        rng = np.random.default_rng(seed)
+        if n_lists is None:
+            n_lists = int(round(math.sqrt(len(vectors))))
+        n_lists = max(1, min(n_lists, len(vectors)))
+        if len(vectors) > sample_size:
+            vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        return cls(_spherical_kmeans(vectors, n_lists, iterations, rng))
+
+    @classmethod
+    def build(cls, keys, vectors, **train_kwargs):
+        index = cls.train(vectors, **train_kwargs)
+        index.add(keys, vectors)
+        return index
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, keys, vectors):
+        """Insert ``vectors`` (rows) under ``keys``."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        keys = list(keys)
+        if len(keys) != len(vectors):
+            raise ValueError(f"Got {len(keys)} keys for {len(vectors)} vectors")
+        start = len(self.keys)
+        self.keys.extend(keys)
+        self._tail_vectors.append(vectors)
+        self._tail_ids.append(np.arange(start, start + len(vectors), dtype=np.int64))
+        if self._tail_size() > max(self._min_tail, self._tail_fraction * len(self._ids)):
+            self.compact()
+
+    def _tail_size(self):
+        return sum(len(ids) for ids in self._tail_ids)
+
+    def compact(self):
+        """Merge the insert tail into the lists."""
+        if not self._tail_ids:
+            return
+        tail_vectors = np.concatenate(self._tail_vectors)
+        tail_ids = np.concatenate(self._tail_ids)
+        self._tail_vectors, self._tail_ids = [], []
+
+        lists = np.repeat(np.arange(self.n_lists), np.diff(self._offsets))
+        tail_lists = np.argmax(tail_vectors @ self.centroids.T, axis=1)
+        all_lists = np.concatenate([lists, tail_lists])
+        order = np.argsort(all_lists, kind="stable")
+        self._vectors = np.concatenate([self._vectors, tail_vectors])[order]
+        self._ids = np.concatenate([self._ids, tail_ids])[order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(all_lists, minlength=self.n_lists))])
+
+    def search(self, query, k=10, n_probe=8):
+        """Top ``k`` (key, score) among the ``n_probe`` closest lists and the insert tail."""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        n_probe = min(n_probe, self.n_lists)
+        probe = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        segments = [slice(self._offsets[l], self._offsets[l + 1]) for l in probe]
+        vectors = [self._vectors[segment] for segment in segments] + self._tail_vectors
+        ids = [self._ids[segment] for segment in segments] + self._tail_ids
+        if not ids:
+            return []
+        ids = np.concatenate(ids)
+        scores = np.concatenate(vectors) @ query
+        return self._top(ids, scores, k)
+
+    def _top(self, ids, scores, k):
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.keys[ids[i]], float(scores[i])) for i in best]
+
+    def exact_search(self, query, k=10):
+        """Brute-force top ``k`` over every vector, for recall measurements."""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        ids = np.concatenate([self._ids, *self._tail_ids])
+        scores = np.concatenate([self._vectors, *self._tail_vectors]) @ query
+        return self._top(ids, scores, k)
+
+    def save(self, path):
+        """Write the index to the directory ``path`` (the tail is merged first)."""
+        self.compact()
+        os.makedirs(path, exist_ok=True)
+        np.savez(
+            os.path.join(path, "index.npz"),
+            centroids=self.centroids, vectors=self._vectors, ids=self._ids, offsets=self._offsets,
+        )
+        with open(os.path.join(path, "keys.json"), "w", encoding="utf-8") as f:
+            json.dump(self.keys, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(os.path.join(path, "index.npz")) as arrays:
+            index = cls(arrays["centroids"])
+            index._vectors = arrays["vectors"]
+            index._ids = arrays["ids"]
+            index._offsets = arrays["offsets"]
+        with open(os.path.join(path, "keys.json"), encoding="utf-8") as f:
+            index.keys = [tuple(key) if isinstance(key, list) else key for key in json.load(f)]
+        return index
+
+
+class ProjectIndex:
+    """Featurizer plus IVF index: project snapshots in, transferable projects out."""
+
+    def __init__(self, featurizer, index):
+        self.featurizer = featurizer
+        self.index = index
+
+    @classmethod
+    def build(cls, factor_table, projects, countries, **train_kwargs):
+        featurizer = ProjectFeaturizer.fit(factor_table, projects, countries)
+        keys, vectors = featurizer.project_matrix(factor_table, projects, countries)
+        return cls(featurizer, IVFIndex.build(keys, vectors, **train_kwargs))
+
+    def __len__(self):
+        return len(self.index)
+
+    def add_project(self, country, project_name, project, countries):
+        self.index.add([(country, project_name)], self.featurizer.project_vector(project, country, countries)[None, :])
+
+    def search(self, conditions, location, k=10, n_probe=8):
+        """Top ``k`` ((country, project name), score %) for a target's conditions and location."""
+        query = self.featurizer.query_vector(conditions, location)
+        return [(key, to_percent(score)) for key, score in self.index.search(query, k, n_probe)]
+
+    def save(self, path):
+        self.index.save(path)
+        with open(os.path.join(path, "featurizer.json"), "w", encoding="utf-8") as f:
+            json.dump(self.featurizer.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "featurizer.json"), encoding="utf-8") as f:
+            featurizer = ProjectFeaturizer.from_dict(json.load(f))
+        return cls(featurizer, IVFIndex.load(path))
+
+
+def to_percent(score):
+    """Cosine score in [-1, 1] as the 0-100% scale used for similarity."""
+    return min(max(50.0 * (score + 1.0), 0.0), 100.0)
@@ -0,0 +1,242 @@
+"""Headless batch evaluation of every source x target x energy-type combination.
+
+Usage::
+
+    python -m cececo.batch --output results.parquet --workers 8
+
+Every (source project, target country, target region, energy type)
+combination is scored for similarity, gap analysis and projected ROI in a
+``ProcessPoolExecutor``. Results are streamed to CSV or Parquet in chunks,
+so memory stays bounded however many combinations there are. Throughput
+and peak memory are reported at the end.
+"""
+
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from cececo.engine import (
+    CECECO_COUNTRIES,
+    ENERGY_TYPES,
+    gap_summary,
+    get_catalog,
+    get_factor_table,
+    get_projection,
+    get_similarity_matrix,
+    get_yields,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+COLUMNS = (
+    "source_country", "source_project", "target_country", "target_region", "energy_type",
+    "similarity_overall", "similarity_regulatory", "similarity_economic",
+    "factors_improved", "factors_deteriorated", "factors_unchanged", "factors_not_comparable",
+    "missing_factors", "roi_p10", "roi_p50", "roi_p90", "npv_p50", "irr_p50", "prob_npv_positive",
+)
+
+# Per-process state, built once by the pool initializer
+_worker = {}
+
+
+def iter_combinations(countries=CECECO_COUNTRIES, projects=None, energy_types=ENERGY_TYPES):
+    """Yield (source_country, project, target_country, target_region, energy_type).
+
+    Like the sidebar, a project is never evaluated against its own country;
+    countries without regions are evaluated once with a region of None.
+    ``projects`` defaults to the engine's project catalog.
+    """
+    if projects is None:
+        projects = get_catalog().projects
+    for source_country, country_projects in projects.items():
+        for project_name in country_projects:
+            for target_country, target in countries.items():
+                if target_country == source_country:
+                    continue
+                for target_region in list(target.get("regions") or {}) or [None]:
+                    for energy_type in energy_types:
+                        yield source_country, project_name, target_country, target_region, energy_type
+
+
+def _init_worker(n_paths, seed):
+    # Warm the engine's per-process caches before the first task arrives;
+    # the catalog's cash flows are memory-mapped, so workers share its pages
+    get_factor_table()
+    get_similarity_matrix()
+    for energy_type in ENERGY_TYPES:
+        get_yields(energy_type)
+    _worker["n_paths"] = n_paths
+    _worker["seed"] = seed
+
+
+def evaluate(combination):
+    source_country, project_name, target_country, target_region, energy_type = combination
+    similarity = get_similarity_matrix().score(source_country, project_name, target_country)
+    row = dict.fromkeys(COLUMNS)
+    row.update(
+        source_country=source_country,
+        source_project=project_name,
+        target_country=target_country,
+        target_region=target_region,
+        energy_type=energy_type,
+        similarity_overall=similarity.overall,
+        similarity_regulatory=similarity.regulatory,
+        similarity_economic=similarity.economic,
+    )
+
+    gaps = gap_summary(source_country, project_name, target_country)
+    if gaps is None:
+        return row
+    row.update(
+        factors_improved=gaps["improved"],
+        factors_deteriorated=gaps["deteriorated"],
+        factors_unchanged=gaps["unchanged"],
+        factors_not_comparable=gaps["not_comparable"],
+        missing_factors=";".join(gaps["missing_factors"]),
+    )
+
+    projection = get_projection(
+        source_country, project_name, target_country, similarity.overall, _worker["n_paths"], _worker["seed"],
+        energy_type, target_region
+    )
+    if projection is None:
+        return row
+    row["roi_p10"], row["roi_p50"], row["roi_p90"] = projection.percentiles("roi")
+    row["npv_p50"] = projection.percentiles("npv", (50,))[0]
+    row["irr_p50"] = projection.percentiles("irr", (50,))[0]
+    row["prob_npv_positive"] = projection.probability_positive_npv()
+    return row
+
+
+def evaluate_chunk(combinations):
+    return [evaluate(combination) for combination in combinations]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CsvSink:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow; install it or write to a .csv file") from None
+        self._pa = pa
+        self._schema = pa.schema([
+            (column, pa.string() if column in ("source_country", "source_project", "target_country",
+                                               "target_region", "energy_type", "missing_factors")
+             else pa.int32() if column.startswith("factors_") else pa.float64())
+            for column in COLUMNS
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_sink(path, output_format=None):
+    output_format = output_format or ("parquet" if str(path).endswith(".parquet") else "csv")
+    return ParquetSink(path) if output_format == "parquet" else CsvSink(path)
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process and of its largest finished worker, in MB."""
+    if resource is None:
+        return math.nan, math.nan
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    )
+
+
+def run_batch(output, workers=None, chunk_size=64, n_paths=10_000, seed=0, output_format=None, log=print):
+    """Evaluate all combinations into ``output`` and return a summary dict."""
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    count = 0
+    # Build the catalog if needed before workers start reading it
+    get_catalog()
+    sink = open_sink(output, output_format)
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(n_paths, seed)) as pool:
+            # Keep a bounded window of chunks in flight and write them in order
+            pending = deque()
+            for chunk in _chunks(iter_combinations(), chunk_size):
+                pending.append(pool.submit(evaluate_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    rows = pending.popleft().result()
+                    sink.write(rows)
+                    count += len(rows)
+            while pending:
+                rows = pending.popleft().result()
+                sink.write(rows)
+                count += len(rows)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - started
+    parent_mb, worker_mb = peak_memory_mb()
+    summary = {
+        "combinations": count,
+        "seconds": elapsed,
+        "combinations_per_second": count / elapsed if elapsed else math.inf,
+        "peak_memory_mb": parent_mb,
+        "peak_worker_memory_mb": worker_mb,
+    }
+    log(
+        f"Evaluated {count:,} combinations in {elapsed:.2f}s "
+        f"({summary['combinations_per_second']:.1f} combinations/s) with {workers} workers; "
+        f"peak memory {parent_mb:.0f} MB (largest worker {worker_mb:.0f} MB)"
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate every source x target x energy-type combination.")
+    parser.add_argument("--output", "-o", default="cececo_batch.csv", help="output path (.csv or .parquet)")
+    parser.add_argument("--format", choices=("csv", "parquet"), help="output format (default: from the file suffix)")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="combinations per worker task")
+    parser.add_argument("--paths", type=int, default=10_000, help="Monte Carlo paths per projection")
+    parser.add_argument("--seed", type=int, default=0, help="Monte Carlo seed")
+    args = parser.parse_args(argv)
+    run_batch(args.output, args.workers, args.chunk_size, args.paths, args.seed, args.format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
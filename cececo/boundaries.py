@@ -0,0 +1,418 @@
+"""Simplified, cached country and region boundaries for the map choropleth.
+
+Usage::
+
+    python -m cececo.boundaries build data/boundaries --countries ne_50m_admin_0_countries.geojson \
+        --regions ne_10m_admin_1_states_provinces.geojson
+
+``build`` reads boundary GeoJSON (e.g. Natural Earth admin-0 and admin-1
+layers) and keeps the features of the CECECO countries and regions. It
+matches them on ISO 3166 codes resolved with ``pycountry``, so it does not
+depend on how a source spells a country or province. Every geometry is
+simplified ahead of time with Douglas-Peucker at one tolerance per zoom
+band in ``LEVELS``, then quantized to ``QUANTUM`` degrees and
+delta-encoded into one compact JSON file.
+
+``pycountry`` is only imported by ``build``. ``BoundarySet`` decodes each
+level once. ``export_outlines`` writes the geometry of every level to
+static files once per cache version, for the browser to fetch and keep;
+``bind`` then turns a metric into per-feature values and fill colors, the
+only part that changes between reruns.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import unicodedata
+import uuid
+
+import numpy as np
+
+MANIFEST = "boundaries.json"
+
+# (highest Leaflet zoom served, simplification tolerance in degrees)
+LEVELS = ((4, 0.05), (6, 0.01), (8, 0.002))
+# Degrees per integer step of the stored coordinates (about 11 m)
+QUANTUM = 1e-4
+
+# Low to high
+PALETTE = ("#d7301f", "#fdae61", "#1a9850")
+MISSING_COLOR = "#555555"
+
+# Feature properties that may hold an ISO 3166 code, compared case-insensitively
+CODE_PROPERTIES = (
+    "iso_a2", "iso_a3", "adm0_a3", "iso_3166_1", "iso_3166_2", "shapegroup", "shapeiso", "gu_a3", "sov_a3",
+)
+NAME_PROPERTIES = ("name", "name_en", "admin", "shapename")
+
+# Folds of Turkish and Azerbaijani letters: dotless i and schwa always, then
+# the English spellings of both languages, then the Azerbaijani-only ones
+_DOTLESS = str.maketrans({"ı": "i", "ə": "a"})
+_ENGLISH = str.maketrans({"ş": "sh", "ç": "ch", "ğ": "g"})
+_AZERBAIJANI = str.maketrans({"q": "g", "c": "j", "x": "kh"})
+
+
+def _strip(name):
+    return "".join(char for char in unicodedata.normalize("NFKD", name) if not unicodedata.combining(char))
+
+
+def _folds(name):
+    """Spellings ``name`` may be matched under.
+
+    Names match when any of their folds agree: Çanakkale matches Canakkale
+    with the accents stripped, and Xaçmaz matches Khachmaz once the
+    Azerbaijani letters are folded, without applying c -> j to every name.
+    """
+    name = name.casefold().translate(_DOTLESS)
+    azerbaijani = name.translate(_AZERBAIJANI).translate(_ENGLISH)
+    return {_strip(name), _strip(name.translate(_ENGLISH)), _strip(azerbaijani)}
+
+
+def country_codes(code):
+    """ISO 3166-1 alpha-2, alpha-3 and numeric codes for an alpha-2 ``code``."""
+    import pycountry
+
+    country = pycountry.countries.get(alpha_2=code)
+    return {code} if country is None else {country.alpha_2, country.alpha_3, country.numeric}
+
+
+def country_names(code):
+    import pycountry
+
+    country = pycountry.countries.get(alpha_2=code)
+    if country is None:
+        return set()
+    names = (getattr(country, field, None) for field in ("name", "official_name", "common_name"))
+    return set().union(*(_folds(name) for name in names if name))
+
+
+def subdivision_codes(code, region):
+    """ISO 3166-2 codes of the subdivisions of country ``code`` named like ``region``."""
+    import pycountry
+
+    folded = _folds(region)
+    return {
+        subdivision.code
+        for subdivision in pycountry.subdivisions.get(country_code=code) or ()
+        if _folds(subdivision.name) & folded
+    }
+
+
+def _feature_codes(properties):
+    lowered = {key.lower(): value for key, value in properties.items()}
+    return {str(lowered[key]).upper() for key in CODE_PROPERTIES if lowered.get(key) not in (None, "", "-99")}
+
+
+def _feature_names(properties):
+    lowered = {key.lower(): value for key, value in properties.items()}
+    return set().union(*(_folds(str(lowered[key])) for key in NAME_PROPERTIES if lowered.get(key)))
+
+
+def match_features(features, targets):
+    """Geometry per target key from GeoJSON ``features``.
+
+    ``targets`` maps each key to (ISO codes, folded names); a feature
+    matches on any shared code, else on a name. The first match wins.
+    """
+    matched = {}
+    for feature in features:
+        properties = feature.get("properties") or {}
+        codes, names = _feature_codes(properties), None
+        for key, (target_codes, target_names) in targets.items():
+            if key in matched:
+                continue
+            if codes & target_codes:
+                matched[key] = feature["geometry"]
+                continue
+            names = _feature_names(properties) if names is None else names
+            if names & target_names:
+                matched[key] = feature["geometry"]
+    return matched
+
+
+def _polygons(geometry):
+    """A Polygon or MultiPolygon as a list of polygons, each a list of (n x 2) rings."""
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+    return [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon] for polygon in polygons]
+
+
+def simplify_ring(points, tolerance):
+    """Douglas-Peucker simplification of one ring of (lon, lat) points."""
+    n = len(points)
+    if n <= 4:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end] - a
+        dx, dy = b - a
+        length = math.hypot(dx, dy)
+        if length == 0:
+            # Closed ring: distance to the shared end point
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distances = np.abs(dx * inner[:, 1] - dy * inner[:, 0]) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+
+def simplify_polygons(polygons, tolerance):
+    """Simplified polygons; rings that collapse below a triangle are dropped.
+
+    The largest polygon is always kept, so small countries stay visible at
+    coarse levels.
+    """
+    simplified = []
+    for polygon in polygons:
+        rings = [simplify_ring(ring, tolerance) for ring in polygon]
+        if len(rings[0]) >= 4:
+            simplified.append([rings[0]] + [ring for ring in rings[1:] if len(ring) >= 4])
+    if not simplified and polygons:
+        simplified.append([max(polygons, key=lambda polygon: len(polygon[0]))[0]])
+    return simplified
+
+
+def _encode_ring(ring):
+    quantized = np.round(ring / QUANTUM).astype(np.int64)
+    return np.diff(quantized, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel().tolist()
+
+
+def _decode_ring(deltas):
+    return (np.cumsum(np.asarray(deltas, dtype=np.int64).reshape(-1, 2), axis=0) * QUANTUM).round(4).tolist()
+
+
+class BoundarySet:
+    """Encoded boundary features with lazily decoded geometry per level.
+
+    ``keys`` are ``("country", country)`` or ``("region", country, region)``;
+    ``encoded[i][level]`` holds feature ``i``'s delta-encoded polygons at
+    the level's max zoom.
+    """
+
+    def __init__(self, keys, names, encoded, levels=LEVELS, version=None):
+        self.keys = [tuple(key) for key in keys]
+        self.names = list(names)
+        self.encoded = encoded
+        self.levels = tuple(tuple(level) for level in levels)
+        self.version = version
+        self._geometry = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def level_for_zoom(self, zoom):
+        """Max zoom of the coarsest level that still serves ``zoom``."""
+        for max_zoom, _ in self.levels:
+            if zoom <= max_zoom:
+                return max_zoom
+        return self.levels[-1][0]
+
+    def geometry(self, level):
+        """GeoJSON MultiPolygon geometry of every feature at ``level``, decoded once."""
+        geometry = self._geometry.get(level)
+        if geometry is None:
+            geometry = [
+                {
+                    "type": "MultiPolygon",
+                    "coordinates": [[_decode_ring(ring) for ring in polygon] for polygon in encoded[str(level)]],
+                }
+                for encoded in self.encoded
+            ]
+            self._geometry[level] = geometry
+        return geometry
+
+    def outline(self, level):
+        """FeatureCollection of every feature's geometry at ``level``, without any metric.
+
+        Each feature's properties hold its position in ``keys`` and its
+        name, which is how a ``bind`` result is matched to it.
+        """
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "geometry": geometry, "properties": {"index": i, "name": name}}
+                for i, (name, geometry) in enumerate(zip(self.names, self.geometry(level)))
+            ],
+        }
+
+    def bind(self, values, palette=PALETTE, missing=MISSING_COLOR):
+        """``values`` (by key) and their fill colors as lists in ``keys`` order.
+
+        Features without a finite value are colored ``missing`` and get a
+        null value.
+        """
+        values = [values.get(key, math.nan) for key in self.keys]
+        return {
+            "values": [value if math.isfinite(value) else None for value in values],
+            "colors": value_colors(values, palette, missing),
+        }
+
+
+def _hex_rgb(color):
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+
+
+def value_colors(values, palette=PALETTE, missing=MISSING_COLOR):
+    """Hex color per value on a linear scale over ``palette`` from the min to the max finite value."""
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    if not finite.any():
+        return [missing] * len(values)
+    low, high = values[finite].min(), values[finite].max()
+    position = np.where(finite, (values - low) / (high - low) if high > low else 0.5, 0.0) * (len(palette) - 1)
+    stops = np.array([_hex_rgb(color) for color in palette])
+    lower = np.minimum(np.floor(position).astype(int), len(palette) - 2)
+    rgb = stops[lower] + (stops[lower + 1] - stops[lower]) * (position - lower)[:, None]
+    return [
+        "#%02x%02x%02x" % tuple(int(round(channel)) for channel in color) if is_finite else missing
+        for color, is_finite in zip(rgb, finite)
+    ]
+
+
+def build_boundaries(countries, country_features, region_features=(), levels=LEVELS):
+    """``BoundarySet`` of the ``countries`` (``CECECO_COUNTRIES``-style) found in the features."""
+    targets = {}
+    for country, data in countries.items():
+        targets[("country", country)] = (country_codes(data["code"]), country_names(data["code"]) | _folds(country))
+    country_geometry = match_features(country_features, targets)
+
+    targets = {}
+    for country, data in countries.items():
+        for region in data.get("regions") or {}:
+            targets[("region", country, region)] = (subdivision_codes(data["code"], region), _folds(region))
+    region_geometry = match_features(region_features, targets) if targets else {}
+
+    keys, names, encoded = [], [], []
+    for key, geometry in {**country_geometry, **region_geometry}.items():
+        polygons = _polygons(geometry)
+        keys.append(key)
+        names.append(key[-1])
+        encoded.append({
+            str(max_zoom): [[_encode_ring(ring) for ring in polygon] for polygon in simplify_polygons(polygons, tolerance)]
+            for max_zoom, tolerance in levels
+        })
+    return BoundarySet(keys, names, encoded, levels)
+
+
+def write_boundaries(boundaries, path):
+    """Write ``boundaries`` to the directory ``path``, replacing any previous version atomically."""
+    os.makedirs(path, exist_ok=True)
+    manifest = {
+        "quantum": QUANTUM,
+        "levels": [list(level) for level in boundaries.levels],
+        "features": [
+            {"key": list(key), "name": name, "geometry": encoded}
+            for key, name, encoded in zip(boundaries.keys, boundaries.names, boundaries.encoded)
+        ],
+    }
+    staging = os.path.join(path, f".{MANIFEST}.{uuid.uuid4().hex}")
+    with open(staging, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(staging, os.path.join(path, MANIFEST))
+
+
+def export_outlines(boundaries, path):
+    """Write the ``outline`` of each level to ``path`` once per boundary version.
+
+    Files are named ``<version>/<max zoom>.json``; directories of other
+    versions are removed. Returns (max zoom, file path relative to ``path``)
+    per level.
+    """
+    version = "%x-%x" % boundaries.version if boundaries.version else uuid.uuid4().hex
+    directory = os.path.join(path, version)
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for max_zoom, _ in boundaries.levels:
+        name = f"{max_zoom}.json"
+        if not os.path.exists(os.path.join(directory, name)):
+            staging = os.path.join(directory, f".{name}.{uuid.uuid4().hex}")
+            with open(staging, "w", encoding="utf-8") as f:
+                json.dump(boundaries.outline(max_zoom), f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(staging, os.path.join(directory, name))
+        files.append((max_zoom, f"{version}/{name}"))
+    for entry in os.listdir(path):
+        if entry != version:
+            shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+    return files
+
+
+def boundaries_version(path):
+    """(mtime_ns, size) of the boundary file, or None if there is none."""
+    try:
+        stat = os.stat(os.path.join(path, MANIFEST))
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_boundaries(path):
+    version = boundaries_version(path)
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest["quantum"] != QUANTUM:
+        raise ValueError(f"Unsupported boundary quantum in {path}: {manifest['quantum']}")
+    features = manifest["features"]
+    return BoundarySet(
+        [feature["key"] for feature in features],
+        [feature["name"] for feature in features],
+        [feature["geometry"] for feature in features],
+        manifest["levels"],
+        version,
+    )
+
+
+def _read_features(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["features"]
+
+
+def main(argv=None):
+    from cececo.data import CECECO_COUNTRIES
+
+    parser = argparse.ArgumentParser(description="Build the CECECO-SIM boundary cache.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="simplify boundary GeoJSON into a cache directory")
+    build.add_argument("path", help="boundary cache directory")
+    build.add_argument("--countries", required=True, help="country (admin-0) boundary GeoJSON")
+    build.add_argument("--regions", help="province (admin-1) boundary GeoJSON")
+    args = parser.parse_args(argv)
+
+    boundaries = build_boundaries(
+        CECECO_COUNTRIES, _read_features(args.countries), _read_features(args.regions) if args.regions else ()
+    )
+    write_boundaries(boundaries, args.path)
+    size_kb = os.path.getsize(os.path.join(args.path, MANIFEST)) / 1024
+    found = set(boundaries.keys)
+    missing = [
+        key[-1] for key in (
+            [("country", country) for country in CECECO_COUNTRIES]
+            + [("region", country, region) for country, data in CECECO_COUNTRIES.items() for region in data["regions"]]
+        )
+        if key not in found
+    ]
+    print(f"Wrote {len(boundaries)} boundaries at {len(boundaries.levels)} levels ({size_kb:.0f} KB) to {args.path}")
+    if missing:
+        print(f"Not found in the sources: {', '.join(missing)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""Columnar, memory-mapped project catalog.
+
+A catalog is a directory holding:
+
+- ``projects.json``: one record per project (country, name, year, region,
+  capacity, investment, success rate, total ROI, then-conditions and
+  regulatory evolution) plus the file name of its cash-flow array.
+- ``cash_flows-<token>.npy``: a contiguous ``(project x year x field)``
+  float64 array with the fields in ``CASH_FLOW_FIELDS``. Years past a
+  project's history are NaN.
+
+``load_catalog`` memory-maps the cash flows read-only, so every session and
+thread in a process shares the same pages. ``CatalogCache`` hands out the
+current catalog and reloads it when ``projects.json`` changes on disk.
+``write_catalog`` replaces a catalog atomically, so readers never see a
+half-written one.
+
+Usage::
+
+    python -m cececo.catalog build data/catalog
+    python -m cececo.catalog build /tmp/big --synthetic 5000 --years 25
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+CASH_FLOW_FIELDS = ("revenue", "cost", "profit")
+REVENUE, COST, PROFIT = range(len(CASH_FLOW_FIELDS))
+
+MANIFEST = "projects.json"
+
+# Record fields kept as JSON; the cash flows live in the array
+RECORD_FIELDS = (
+    "year", "region", "capacity", "investment", "success_rate", "total_roi",
+    "then_conditions", "regulatory_evolution", "lat", "lon",
+)
+
+
+class ProjectCatalog:
+    """Read-only view over one catalog version.
+
+    ``cash_flows`` is the shared (memory-mapped) array; per-project accessors
+    return views into it rather than copies.
+    """
+
+    def __init__(self, keys, records, cash_flows, n_years, version=None):
+        self.keys = keys
+        self.records = records
+        self.cash_flows = cash_flows
+        self.n_years = n_years
+        self.version = version
+        self.index = {key: i for i, key in enumerate(keys)}
+        # Nested {country: {project name: record}} view of the records,
+        # the shape the factor table and the batch job iterate over
+        self.projects = {}
+        for (country, name), record in zip(keys, records):
+            self.projects.setdefault(country, {})[name] = record
+        self.years = np.array([record["year"] for record in records], dtype=np.int32)
+        self.total_roi = np.array([record["total_roi"] for record in records], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    @property
+    def countries(self):
+        return list(self.projects)
+
+    def project_names(self, country):
+        return list(self.projects.get(country, {}))
+
+    def record(self, country, project_name):
+        i = self.index.get((country, project_name))
+        return None if i is None else self.records[i]
+
+    def cash_flow(self, country, project_name):
+        """(years x field) view of one project's reported cash flows, or None."""
+        i = self.index.get((country, project_name))
+        if i is None:
+            return None
+        return self.cash_flows[i, :self.n_years[i]]
+
+
+def catalog_from_projects(projects):
+    """Build an in-memory ``ProjectCatalog`` from nested ``MOCK_PROJECTS``-style dicts."""
+    keys = []
+    records = []
+    histories = []
+    for country, country_projects in projects.items():
+        for name, project in country_projects.items():
+            profit_loss = project["profit_loss"]
+            year_keys = sorted((key for key in profit_loss if key.startswith("year_")), key=lambda key: int(key[5:]))
+            keys.append((country, name))
+            records.append({
+                **{field: project.get(field) for field in RECORD_FIELDS if field != "total_roi"},
+                "total_roi": profit_loss["total_roi"],
+            })
+            histories.append([[profit_loss[key][field] for field in CASH_FLOW_FIELDS] for key in year_keys])
+
+    n_years = np.array([len(history) for history in histories], dtype=np.int32)
+    cash_flows = np.full((len(histories), int(n_years.max(initial=0)), len(CASH_FLOW_FIELDS)), np.nan)
+    for i, history in enumerate(histories):
+        if history:
+            cash_flows[i, :len(history)] = history
+    return ProjectCatalog(tuple(keys), records, cash_flows, n_years)
+
+
+def write_catalog(catalog, path):
+    """Write ``catalog`` to the directory ``path``, replacing any previous version atomically."""
+    os.makedirs(path, exist_ok=True)
+    token = uuid.uuid4().hex
+    array_name = f"cash_flows-{token}.npy"
+    np.save(os.path.join(path, array_name), np.ascontiguousarray(catalog.cash_flows, dtype=np.float64))
+
+    manifest = {
+        "cash_flows": array_name,
+        "fields": list(CASH_FLOW_FIELDS),
+        "projects": [
+            {"country": country, "name": name, "n_years": int(n_years), **record}
+            for (country, name), record, n_years in zip(catalog.keys, catalog.records, catalog.n_years)
+        ],
+    }
+    staging = os.path.join(path, f".{MANIFEST}.{token}")
+    with open(staging, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(staging, os.path.join(path, MANIFEST))
+
+    # Arrays of replaced versions stay readable through existing mappings on POSIX
+    for name in os.listdir(path):
+        if name.startswith("cash_flows-") and name != array_name:
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+
+
+def catalog_version(path):
+    """(mtime_ns, size) of the catalog manifest, or None if there is no catalog."""
+    try:
+        stat = os.stat(os.path.join(path, MANIFEST))
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_catalog(path):
+    """Load the catalog in ``path`` with its cash flows memory-mapped read-only."""
+    version = catalog_version(path)
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if tuple(manifest["fields"]) != CASH_FLOW_FIELDS:
+        raise ValueError(f"Unsupported cash-flow fields in {path}: {manifest['fields']}")
+    cash_flows = np.load(os.path.join(path, manifest["cash_flows"]), mmap_mode="r")
+
+    entries = manifest["projects"]
+    keys = tuple((entry["country"], entry["name"]) for entry in entries)
+    records = [{field: entry.get(field) for field in RECORD_FIELDS} for entry in entries]
+    n_years = np.array([entry["n_years"] for entry in entries], dtype=np.int32)
+    return ProjectCatalog(keys, records, cash_flows, n_years, version)
+
+
+class CatalogCache:
+    """Process-wide current catalog for ``path``, reloaded when its manifest changes.
+
+    The manifest is stat-ed at most every ``check_interval`` seconds. When
+    ``path`` has no catalog yet it is built with ``bootstrap()``, if given.
+    """
+
+    # Storage hooks; caches of other on-disk formats override these
+    _version = staticmethod(catalog_version)
+    _load = staticmethod(load_catalog)
+    _write = staticmethod(write_catalog)
+
+    def __init__(self, path, bootstrap=None, check_interval=1.0):
+        self.path = path
+        self._bootstrap = bootstrap
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._catalog = None
+        self._checked_at = 0.0
+
+    def get(self) -> ProjectCatalog:
+        now = time.monotonic()
+        catalog = self._catalog
+        if catalog is not None and now - self._checked_at < self._check_interval:
+            return catalog
+        with self._lock:
+            self._checked_at = now
+            version = self._version(self.path)
+            if version is None and self._bootstrap is not None:
+                self._write(self._bootstrap(), self.path)
+                version = self._version(self.path)
+            if self._catalog is None or self._catalog.version != version:
+                try:
+                    self._catalog = self._load(self.path)
+                except FileNotFoundError:
+                    # Replaced between reading the manifest and opening its array
+                    self._catalog = self._load(self.path)
+            return self._catalog
+
+
+def synthetic_projects(n_projects, n_years, seed=0, template=None, spread=1.0):
+    """``MOCK_PROJECTS``-style dicts with ``n_projects`` random cash-flow histories.
+
+    Each project is placed within about ``spread`` degrees of its template
+    project's region (or country).
+    """
+    from cececo.ann import project_location
+    from cececo.data import CECECO_COUNTRIES, MOCK_PROJECTS
+
+    template = template or MOCK_PROJECTS
+    bases = [(country, project) for country, projects in template.items() for project in projects.values()]
+    rng = np.random.default_rng(seed)
+    projects = {}
+    for i in range(n_projects):
+        country, base = bases[i % len(bases)]
+        revenue = base["profit_loss"]["year_1"]["revenue"] * np.cumprod(rng.normal(1.03, 0.04, n_years))
+        cost = base["profit_loss"]["year_1"]["cost"] * np.cumprod(rng.normal(0.99, 0.03, n_years))
+        profit_loss = {
+            f"year_{year + 1}": {
+                "revenue": round(float(revenue[year]), 2),
+                "cost": round(float(cost[year]), 2),
+                "profit": round(float(revenue[year] - cost[year]), 2),
+            }
+            for year in range(n_years)
+        }
+        profit_loss["total_roi"] = base["profit_loss"]["total_roi"]
+        lat, lon = project_location(base, country, CECECO_COUNTRIES)
+        lat, lon = (round(float(value), 4) for value in (lat, lon) + rng.normal(0.0, spread / 2, 2))
+        projects.setdefault(country, {})[f"Synthetic Project {i + 1:05d}"] = {
+            **base, "profit_loss": profit_loss, "lat": lat, "lon": lon,
+        }
+    return projects
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a CECECO-SIM project catalog.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="write a catalog directory")
+    build.add_argument("path", help="catalog directory")
+    build.add_argument("--synthetic", type=int, metavar="N", help="generate N synthetic projects instead of the mock data")
+    build.add_argument("--years", type=int, default=25, help="cash-flow years per synthetic project")
+    build.add_argument("--seed", type=int, default=0, help="synthetic data seed")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        projects = synthetic_projects(args.synthetic, args.years, args.seed)
+    else:
+        from cececo.data import MOCK_PROJECTS
+        projects = MOCK_PROJECTS
+    catalog = catalog_from_projects(projects)
+    write_catalog(catalog, args.path)
+    print(f"Wrote {len(catalog):,} projects x {catalog.cash_flows.shape[1]} years to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""Unit-aware parsing of condition strings into a numeric factor table.
+
+Country and project conditions are stored as display strings such as
+``"$850/ton"``, ``"1 USD = 3.0 TRY"`` or ``"Favorable - Fast track permits"``.
+``parse_condition`` turns one of them into a ``ParsedCondition`` of
+(value, unit, direction-of-goodness), and ``compile_factor_table`` parses
+every country's current conditions and every project's then-conditions once
+into a ``FactorTable`` whose comparisons are plain NumPy operations.
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# Year described by the current-conditions snapshot
+CURRENT_YEAR = 2024
+
+IMPROVED = 1.0
+DETERIORATED = -1.0
+UNCHANGED = 0.0
+
+CHANGE_LABELS = {IMPROVED: "Improved", DETERIORATED: "Deteriorated", UNCHANGED: "Unchanged"}
+NOT_COMPARABLE = "Not comparable"
+
+# +1 when a higher value is better for a project, -1 when lower is better
+FACTOR_DIRECTIONS = {
+    "Steel Price": -1,
+    "YEKDEM Incentive": 1,
+    "Government Support": 1,
+    "Regulatory Framework": 1,
+    "Wind Speed": 1,
+    "Currency Rate": -1,
+    "Interest Rate": -1,
+    "Tax Incentive": 1,
+}
+
+# Ordinal scale for qualitative descriptors, matched against the leading
+# descriptor ("Favorable - Fast track permits" -> "favorable")
+QUALITATIVE_SCALE = {
+    "very high": 5,
+    "mature": 5,
+    "strategic": 5,
+    "high": 4,
+    "favorable": 4,
+    "improved": 3,
+    "clear": 3,
+    "moderate": 2,
+    "new framework": 2,
+    "developing": 1,
+    "low": 1,
+    "weak": 1,
+}
+
+# Unit given to "nothing in place" values, comparable with any unit
+NO_UNIT = ""
+
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)"
+_CURRENCY_PAIR = re.compile(rf"1\s*([A-Z]{{3}})\s*=\s*{_NUMBER}\s*([A-Z]{{3}})")
+_PRICE_PER_UNIT = re.compile(rf"\$\s*{_NUMBER}\s*/\s*([A-Za-z]+)")
+_REDUCTION_FOR_YEARS = re.compile(rf"{_NUMBER}\s*%\s*reduction\s+for\s+(\d+)\s*years?", re.IGNORECASE)
+_TAX_HOLIDAY = re.compile(r"(\d+)[-\s]year\s+tax\s+holiday", re.IGNORECASE)
+_PERCENT = re.compile(rf"{_NUMBER}\s*%")
+_SPEED = re.compile(rf"{_NUMBER}\s*m/s")
+_NOTHING_IN_PLACE = re.compile(r"\b(?:under discussion|none|inactive|expired|not available)\b", re.IGNORECASE)
+
+
+class ParsedCondition(NamedTuple):
+    value: float
+    unit: str
+    direction: int
+
+
+def _number(text):
+    return float(text.replace(",", ""))
+
+
+def _qualitative_score(text):
+    descriptor = text.split(" - ")[0].strip().lower()
+    for keyword in sorted(QUALITATIVE_SCALE, key=len, reverse=True):
+        if keyword in descriptor:
+            return QUALITATIVE_SCALE[keyword]
+    return None
+
+
+def parse_condition(factor: str, text: str) -> Optional[ParsedCondition]:
+    """Parse one condition string, or return None if it carries no usable value."""
+    direction = FACTOR_DIRECTIONS.get(factor, 0)
+    if _NOTHING_IN_PLACE.search(text):
+        return ParsedCondition(0.0, NO_UNIT, direction)
+
+    match = _CURRENCY_PAIR.search(text)
+    if match:
+        base, rate, quote = match.groups()
+        return ParsedCondition(_number(rate), f"{quote}/{base}", direction)
+
+    match = _PRICE_PER_UNIT.search(text)
+    if match:
+        return ParsedCondition(_number(match.group(1)), f"USD/{match.group(2)}", direction)
+
+    # Tax relief is expressed in full-relief years: 50% for 5 years -> 2.5
+    match = _REDUCTION_FOR_YEARS.search(text)
+    if match:
+        return ParsedCondition(_number(match.group(1)) / 100 * int(match.group(2)), "relief-years", direction)
+
+    match = _TAX_HOLIDAY.search(text)
+    if match:
+        return ParsedCondition(float(match.group(1)), "relief-years", direction)
+
+    match = _PERCENT.search(text)
+    if match:
+        return ParsedCondition(_number(match.group(1)), "%", direction)
+
+    match = _SPEED.search(text)
+    if match:
+        return ParsedCondition(_number(match.group(1)), "m/s", direction)
+
+    score = _qualitative_score(text)
+    if score is not None:
+        return ParsedCondition(float(score), "score", direction)
+    return None
+
+
+class FactorTable:
+    """Parsed conditions as (row x factor) arrays.
+
+    Rows are countries (current conditions) and projects (then-conditions);
+    ``values`` holds NaN where a row lacks a factor and ``unit_codes`` indexes
+    into ``units``.
+    """
+
+    def __init__(self, factors, units, values, unit_codes, directions, country_rows, project_rows):
+        self.factors = factors
+        self.units = units
+        self.values = values
+        self.unit_codes = unit_codes
+        self.directions = directions
+        self.country_rows = country_rows
+        self.project_rows = project_rows
+        self.factor_index = {factor: i for i, factor in enumerate(factors)}
+
+    def country_row(self, country):
+        return self.country_rows.get(country)
+
+    def project_row(self, country, project_name):
+        return self.project_rows.get((country, project_name))
+
+    def lookup(self, row, factor):
+        """(value, unit) of ``factor`` in ``row``; the value is NaN when missing."""
+        j = self.factor_index.get(factor)
+        if row is None or j is None or not np.isfinite(self.values[row, j]):
+            return np.nan, None
+        return float(self.values[row, j]), self.units[self.unit_codes[row, j]]
+
+    def compare(self, then_rows, now_rows):
+        """Change codes per factor for ``then_rows`` -> ``now_rows``.
+
+        Row arguments may be ints or index arrays and broadcast together.
+        The result holds IMPROVED, DETERIORATED or UNCHANGED, and NaN where
+        either side is missing, the units differ, or the factor has no
+        known direction.
+        """
+        return compare_values(
+            self.values[then_rows], self.unit_codes[then_rows],
+            self.values[now_rows], self.unit_codes[now_rows],
+            self.directions, self.units.index(NO_UNIT),
+        )
+
+
+def compare_values(then_values, then_units, now_values, now_units, directions, no_unit):
+    """Change codes for parsed values with unit codes, as in ``FactorTable.compare``."""
+    comparable = (
+        np.isfinite(then_values)
+        & np.isfinite(now_values)
+        & ((then_units == now_units) | (then_units == no_unit) | (now_units == no_unit))
+        & (directions != 0)
+    )
+    with np.errstate(invalid="ignore"):
+        changes = np.sign((now_values - then_values) * directions)
+    return np.where(comparable, changes, np.nan)
+
+
+def change_label(code):
+    if np.isnan(code):
+        return NOT_COMPARABLE
+    return CHANGE_LABELS[float(code)]
+
+
+def compile_factor_table(current_conditions, projects) -> FactorTable:
+    """Parse every country's and project's conditions into a ``FactorTable``."""
+    rows = []
+    country_rows = {}
+    project_rows = {}
+    for country, conditions in current_conditions.items():
+        country_rows[country] = len(rows)
+        rows.append(conditions)
+    for country, country_projects in projects.items():
+        for project_name, project in country_projects.items():
+            project_rows[(country, project_name)] = len(rows)
+            rows.append(project.get("then_conditions", {}))
+
+    factors = tuple(dict.fromkeys(factor for conditions in rows for factor in conditions))
+    units = [NO_UNIT]
+    values = np.full((len(rows), len(factors)), np.nan)
+    unit_codes = np.zeros((len(rows), len(factors)), dtype=np.int16)
+    for i, conditions in enumerate(rows):
+        for j, factor in enumerate(factors):
+            if factor not in conditions:
+                continue
+            parsed = parse_condition(factor, conditions[factor])
+            if parsed is None:
+                continue
+            if parsed.unit not in units:
+                units.append(parsed.unit)
+            values[i, j] = parsed.value
+            unit_codes[i, j] = units.index(parsed.unit)
+    directions = np.array([FACTOR_DIRECTIONS.get(factor, 0) for factor in factors], dtype=np.float64)
+    return FactorTable(factors, tuple(units), values, unit_codes, directions, country_rows, project_rows)
+
+
+def gap_analysis(factor_table, then_row, now_row):
+    """Change counts for one then -> now pair, plus the factors missing now."""
+    codes = factor_table.compare(then_row, now_row)
+    then_present = np.isfinite(factor_table.values[then_row])
+    now_present = np.isfinite(factor_table.values[now_row])
+    missing = then_present & ~now_present
+    return {
+        "improved": int(np.sum(codes == IMPROVED)),
+        "deteriorated": int(np.sum(codes == DETERIORATED)),
+        "unchanged": int(np.sum(codes == UNCHANGED)),
+        "not_comparable": int(np.sum(then_present & now_present & np.isnan(codes))),
+        "missing_factors": [factor for factor, is_missing in zip(factor_table.factors, missing) if is_missing],
+    }
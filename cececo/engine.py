@@ -0,0 +1,751 @@
+"""Data and analysis entry points shared by the UI, batch jobs and benchmarks.
+
+Everything here imports with only the standard library and NumPy. Projects
+come from the memory-mapped catalog at ``CATALOG_PATH`` (built from
+``MOCK_PROJECTS`` on first use), which is reloaded when the file changes.
+Derived structures (factor table, similarity matrix, projections,
+sensitivities) are memoized per process and catalog version, so Streamlit
+sessions and batch workers compute each one once.
+"""
+
+import math
+import os
+import threading
+from functools import lru_cache
+
+from cececo.agents import AgentClient, HttpModel, ResponseCache, StubModel
+from cececo.ann import ProjectIndex, parse_capacity, project_location
+from cececo.boundaries import boundaries_version, load_boundaries
+from cececo.catalog import CatalogCache, catalog_from_projects
+from cececo.conditions import CURRENT_YEAR, change_label, compile_factor_table, gap_analysis
+from cececo.data import (
+    COUNTRY_BORDERS, CECECO_COUNTRIES, CURRENT_CONDITIONS, ENERGY_TYPES, HYDRO_RUNOFF, MOCK_PROJECTS,
+)
+from cececo.energy import TECHNOLOGIES, WIND, compute_yields, project_technology, yield_sites
+from cececo.gazette import GazetteStore
+from cececo.graph import build_knowledge_graph
+from cececo.money import NOMINAL_USD, REPORTING_CURRENCY, Basis, load_tables, normalize_catalog, tables_version
+from cececo.portfolio import Candidates, optimize
+from cececo.projection import projection_inputs, run_projection
+from cececo.records import compile_reference
+from cececo.regulatory import ImpactClassifier, RegulatoryIndex, regulatory_events
+from cececo.sensitivity import DEFAULT_STEPS, analyze
+from cececo.similarity import compute_similarity_matrix
+from cececo.spatial import SITE_KINDS, SiteIndex, map_sites
+from cececo.timeseries import ConditionStoreCache, condition_observations, store_from_observations
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+CATALOG_PATH = os.environ.get("CECECO_CATALOG", os.path.join(_DATA_DIR, "catalog"))
+# Official Gazette dumps and the event store the Researcher Agent ingests them into
+GAZETTE_SOURCE = os.environ.get("CECECO_GAZETTES", os.path.join(_DATA_DIR, "gazettes"))
+GAZETTE_STORE = os.environ.get("CECECO_GAZETTE_STORE", os.path.join(_DATA_DIR, "gazette_store"))
+# Dated (country, factor) condition series
+CONDITIONS_PATH = os.environ.get("CECECO_CONDITIONS", os.path.join(_DATA_DIR, "conditions"))
+# Simplified country and region boundaries for the map choropleth
+BOUNDARIES_PATH = os.environ.get("CECECO_BOUNDARIES", os.path.join(_DATA_DIR, "boundaries"))
+# FX and CPI tables for restating money amounts
+MONEY_PATH = os.environ.get("CECECO_MONEY", os.path.join(_DATA_DIR, "money"))
+# Model server the agents call (the in-process stub model without one), and their response cache
+MODEL_URL = os.environ.get("CECECO_MODEL_URL")
+AGENT_CACHE_PATH = os.environ.get("CECECO_AGENT_CACHE", os.path.join(_DATA_DIR, "agent_cache"))
+
+# Metrics the map choropleth can be colored by
+MAP_METRICS = ("Similarity to source", "Projected ROI", "Regulatory favorability")
+# Monte Carlo paths per site for the "Projected ROI" map metric
+MAP_PROJECTION_PATHS = 2000
+# Monte Carlo paths per candidate transfer for the portfolio optimizer
+PORTFOLIO_PATHS = 2000
+# Monte Carlo paths per scenario of a sensitivity sweep
+SENSITIVITY_PATHS = 2000
+# Projections compare projects from different years in current US dollars
+PROJECTION_BASIS = Basis()
+# Countries, regions and current conditions, validated and compiled into read-only records at import
+REFERENCE = compile_reference(CECECO_COUNTRIES, CURRENT_CONDITIONS)
+
+__all__ = [
+    "CECECO_COUNTRIES",
+    "CURRENT_CONDITIONS",
+    "ENERGY_TYPES",
+    "MOCK_PROJECTS",
+    "CATALOG_PATH",
+    "GAZETTE_SOURCE",
+    "GAZETTE_STORE",
+    "CONDITIONS_PATH",
+    "BOUNDARIES_PATH",
+    "MONEY_PATH",
+    "MODEL_URL",
+    "AGENT_CACHE_PATH",
+    "MAP_METRICS",
+    "PROJECTION_BASIS",
+    "REFERENCE",
+    "Basis",
+    "compare_conditions",
+    "condition_years",
+    "conditions_as_of",
+    "gap_summary",
+    "gazette_version",
+    "get_cash_flow",
+    "get_cash_flow_totals",
+    "get_catalog",
+    "get_condition_store",
+    "get_agent_client",
+    "get_agent_status",
+    "get_boundaries",
+    "get_factor_table",
+    "get_gazette_events",
+    "get_knowledge_graph",
+    "get_money_tables",
+    "get_normalized_catalog",
+    "money_bases",
+    "projection_scale",
+    "map_metric",
+    "get_regulatory_index",
+    "get_projection",
+    "get_sensitivity",
+    "get_similarity",
+    "get_similarity_matrix",
+    "get_source_countries",
+    "get_site_index",
+    "get_source_project",
+    "get_yields",
+    "yield_comparison",
+    "nearest_site",
+    "optimize_portfolio",
+    "portfolio_candidates",
+    "sensitivity_batch",
+    "similar_projects",
+]
+
+
+# Mock AI Agent Status; the Researcher Agent reports real ingestion stats and
+# the Policy Transfer Agent its model calls when given
+def get_agent_status(gazette_stats=None, client_stats=None):
+    research_task = "Scanning Official Gazettes"
+    if gazette_stats is not None:
+        research_task = (
+            f"Official Gazettes: {gazette_stats.discovered:,} docs scanned, "
+            f"{gazette_stats.backlog:,} queued"
+        )
+    policy_task = "Simulating policy transfer"
+    if client_stats is not None and client_stats.calls:
+        policy_task = (
+            f"Model calls: {client_stats.calls:,}, {client_stats.hit_rate:.0%} answered from cache or shared, "
+            f"{client_stats.batches:,} batches"
+        )
+    agents = [
+        {"name": "Researcher Agent", "status": "active", "task": research_task},
+        {"name": "Gap Analysis Agent", "status": "analyzing", "task": "Comparing regulations"},
+        {"name": "Similarity Engine", "status": "complete", "task": "Calculating similarity scores"},
+        {"name": "Policy Transfer Agent", "status": "active", "task": policy_task}
+    ]
+    return agents
+
+
+_agent_client_lock = threading.Lock()
+_agent_client = []
+
+
+def get_agent_client():
+    """Process-wide ``AgentClient`` for the agents' model calls, created on first use.
+
+    It calls the model server at ``MODEL_URL``, or an in-process stub model
+    when none is set, and caches responses under ``AGENT_CACHE_PATH``.
+    """
+    with _agent_client_lock:
+        if not _agent_client:
+            model = HttpModel(MODEL_URL) if MODEL_URL else StubModel()
+            _agent_client.append(AgentClient(model, ResponseCache(AGENT_CACHE_PATH)))
+        return _agent_client[0]
+
+
+_catalog_cache = CatalogCache(CATALOG_PATH, bootstrap=lambda: catalog_from_projects(MOCK_PROJECTS))
+
+
+def get_catalog():
+    """The current project catalog, shared by every caller in the process."""
+    return _catalog_cache.get()
+
+
+# A store bootstrapped from the catalog is rebuilt when the catalog changes
+_condition_store_cache = ConditionStoreCache(
+    CONDITIONS_PATH,
+    bootstrap=lambda: store_from_observations(condition_observations(get_catalog().projects, CURRENT_CONDITIONS)),
+    source_version=lambda: get_catalog().version,
+)
+
+
+def get_condition_store():
+    """The current condition time-series store, built from the catalog and current conditions.
+
+    It is rebuilt whenever the catalog changes, unless it was written by
+    ``python -m cececo.timeseries build``.
+    """
+    return _condition_store_cache.get()
+
+
+def get_source_project(source_country, source_project_name):
+    """The selected source project's record, or None if nothing is selected."""
+    if not source_project_name:
+        return None
+    return get_catalog().record(source_country, source_project_name)
+
+
+def get_cash_flow(source_country, source_project_name, basis=None):
+    """(years x revenue/cost/profit) view of a project's cash flows, or None.
+
+    The flows are as reported (nominal USD) unless a ``Basis`` is given.
+    """
+    if basis is None:
+        return get_catalog().cash_flow(source_country, source_project_name)
+    return get_normalized_catalog(basis).cash_flow(source_country, source_project_name)
+
+
+def get_cash_flow_totals(source_country, source_project_name, basis=PROJECTION_BASIS):
+    """(revenue, cost, profit) totals of a project's cash flows in ``basis``, or None."""
+    return get_normalized_catalog(basis).cash_flow_totals(source_country, source_project_name)
+
+
+@lru_cache(maxsize=1)
+def _source_countries(catalog):
+    return REFERENCE.source_countries(catalog.projects)
+
+
+def get_source_countries(target_country):
+    """Countries with catalog projects that can be a source for ``target_country``."""
+    return _source_countries(get_catalog()).get(target_country, ())
+
+
+@lru_cache(maxsize=1)
+def _money_tables(version):
+    return None if version is None else load_tables(MONEY_PATH)
+
+
+def get_money_tables():
+    """FX and CPI ``MoneyTables``, or None when ``MONEY_PATH`` has no tables."""
+    return _money_tables(tables_version(MONEY_PATH))
+
+
+@lru_cache(maxsize=8)
+def _normalized_catalog(catalog, money_version, basis):
+    tables = _money_tables(money_version)
+    if tables is None or basis.currency not in tables:
+        basis = NOMINAL_USD
+    return normalize_catalog(catalog, tables, basis)
+
+
+def get_normalized_catalog(basis=PROJECTION_BASIS):
+    """Every project's investment and cash flows restated in ``basis``, memoized per catalog and tables.
+
+    Without tables for the basis currency the amounts stay in nominal USD;
+    the result's ``basis`` says which one was used.
+    """
+    return _normalized_catalog(get_catalog(), tables_version(MONEY_PATH), basis)
+
+
+def projection_scale(currency):
+    """Multiplier from ``PROJECTION_BASIS`` amounts to constant current-year ``currency``, or None."""
+    if currency == PROJECTION_BASIS.currency:
+        return 1.0
+    tables = get_money_tables()
+    if tables is None or currency not in tables:
+        return None
+    year = PROJECTION_BASIS.base_year
+    return tables.rate(year, currency) / tables.rate(year, PROJECTION_BASIS.currency)
+
+
+def money_bases(*countries):
+    """Constant and nominal ``Basis`` options in US dollars and the currencies of ``countries``."""
+    tables = get_money_tables()
+    currencies = [REPORTING_CURRENCY]
+    for country in countries:
+        currency = CECECO_COUNTRIES.get(country, {}).get("currency")
+        if tables is not None and currency in tables and currency not in currencies:
+            currencies.append(currency)
+    if tables is None:
+        return [NOMINAL_USD]
+    return [Basis(currency, real) for currency in currencies for real in (True, False)]
+
+
+_gazette_store = GazetteStore(GAZETTE_STORE)
+
+
+@lru_cache(maxsize=1)
+def _gazette_events_by_country(version):
+    grouped = {}
+    for event in _gazette_store.iter_events():
+        grouped.setdefault(event.get("country"), []).append(event)
+    for events in grouped.values():
+        events.sort(key=lambda event: (event["year"], event.get("date") or ""))
+    return grouped
+
+
+def gazette_version():
+    """Version of the gazette store; it changes whenever new events are ingested."""
+    return _gazette_store.version()
+
+
+def get_gazette_events(country):
+    """Ingested gazette events for ``country``, oldest first; re-read when the store grows."""
+    return _gazette_events_by_country(_gazette_store.version()).get(country, [])
+
+
+# Shared across index rebuilds, so each distinct impact text is scored once
+_impact_classifier = ImpactClassifier()
+
+
+@lru_cache(maxsize=1)
+def _regulatory_index(catalog, gazette_version):
+    gazette_events = _gazette_events_by_country(gazette_version).values()
+    return RegulatoryIndex(
+        regulatory_events(catalog.projects, (event for events in gazette_events for event in events)),
+        _impact_classifier,
+    )
+
+
+def get_regulatory_index():
+    """Classified (country, year) index of project and gazette regulatory events.
+
+    Rebuilt only when the catalog or the gazette store changes.
+    """
+    return _regulatory_index(get_catalog(), _gazette_store.version())
+
+
+@lru_cache(maxsize=1)
+def _knowledge_graph(catalog):
+    return build_knowledge_graph(CECECO_COUNTRIES, catalog.projects, COUNTRY_BORDERS)
+
+
+_graph_lock = threading.Lock()
+_graph_gazette = {"graph": None, "version": None, "events": set()}
+
+
+def get_knowledge_graph():
+    """Knowledge graph of the current catalog plus every ingested gazette event.
+
+    The graph is rebuilt only when the catalog changes; gazette events that
+    arrive later are added to it incrementally.
+    """
+    graph = _knowledge_graph(get_catalog())
+    version = _gazette_store.version()
+    with _graph_lock:
+        if _graph_gazette["graph"] is not graph:
+            _graph_gazette.update(graph=graph, version=None, events=set())
+        if _graph_gazette["version"] != version:
+            added = _graph_gazette["events"]
+            for event in _gazette_store.iter_events():
+                key = (event.get("sha256"), event.get("seq"))
+                if key not in added and event.get("country"):
+                    graph.add_regulation(event["country"], event["year"], event["event"])
+                    added.add(key)
+            _graph_gazette["version"] = version
+    return graph
+
+
+@lru_cache(maxsize=1)
+def _factor_table(catalog):
+    return compile_factor_table(CURRENT_CONDITIONS, catalog.projects)
+
+
+@lru_cache(maxsize=1)
+def _similarity_matrix(catalog):
+    locations = {
+        (country, name): project_location(record, country, CECECO_COUNTRIES)
+        for country, projects in catalog.projects.items()
+        for name, record in projects.items()
+    }
+    return compute_similarity_matrix(_factor_table(catalog), CECECO_COUNTRIES, locations)
+
+
+@lru_cache(maxsize=1)
+def _project_index(catalog):
+    return ProjectIndex.build(_factor_table(catalog), catalog.projects, CECECO_COUNTRIES)
+
+
+@lru_cache(maxsize=1)
+def _yield_sites(catalog):
+    # Mean wind speed per country from its current "Wind Speed" condition;
+    # hydro runoff comes from the reference data
+    factor_table = _factor_table(catalog)
+    wind_speeds = {}
+    for country, row in factor_table.country_rows.items():
+        value, unit = factor_table.lookup(row, "Wind Speed")
+        if unit == "m/s":
+            wind_speeds[country] = value
+    return yield_sites(CECECO_COUNTRIES, wind_speeds, HYDRO_RUNOFF)
+
+
+def get_yields(energy_type):
+    """Hourly yield table of every CECECO site for an "Energy Type" label (or technology)."""
+    return compute_yields(TECHNOLOGIES.get(energy_type, energy_type), _yield_sites(get_catalog()))
+
+
+def yield_comparison(source_country, source_project_name, target_country, target_region, energy_type):
+    """Annual energy of the source project at its site vs. the same capacity at the target.
+
+    ``source_mwh`` uses the project's own technology and ``target_mwh``
+    ``energy_type``. ``ratio``, which scales projected revenue, compares
+    ``energy_type`` at both sites (1.0 when either is unknown): the
+    projection keeps the source project's capex and costs, so only the
+    quality of the site may change its revenue, not a switch of technology.
+    """
+    project = get_source_project(source_country, source_project_name)
+    capacity_mw = parse_capacity(project.get("capacity"))
+    if math.isnan(capacity_mw):
+        capacity_mw = 1.0
+    source_technology = project_technology(source_project_name)
+    source = get_yields(source_technology)
+    target = get_yields(energy_type)
+    source_mwh = source.annual_mwh(source_country, project.get("region"), capacity_mw)
+    target_mwh = target.annual_mwh(target_country, target_region, capacity_mw)
+    source_site_mwh = target.annual_mwh(source_country, project.get("region"), capacity_mw)
+    ratio = target_mwh / source_site_mwh if source_site_mwh > 0 and not math.isnan(target_mwh) else 1.0
+    return {
+        "capacity_mw": capacity_mw,
+        "source_technology": source_technology,
+        "source_mwh": source_mwh,
+        "source_capacity_factor": source.site_capacity_factor(source_country, project.get("region")),
+        "target_technology": target.technology,
+        "target_mwh": target_mwh,
+        "target_capacity_factor": target.site_capacity_factor(target_country, target_region),
+        "ratio": ratio,
+    }
+
+
+@lru_cache(maxsize=1)
+def _site_index(catalog):
+    def locate(country, project):
+        return project_location(project, country, CECECO_COUNTRIES)
+
+    return SiteIndex.from_sites(map_sites(CECECO_COUNTRIES, catalog.projects, locate))
+
+
+def get_site_index():
+    """Grid index over every country, region and project site on the map."""
+    return _site_index(get_catalog())
+
+
+def nearest_site(lat, lon, kinds=None):
+    """The map site nearest to a clicked point, or None.
+
+    Returns the site ``key`` (``("country", country)``, ``("region",
+    country, region)`` or ``("project", country, name)``), its ``kind`` and
+    ``distance_km``.
+    """
+    index = get_site_index()
+    hit = index.nearest(lat, lon, kinds)
+    if hit is None:
+        return None
+    position, distance_km = hit
+    return {
+        "key": index.keys[position],
+        "kind": SITE_KINDS[index.kinds[position]],
+        "lat": float(index.lats[position]),
+        "lon": float(index.lons[position]),
+        "distance_km": distance_km,
+    }
+
+
+@lru_cache(maxsize=1)
+def _boundaries(version):
+    return None if version is None else load_boundaries(BOUNDARIES_PATH)
+
+
+def get_boundaries():
+    """The simplified boundary set for the choropleth, or None if no cache has been built."""
+    return _boundaries(boundaries_version(BOUNDARIES_PATH))
+
+
+@lru_cache(maxsize=32)
+def _map_metric(catalog, gazette_version, money_version, metric, source_country, source_project_name, energy_type):
+    # money_version keys the "Projected ROI" values, which follow the FX/CPI tables
+    if metric not in MAP_METRICS:
+        raise ValueError(f"Unknown map metric: {metric!r}")
+    index = _regulatory_index(catalog, gazette_version)
+    values = {}
+    for country, data in CECECO_COUNTRIES.items():
+        sites = [(("country", country), None)] + [(("region", country, region), region) for region in data["regions"]]
+        if metric == "Regulatory favorability":
+            favorability = float(index.as_of(country, CURRENT_YEAR)["favorability"])
+            values.update((key, favorability) for key, _ in sites)
+            continue
+        if country == source_country:
+            continue
+        similarity = get_similarity(source_country, source_project_name, country).overall
+        for key, region in sites:
+            if metric == "Similarity to source":
+                values[key] = similarity
+                continue
+            result = get_projection(
+                source_country, source_project_name, country, similarity, MAP_PROJECTION_PATHS,
+                energy_type=energy_type, target_region=region,
+            )
+            values[key] = math.nan if result is None else result.percentiles("roi", (50,))[0]
+    return values
+
+
+def map_metric(metric, source_country, source_project_name, energy_type=None):
+    """Value of one of ``MAP_METRICS`` per country and region key of the map.
+
+    Keys are ``("country", country)`` and ``("region", country, region)``.
+    Similarity and projected ROI are relative to the source project, so its
+    own country is left out; regions take their country's similarity and
+    favorability, while their ROI uses the region's energy yield.
+    """
+    return _map_metric(
+        get_catalog(), _gazette_store.version(), tables_version(MONEY_PATH), metric, source_country,
+        source_project_name, energy_type,
+    )
+
+
+def get_factor_table():
+    """Parsed numeric conditions for every country and catalog project."""
+    return _factor_table(get_catalog())
+
+
+def get_similarity_matrix():
+    """Similarity for every project x target country, rebuilt when the catalog changes."""
+    return _similarity_matrix(get_catalog())
+
+
+def get_similarity(source_country, source_project_name, target_country):
+    return get_similarity_matrix().score(source_country, source_project_name, target_country)
+
+
+def similar_projects(target_country, target_region=None, k=5, n_probe=8, shortlist=4):
+    """The ``k`` past projects from other countries most transferable to a target.
+
+    The ANN index shortlists ``shortlist * k`` projects by profile match
+    (then-conditions, scale and location), which are then ranked by the
+    similarity matrix's overall score, the measure reported for a single
+    pair. Returns (source_country, project_name, overall %, profile match %),
+    best first; empty when the target has no current conditions.
+    """
+    conditions = CURRENT_CONDITIONS.get(target_country)
+    if conditions is None:
+        return []
+    target = CECECO_COUNTRIES[target_country]
+    location = (target.get("regions") or {}).get(target_region, target)
+    catalog = get_catalog()
+    index = _project_index(catalog)
+    # Over-fetch so the target's own projects can be dropped
+    wanted = fetch = k * shortlist
+    while True:
+        hits = index.search(conditions, (location["lat"], location["lon"]), fetch, n_probe)
+        matches = [(country, name, score) for (country, name), score in hits if country != target_country]
+        if len(matches) >= wanted or len(hits) < fetch:
+            break
+        fetch *= 2
+    matrix = _similarity_matrix(catalog)
+    ranked = [
+        (country, name, matrix.score(country, name, target_country).overall, match)
+        for country, name, match in matches[:wanted]
+    ]
+    # Unscored pairs last, in profile-match order
+    ranked.sort(key=lambda row: -row[2] if math.isfinite(row[2]) else math.inf)
+    return ranked[:k]
+
+
+def condition_years():
+    """(first, last) year with condition observations."""
+    months = get_condition_store().date_range()
+    if months is None:
+        return CURRENT_YEAR, CURRENT_YEAR
+    return months[0] // 12, months[1] // 12
+
+
+def conditions_as_of(country, date):
+    """{factor: condition text} for ``country`` as of ``date`` (a year or ``"YYYY-MM"``)."""
+    return {
+        factor: observation.text
+        for factor, observation in get_condition_store().conditions_as_of(country, date).items()
+    }
+
+
+def compare_conditions(then_country, then_date, now_country, now_date):
+    """Then -> now change of each factor both countries share, as of two dates.
+
+    Rows hold the factor, the then and now condition texts with the month
+    each was observed and a change label; they are read from the condition
+    store.
+    """
+    return [
+        {
+            "factor": row["factor"],
+            "then": row["then"].text,
+            "now": row["now"].text,
+            "then_month": row["then"].month,
+            "now_month": row["now"].month,
+            "change": change_label(row["change"]),
+        }
+        for row in get_condition_store().compare(then_country, then_date, now_country, now_date)
+    ]
+
+
+def gap_summary(source_country, source_project_name, target_country):
+    """``gap_analysis`` counts for a selection, or None without current conditions."""
+    factor_table = get_factor_table()
+    then_row = factor_table.project_row(source_country, source_project_name)
+    now_row = factor_table.country_row(target_country)
+    if then_row is None or now_row is None:
+        return None
+    return gap_analysis(factor_table, then_row, now_row)
+
+
+def _projection_inputs(catalog, source_country, source_project_name, target_country, similarity, energy_type,
+                       target_region):
+    yield_ratio = 1.0
+    if energy_type is not None:
+        yield_ratio = yield_comparison(
+            source_country, source_project_name, target_country, target_region, energy_type
+        )["ratio"]
+    normalized = get_normalized_catalog(PROJECTION_BASIS)
+    return projection_inputs(
+        _factor_table(catalog), catalog.projects, source_country, source_project_name, target_country, similarity,
+        normalized.cash_flow(source_country, source_project_name), yield_ratio,
+        normalized.project_investment(source_country, source_project_name),
+        normalized.price_ratio(source_country, source_project_name),
+    )
+
+
+def get_projection(source_country, source_project_name, target_country, similarity=None, n_paths=None, seed=0,
+                   energy_type=None, target_region=None):
+    """Memoized Monte Carlo projection, or None when the pair cannot be scored.
+
+    Cash flows, capex, NPV and the fan chart are in ``PROJECTION_BASIS``
+    (constant current-year US dollars). With ``energy_type``, revenue is
+    scaled by the energy yield of that technology at the target site
+    relative to the source project's site.
+    """
+    if similarity is None:
+        similarity = get_similarity(source_country, source_project_name, target_country).overall
+    if math.isnan(similarity):
+        return None
+    inputs = _projection_inputs(
+        get_catalog(), source_country, source_project_name, target_country, similarity, energy_type, target_region
+    )
+    if n_paths is None:
+        return run_projection(inputs, seed=seed)
+    return run_projection(inputs, n_paths, seed)
+
+
+def _wind_energy(catalog, country, region, speeds):
+    # Annual energy per MW at the site for each mean wind speed, one yield run for all
+    sites = _yield_sites(catalog)
+    index = {(site.country, site.region): site for site in sites}
+    site = index.get((country, region)) or index[(country, None)]
+    return compute_yields(WIND, tuple(site._replace(wind_speed=float(speed)) for speed in speeds)).mwh_per_mw
+
+
+def _sensitivity_target(catalog, source_country, source_project_name, target_country, target_region, energy_type):
+    # (inputs, current condition values, wind energy) of one transfer for cececo.sensitivity.analyze
+    similarity = _similarity_matrix(catalog).score(source_country, source_project_name, target_country).overall
+    if math.isnan(similarity):
+        return None
+    inputs = _projection_inputs(
+        catalog, source_country, source_project_name, target_country, similarity, energy_type, target_region
+    )
+    factor_table = _factor_table(catalog)
+    now_row = factor_table.country_row(target_country)
+    conditions = {
+        "Interest Rate": inputs.discount_rate * 100.0,
+        "Tax Incentive": inputs.relief_years_now,
+        "Currency Rate": inputs.fx_drift * 100.0,
+    }
+    for factor, unit in (("Steel Price", "USD/ton"), ("Wind Speed", "m/s"), ("YEKDEM Incentive", "USD/kWh")):
+        value, value_unit = factor_table.lookup(now_row, factor)
+        if value_unit == unit:
+            conditions[factor] = value
+    wind_energy = None
+    technology = TECHNOLOGIES.get(energy_type, energy_type) if energy_type else project_technology(source_project_name)
+    if technology == WIND:
+        def wind_energy(speeds):
+            return _wind_energy(catalog, target_country, target_region, speeds)
+    return inputs, conditions, wind_energy
+
+
+@lru_cache(maxsize=16)
+def _sensitivities(catalog, money_version, source_country, source_project_name, targets, energy_type, steps,
+                   n_paths, seed):
+    transfers = {}
+    for target_country, target_region in targets:
+        target = _sensitivity_target(
+            catalog, source_country, source_project_name, target_country, target_region, energy_type
+        )
+        if target is not None:
+            transfers[target_country] = target
+    return analyze(transfers, steps, n_paths, seed)
+
+
+def get_sensitivity(source_country, source_project_name, target_country, energy_type=None, target_region=None,
+                    steps=DEFAULT_STEPS, n_paths=SENSITIVITY_PATHS, seed=0):
+    """Memoized ``Sensitivity`` of one transfer to each condition factor, or None when it cannot be scored.
+
+    NPVs are in ``PROJECTION_BASIS`` like ``get_projection``'s.
+    """
+    return _sensitivities(
+        get_catalog(), tables_version(MONEY_PATH), source_country, source_project_name,
+        ((target_country, target_region),), energy_type, steps, n_paths, seed,
+    ).get(target_country)
+
+
+def sensitivity_batch(source_country, source_project_name, energy_type=None, steps=DEFAULT_STEPS,
+                      n_paths=SENSITIVITY_PATHS, seed=0):
+    """``Sensitivity`` of a source project in every other CECECO country, from one batched simulation.
+
+    Targets are the countries as a whole; countries without current
+    conditions are left out.
+    """
+    targets = tuple((country, None) for country in CECECO_COUNTRIES if country != source_country)
+    return _sensitivities(
+        get_catalog(), tables_version(MONEY_PATH), source_country, source_project_name, targets, energy_type, steps,
+        n_paths, seed,
+    )
+
+
+@lru_cache(maxsize=4)
+def _portfolio_candidates(catalog, money_version, energy_type):
+    similarity_matrix = _similarity_matrix(catalog)
+    normalized = _normalized_catalog(catalog, money_version, PROJECTION_BASIS)
+    rows = []
+    for source_country, country_projects in catalog.projects.items():
+        for project_name in country_projects:
+            investment = normalized.project_investment(source_country, project_name)
+            for target_country, target in CECECO_COUNTRIES.items():
+                if target_country == source_country:
+                    continue
+                similarity = similarity_matrix.score(source_country, project_name, target_country)
+                if math.isnan(similarity.overall):
+                    continue
+                for target_region in list(target.get("regions") or {}) or [None]:
+                    result = get_projection(
+                        source_country, project_name, target_country, similarity.overall, PORTFOLIO_PATHS,
+                        energy_type=energy_type, target_region=target_region,
+                    )
+                    roi_p10, roi_p50 = result.percentiles("roi", (10, 50))
+                    rows.append({
+                        "source_country": source_country,
+                        "source_project": project_name,
+                        "target_country": target_country,
+                        "target_region": target_region,
+                        "investment": investment,
+                        "similarity_overall": similarity.overall,
+                        "roi_p10": roi_p10,
+                        "roi_p50": roi_p50,
+                        "prob_npv_positive": result.probability_positive_npv(),
+                    })
+    return Candidates.from_rows(rows)
+
+
+def portfolio_candidates(energy_type=None):
+    """Every catalog project x target site as optimizer ``Candidates``, memoized per catalog and money tables.
+
+    Each candidate is scored with a ``PORTFOLIO_PATHS`` projection; with
+    ``energy_type`` revenue follows that technology's yield at the site.
+    Investments are in ``PROJECTION_BASIS`` like the projections.
+    """
+    return _portfolio_candidates(get_catalog(), tables_version(MONEY_PATH), energy_type)
+
+
+def optimize_portfolio(budget, energy_type=None, **limits):
+    """``cececo.portfolio.optimize`` over the catalog's candidate transfers."""
+    return optimize(portfolio_candidates(energy_type), budget, **limits)
@@ -0,0 +1,293 @@
+"""Plotly figure builders with a shared figure cache and large-series downsampling.
+
+Figures are cached process-wide by a hash of their builder and input data
+(``cached_figure``), so every session showing the same project or country
+reuses one ``go.Figure``. Streamlit serializes a copy of the figure, so a
+cached figure is never mutated by rendering.
+
+Series longer than ``WEBGL_THRESHOLD`` points are drawn with ``Scattergl``
+and downsampled with Largest-Triangle-Three-Buckets (``lttb``) to about
+``MAX_POINTS``, roughly one point per horizontal pixel of a wide chart.
+Grouped cash-flow bars switch to lines at that size, since thousands of
+bars cannot be told apart.
+
+Plotly is imported by the builders, so importing this module stays cheap.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Points kept per downsampled trace, about one per pixel of a wide chart
+MAX_POINTS = 1000
+# Series longer than this use WebGL traces and downsampling
+WEBGL_THRESHOLD = 2000
+# Cash flows with more periods than this are drawn as lines instead of bars
+MAX_BARS = 60
+
+COLORS = {"revenue": "#10b981", "cost": "#ef4444", "profit": "#667eea", "accent": "#764ba2"}
+
+DARK_LAYOUT = dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font=dict(color='#e0e0e0'),
+)
+
+
+def lttb(x, y, n_out):
+    """Indices of ``n_out`` points of (x, y) chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; each bucket in between
+    keeps the point forming the largest triangle with the previously kept
+    point and the mean of the next bucket. Returns all indices when the
+    series is no longer than ``n_out``.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Mean of every bucket, plus the last point as the final "next bucket"
+    counts = np.diff(np.append(edges, n - 1))
+    mean_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / counts[:-1], x[-1])
+    mean_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / counts[:-1], y[-1])
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        px, py = x[previous], y[previous]
+        next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+        areas = np.abs((px - next_x) * (y[start:stop] - py) - (px - x[start:stop]) * (next_y - py))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def _line(go, x, y, name, max_points=MAX_POINTS, **style):
+    """A line trace, WebGL and downsampled when the series is long.
+
+    ``max_points=None`` keeps every point as an SVG trace.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    if max_points is None or len(y) <= WEBGL_THRESHOLD:
+        return go.Scatter(x=x, y=y, name=name, **style)
+    kept = lttb(np.arange(len(y)) if x.dtype.kind not in "iuf" else x, y, max_points)
+    style.pop("marker", None)
+    style["mode"] = "lines"
+    return go.Scattergl(x=x[kept], y=y[kept], name=name, **style)
+
+
+def cash_flow_figure(revenues, costs, profits, max_points=MAX_POINTS, unit="Million USD"):
+    """Revenue and cost per period with the net profit line.
+
+    Up to ``MAX_BARS`` periods are grouped bars labelled "Year n"; longer
+    histories are lines over the period number, unless ``max_points`` is
+    None. ``unit`` labels the amounts.
+    """
+    import plotly.graph_objects as go
+
+    n = len(revenues)
+    fig = go.Figure()
+    if n <= MAX_BARS or max_points is None:
+        periods = [f"Year {i + 1}" for i in range(n)]
+        fig.add_trace(go.Bar(x=periods, y=revenues, name='Revenue', marker_color=COLORS["revenue"], opacity=0.8))
+        fig.add_trace(go.Bar(x=periods, y=costs, name='Cost', marker_color=COLORS["cost"], opacity=0.8))
+        fig.add_trace(go.Scatter(
+            x=periods, y=profits, name='Net Profit', mode='lines+markers',
+            line=dict(color=COLORS["profit"], width=3), marker=dict(size=10)
+        ))
+    else:
+        periods = np.arange(1, n + 1)
+        fig.add_trace(_line(go, periods, revenues, 'Revenue', max_points, mode='lines',
+                            line=dict(color=COLORS["revenue"], width=1)))
+        fig.add_trace(_line(go, periods, costs, 'Cost', max_points, mode='lines',
+                            line=dict(color=COLORS["cost"], width=1)))
+        fig.add_trace(_line(go, periods, profits, 'Net Profit', max_points, mode='lines',
+                            line=dict(color=COLORS["profit"], width=2)))
+    fig.update_layout(
+        title=f'Annual Financial Performance ({unit})',
+        xaxis_title='Year',
+        yaxis_title=f'Amount ({unit})',
+        barmode='group',
+        height=500,
+        legend=dict(bgcolor='rgba(0,0,0,0)'),
+        **DARK_LAYOUT
+    )
+    return fig
+
+
+def fan_figure(years, p10, p50, p90, title, max_points=MAX_POINTS, unit="Million USD"):
+    """P10-P90 band and P50 line of a projected cumulative cash flow."""
+    import plotly.graph_objects as go
+
+    band = dict(color='rgba(102, 126, 234, 0.4)', width=1)
+    fig = go.Figure()
+    fig.add_trace(_line(go, years, p90, 'P90', max_points, mode='lines', line=band))
+    fig.add_trace(_line(go, years, p10, 'P10', max_points, mode='lines', fill='tonexty',
+                        fillcolor='rgba(102, 126, 234, 0.2)', line=band))
+    fig.add_trace(_line(go, years, p50, 'P50', max_points, mode='lines+markers',
+                        line=dict(color=COLORS["profit"], width=3)))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Year',
+        yaxis_title=f'Cumulative Cash Flow ({unit})',
+        height=450,
+        legend=dict(bgcolor='rgba(0,0,0,0)'),
+        **DARK_LAYOUT
+    )
+    return fig
+
+
+def tornado_figure(labels, at_low, at_high, base, title, axis_title):
+    """Change of an outcome from ``base`` at the low and high end of each factor's range.
+
+    Factors are drawn top down in the order given, so pass them largest swing first.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for name, outcome, color in (('Low end of range', at_low, COLORS["profit"]),
+                                 ('High end of range', at_high, COLORS["accent"])):
+        fig.add_trace(go.Bar(y=labels, x=np.subtract(outcome, base), base=base, orientation='h', name=name,
+                             marker_color=color, opacity=0.85))
+    fig.add_vline(x=base, line=dict(color='#e0e0e0', width=1, dash='dot'))
+    fig.update_layout(
+        title=title,
+        xaxis_title=axis_title,
+        yaxis=dict(autorange='reversed'),
+        barmode='overlay',
+        height=150 + 45 * len(labels),
+        legend=dict(orientation='h', y=-0.25, bgcolor='rgba(0,0,0,0)'),
+        **DARK_LAYOUT
+    )
+    return fig
+
+
+def regulatory_figure(years, levels, curve_years, curve, max_points=MAX_POINTS):
+    """Impact level of each regulatory event with the cumulative favorability curve."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(_line(go, years, levels, 'Regulatory Impact', max_points, mode='lines+markers',
+                        line=dict(color=COLORS["profit"], width=3), marker=dict(size=15, color=COLORS["accent"])))
+    fig.add_trace(_line(go, curve_years, curve, 'Cumulative Favorability', max_points, mode='lines', yaxis='y2',
+                        line=dict(color=COLORS["revenue"], width=2, dash='dot')))
+    fig.update_layout(
+        title='Regulatory Evolution Impact Over Time',
+        xaxis_title='Year',
+        yaxis_title='Impact Level',
+        height=400,
+        yaxis=dict(tickmode='array', tickvals=[1, 2, 3], ticktext=['Low', 'Moderate', 'High']),
+        yaxis2=dict(title='Cumulative Favorability', overlaying='y', side='right', showgrid=False),
+        legend=dict(orientation='h', y=-0.2),
+        **DARK_LAYOUT
+    )
+    return fig
+
+
+def sunburst_figure(labels, parents, values, colors, title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Sunburst(
+        labels=labels,
+        parents=parents,
+        values=values,
+        branchvalues="total",
+        marker=dict(colors=colors)
+    ))
+    fig.update_layout(title=title, height=400, **DARK_LAYOUT)
+    return fig
+
+
+def portfolio_figure(countries, investment, expected_return):
+    """Capital deployed and expected return of the chosen transfers per target country."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=countries, y=investment, name='Investment', marker_color=COLORS["profit"], opacity=0.8))
+    fig.add_trace(go.Bar(x=countries, y=expected_return, name='Expected Return', marker_color=COLORS["revenue"],
+                         opacity=0.8))
+    fig.update_layout(
+        title='Portfolio by Target Country (Million USD)',
+        xaxis_title='Target Country',
+        yaxis_title='Amount (Million USD)',
+        barmode='group',
+        height=400,
+        legend=dict(bgcolor='rgba(0,0,0,0)'),
+        **DARK_LAYOUT
+    )
+    return fig
+
+
+def _update_digest(digest, value):
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update_digest(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}".encode())
+        for key in sorted(value):
+            _update_digest(digest, key)
+            _update_digest(digest, value[key])
+    else:
+        digest.update(repr(value).encode())
+    digest.update(b"\0")
+
+
+def data_key(*args, **kwargs):
+    """Content hash of figure inputs (arrays, sequences, dicts and scalars)."""
+    digest = hashlib.blake2b(digest_size=16)
+    _update_digest(digest, args)
+    _update_digest(digest, kwargs)
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """Thread-safe LRU of built figures keyed by builder and input data hash."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._figures)
+
+    def get(self, builder, *args, **kwargs):
+        """The cached figure of ``builder(*args, **kwargs)``, building it on a miss."""
+        key = (builder.__module__, builder.__qualname__, data_key(*args, **kwargs))
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return figure
+            self.misses += 1
+        figure = builder(*args, **kwargs)
+        with self._lock:
+            self._figures[key] = figure
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+
+_figure_cache = FigureCache()
+
+
+def cached_figure(builder, *args, **kwargs):
+    """``builder(*args, **kwargs)`` from the process-wide figure cache."""
+    return _figure_cache.get(builder, *args, **kwargs)
@@ -0,0 +1,504 @@
+"""Incremental Official Gazette ingestion for the Researcher Agent.
+
+Usage::
+
+    python -m cececo.gazette ingest data/gazettes --store data/gazette_store --workers 4
+    python -m cececo.gazette ingest data/gazettes --watch 30
+    python -m cececo.gazette sample /tmp/gazettes --docs 20000
+
+Gazette dumps are HTML, plain text (e.g. text extracted from PDFs) or JSON
+files under a source directory, optionally in per-country subdirectories.
+``ingest`` is a chain of generators: directory discovery, a stat-based
+filter against the store's ledger, parallel parsing in a process pool with
+a bounded window of in-flight chunks, and appends to the store. Each
+document is content-hashed, so unchanged files and duplicates of already
+ingested content are skipped; only new or changed documents are parsed.
+
+Extracted events have the shape of a project's ``regulatory_evolution``
+entries (``year``, ``event``, ``impact``) plus ``country``, ``date`` and
+the ``source`` document. The store is two append-only JSON Lines files:
+``events.jsonl`` and ``ledger.jsonl`` (one line per ingested document
+version). Events of a document that has since changed are superseded by
+those of its new version.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from html.parser import HTMLParser
+from itertools import islice
+
+from cececo.data import CECECO_COUNTRIES
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_TYPES = {".html": "html", ".htm": "html", ".txt": "text", ".json": "json"}
+
+EVENTS_FILE = "events.jsonl"
+LEDGER_FILE = "ledger.jsonl"
+
+MAX_TITLE_LENGTH = 120
+
+REGULATORY_KEYWORDS = re.compile(
+    r"\b(?:law|regulation|decree|directive|resolution|amendment|code|tariff|feed-in|incentive|yekdem|"
+    r"subsid\w*|permit\w*|licen[cs]\w*|tax\w*|auction\w*|quota|framework|certificate\w*|grid)\b",
+    re.IGNORECASE,
+)
+
+_MONTHS = (
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+)
+_ISO_DATE = re.compile(r"\b((?:19|20)\d{2})-(\d{1,2})-(\d{1,2})\b")
+_DOTTED_DATE = re.compile(r"\b(\d{1,2})[./](\d{1,2})[./]((?:19|20)\d{2})\b")
+_MONTH_DATE_PATTERN = rf"(?:(\d{{1,2}})\s+)?({'|'.join(_MONTHS)})\s+(?:(\d{{1,2}}),?\s+)?((?:19|20)\d{{2}})"
+_MONTH_DATE = re.compile(rf"\b{_MONTH_DATE_PATTERN}\b", re.IGNORECASE)
+_YEAR = re.compile(r"\b((?:19|20)\d{2})\b")
+_LEADING_DATE = re.compile(
+    rf"^[\s\W]*(?:\d{{1,4}}[-./]\d{{1,2}}[-./]\d{{1,4}}|{_MONTH_DATE_PATTERN}|(?:19|20)\d{{2}})[\s:–—\-|.,)]*",
+    re.IGNORECASE,
+)
+_TITLE_SEPARATOR = re.compile(r"\s+[-–—]\s+|:\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def find_date(text):
+    """(year, ISO date or None) of the first date in ``text``, or None."""
+    candidates = []
+    match = _ISO_DATE.search(text)
+    if match:
+        candidates.append((match.start(), int(match.group(1)), int(match.group(2)), int(match.group(3))))
+    match = _DOTTED_DATE.search(text)
+    if match:
+        candidates.append((match.start(), int(match.group(3)), int(match.group(2)), int(match.group(1))))
+    match = _MONTH_DATE.search(text)
+    if match:
+        day = match.group(1) or match.group(3)
+        month = _MONTHS.index(match.group(2).lower()) + 1
+        candidates.append((match.start(), int(match.group(4)), month, int(day) if day else None))
+    if candidates:
+        _, year, month, day = min(candidates)
+        if 1 <= month <= 12 and (day is None or 1 <= day <= 31):
+            return year, f"{year:04d}-{month:02d}" + (f"-{day:02d}" if day else "")
+        return year, None
+    match = _YEAR.search(text)
+    if match:
+        return int(match.group(1)), None
+    return None
+
+
+class _TextExtractor(HTMLParser):
+    BLOCK_TAGS = {"p", "div", "li", "tr", "br", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "td"}
+    SKIP_TAGS = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skipping += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return "".join(extractor.parts)
+
+
+def find_country(text, countries=CECECO_COUNTRIES):
+    """First CECECO country named in ``text``, or None."""
+    lowered = text.lower()
+    positions = [(lowered.find(country.lower()), country) for country in countries]
+    positions = [(position, country) for position, country in positions if position >= 0]
+    return min(positions)[1] if positions else None
+
+
+def _event(title, impact, date, country):
+    year, iso_date = date
+    title = title.strip()
+    if len(title) > MAX_TITLE_LENGTH:
+        title = title[:MAX_TITLE_LENGTH - 1].rstrip() + "…"
+    return {"year": year, "event": title, "impact": impact.strip(), "country": country, "date": iso_date}
+
+
+def extract_text_events(text, country=None):
+    """Dated regulatory events, one per paragraph that has a date and a regulatory keyword."""
+    events = []
+    for paragraph in re.split(r"\n\s*\n|\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph or not REGULATORY_KEYWORDS.search(paragraph):
+            continue
+        date = find_date(paragraph)
+        if date is None:
+            continue
+        body = _LEADING_DATE.sub("", paragraph, count=1) or paragraph
+        parts = _TITLE_SEPARATOR.split(body, maxsplit=1)
+        if len(parts) == 1:
+            parts = _SENTENCE_END.split(body, maxsplit=1)
+        title, impact = parts[0].rstrip("."), parts[1] if len(parts) > 1 else ""
+        events.append(_event(title, impact, date, find_country(paragraph) or country))
+    return events
+
+
+def extract_json_events(data, country=None):
+    """Events from a JSON gazette dump: one entry or a list, or ``{"entries": [...]}``."""
+    if isinstance(data, dict) and isinstance(data.get("entries"), list):
+        country = data.get("country", country)
+        data = data["entries"]
+    entries = data if isinstance(data, list) else [data]
+    events = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        title = str(entry.get("event") or entry.get("title") or "")
+        impact = str(entry.get("impact") or entry.get("summary") or "")
+        date = find_date(str(entry.get("date") or entry.get("year") or "")) or find_date(f"{title} {impact}")
+        if not title or date is None:
+            continue
+        events.append(_event(title, impact, date, entry.get("country") or country))
+    return events
+
+
+def document_country(path, countries=CECECO_COUNTRIES):
+    """Country named by a directory or file name in ``path``, or None."""
+    for part in reversed(os.path.normpath(path).split(os.sep)):
+        country = find_country(part.replace("_", " ").replace("-", " "), countries)
+        if country:
+            return country
+    return None
+
+
+def parse_document(path):
+    """Hash and parse one gazette file; runs in the worker pool."""
+    result = {"path": path, "sha256": None, "events": [], "error": None}
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        result["sha256"] = hashlib.sha256(raw).hexdigest()
+        text = raw.decode("utf-8", errors="replace")
+        kind = DOCUMENT_TYPES[os.path.splitext(path)[1].lower()]
+        country = document_country(path)
+        if kind == "json":
+            result["events"] = extract_json_events(json.loads(text), country)
+        else:
+            if kind == "html":
+                text = html_to_text(text)
+            result["events"] = extract_text_events(text, country or find_country(text))
+    except Exception as exc:  # a malformed document is recorded, not fatal
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def parse_chunk(paths):
+    return [parse_document(path) for path in paths]
+
+
+def discover(source):
+    """Yield (path, mtime_ns, size) for every gazette file under ``source``."""
+    pending = [source]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in DOCUMENT_TYPES:
+                    stat = entry.stat()
+                    yield entry.path, stat.st_mtime_ns, stat.st_size
+
+
+class GazetteStore:
+    """Append-only event store with a ledger of ingested document versions."""
+
+    def __init__(self, path):
+        self.path = path
+        self.events_path = os.path.join(path, EVENTS_FILE)
+        self.ledger_path = os.path.join(path, LEDGER_FILE)
+
+    def version(self):
+        """(size, mtime_ns) of the event file; changes whenever events are appended."""
+        try:
+            stat = os.stat(self.events_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _read_lines(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    # A torn final line from an interrupted append is ignored
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def ledger(self):
+        """Latest {path: entry} over the ledger."""
+        return {entry["path"]: entry for entry in self._read_lines(self.ledger_path)}
+
+    def append(self, documents):
+        """Record ``documents`` (ledger entries with their ``events``)."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.events_path, "a", encoding="utf-8") as events, \
+                open(self.ledger_path, "a", encoding="utf-8") as ledger:
+            for document in documents:
+                for seq, event in enumerate(document.get("events", ())):
+                    events.write(json.dumps(
+                        {**event, "source": document["path"], "sha256": document["sha256"], "seq": seq},
+                        ensure_ascii=False,
+                    ) + "\n")
+            # Ledger entries go last, so an interrupted append is redone, not lost
+            events.flush()
+            for document in documents:
+                entry = {key: document[key] for key in ("path", "mtime_ns", "size", "sha256", "error")}
+                ledger.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def iter_events(self):
+        """Current events: superseded document versions and repeated appends are dropped."""
+        current = {entry["sha256"] for entry in self.ledger().values() if entry.get("sha256")}
+        seen = set()
+        for event in self._read_lines(self.events_path):
+            key = (event.get("sha256"), event.get("seq"))
+            if key[0] not in current or key in seen:
+                continue
+            seen.add(key)
+            yield event
+
+
+@dataclass
+class IngestStats:
+    discovered: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    processed: int = 0
+    failed: int = 0
+    events: int = 0
+    backlog: int = 0
+    seconds: float = 0.0
+
+    @property
+    def docs_per_second(self):
+        return self.processed / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (
+            f"{self.processed:,} new/changed docs ({self.docs_per_second:,.0f} docs/s), "
+            f"{self.events:,} events, {self.unchanged:,} unchanged, {self.duplicates:,} duplicates, "
+            f"{self.failed:,} failed, backlog {self.backlog:,}"
+        )
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parsed(chunks, workers):
+    """Parse chunks in order, in a pool with a bounded window when ``workers`` > 0."""
+    if not workers:
+        for chunk in chunks:
+            yield parse_chunk(chunk)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(parse_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def ingest(source, store, workers=None, chunk_size=32, log=None, log_every=5.0):
+    """Ingest new and changed documents under ``source`` into ``store``.
+
+    ``workers`` defaults to the CPU count; 0 parses in the calling thread.
+    ``log``, if given, receives an ``IngestStats`` snapshot every
+    ``log_every`` seconds and once at the end.
+    """
+    if isinstance(store, str):
+        store = GazetteStore(store)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    started = time.perf_counter()
+    stats = IngestStats()
+    ledger = store.ledger()
+    known_hashes = {entry["sha256"] for entry in ledger.values() if entry.get("sha256")}
+
+    # The stat pass is cheap and gives the backlog up front; only paths are kept
+    candidates = {}
+    for path, mtime_ns, size in discover(source):
+        stats.discovered += 1
+        entry = ledger.get(path)
+        if entry and entry["mtime_ns"] == mtime_ns and entry["size"] == size:
+            stats.unchanged += 1
+        else:
+            candidates[path] = (mtime_ns, size)
+    del ledger
+    stats.backlog = len(candidates)
+
+    last_log = time.perf_counter()
+    for results in _parsed(_chunks(list(candidates), chunk_size), workers):
+        documents = []
+        for result in results:
+            result["mtime_ns"], result["size"] = candidates[result["path"]]
+            stats.backlog -= 1
+            if result["error"]:
+                stats.failed += 1
+            elif result["sha256"] in known_hashes:
+                # Same content as an ingested document: record the path, keep no events
+                stats.duplicates += 1
+                result["events"] = []
+            else:
+                known_hashes.add(result["sha256"])
+                stats.processed += 1
+                stats.events += len(result["events"])
+            documents.append(result)
+        store.append(documents)
+        stats.seconds = time.perf_counter() - started
+        if log and time.perf_counter() - last_log >= log_every:
+            log(stats)
+            last_log = time.perf_counter()
+
+    stats.seconds = time.perf_counter() - started
+    if log:
+        log(stats)
+    return stats
+
+
+class GazetteWatcher:
+    """Background thread re-running ``ingest`` every ``interval`` seconds."""
+
+    def __init__(self, source, store, interval=30.0, workers=0):
+        self.source = source
+        self.store = store if isinstance(store, GazetteStore) else GazetteStore(store)
+        self.interval = interval
+        self.workers = workers
+        self.stats = None
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="gazette-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.stats = ingest(self.source, self.store, self.workers)
+                self.error = None
+            except Exception as exc:
+                self.error = f"{type(exc).__name__}: {exc}"
+                logger.exception("Gazette ingestion of %s failed", self.source)
+            self._stop.wait(self.interval)
+
+
+_SAMPLE_EVENTS = (
+    ("Renewable Energy Law amended", "Licensing thresholds for wind and solar plants raised"),
+    ("Feed-in tariff schedule published", "Guaranteed purchase prices set for ten years"),
+    ("Tax incentive regulation issued", "Corporate tax reduction for renewable investments"),
+    ("Grid connection permit procedure simplified", "Approval times cut for new capacity"),
+    ("Renewable energy auction announced", "Capacity quota allocated by competitive bidding"),
+)
+
+
+def write_samples(directory, n_docs, seed=0):
+    """Write ``n_docs`` synthetic gazette dumps (HTML, text and JSON) as a local stand-in."""
+    import random
+
+    rng = random.Random(seed)
+    countries = list(CECECO_COUNTRIES)
+    for i in range(n_docs):
+        country = countries[i % len(countries)]
+        folder = os.path.join(directory, country)
+        os.makedirs(folder, exist_ok=True)
+        year = rng.randint(2010, 2024)
+        date = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{year}"
+        title, impact = rng.choice(_SAMPLE_EVENTS)
+        kind = ("html", "txt", "json")[i % 3]
+        path = os.path.join(folder, f"gazette-{i:06d}.{kind}")
+        if kind == "json":
+            content = json.dumps({"country": country, "entries": [{"date": date, "title": title, "summary": impact}]})
+        elif kind == "html":
+            content = f"<html><body><h1>Official Gazette No. {i}</h1><p>{date} - {title} - {impact}.</p></body></html>"
+        else:
+            content = f"Official Gazette No. {i}\n\n{date}: {title} - {impact}.\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest Official Gazette dumps into the event store.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    run = subcommands.add_parser("ingest", help="ingest new and changed documents")
+    run.add_argument("source", help="directory of gazette dumps")
+    run.add_argument("--store", default=os.path.join("data", "gazette_store"), help="event store directory")
+    run.add_argument("--workers", "-j", type=int, default=None, help="parser processes (default: CPU count)")
+    run.add_argument("--chunk-size", type=int, default=32, help="documents per worker task")
+    run.add_argument("--watch", type=float, metavar="SECONDS", help="keep re-scanning at this interval")
+    sample = subcommands.add_parser("sample", help="write synthetic gazette dumps")
+    sample.add_argument("directory")
+    sample.add_argument("--docs", type=int, default=1000)
+    sample.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "sample":
+        write_samples(args.directory, args.docs, args.seed)
+        print(f"Wrote {args.docs:,} gazette documents to {args.directory}")
+        return 0
+
+    def log(stats):
+        print(stats.summary(), flush=True)
+
+    while True:
+        stats = ingest(args.source, args.store, args.workers, args.chunk_size, log)
+        if args.watch is None:
+            print(json.dumps(asdict(stats)))
+            return 1 if stats.failed else 0
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+"""In-memory knowledge graph of countries, regions, projects and regulations.
+
+Nodes are countries, regions, projects, regulatory events and condition
+buckets (a factor value shared by projects, e.g. a 2.5 relief-year tax
+incentive). Edges are undirected and typed:
+
+- ``has_region``: country - region
+- ``has_project``: region (or country) - project
+- ``regulated_by``: project - regulatory event from its ``regulatory_evolution``
+- ``issued``: country - regulatory event, including ingested gazette events
+- ``has_condition``: project - condition bucket from its ``then_conditions``
+- ``borders``: country - country
+
+Adjacency is stored CSR-style: ``indptr`` / ``indices`` / ``edge_types``
+arrays backed by one sorted int64 array of packed (source, target, type)
+keys. New nodes and edges are staged and merged into the sorted keys on the
+next query; a stable sort merges the two sorted runs in linear time, so
+adding a few events to a large graph does not rebuild it. Traversals expand
+whole BFS frontiers with array operations.
+"""
+
+import math
+import threading
+
+import numpy as np
+
+from cececo.conditions import NO_UNIT, parse_condition
+
+COUNTRY, REGION, PROJECT, REGULATION, CONDITION = range(5)
+NODE_TYPES = ("country", "region", "project", "regulation", "condition")
+
+HAS_REGION, HAS_PROJECT, REGULATED_BY, ISSUED, HAS_CONDITION, BORDERS = range(6)
+EDGE_TYPES = ("has_region", "has_project", "regulated_by", "issued", "has_condition", "borders")
+
+# Packed edge key: source << 33 | target << 3 | edge type
+_TYPE_BITS = 3
+_NODE_BITS = 30
+_NODE_MASK = (1 << _NODE_BITS) - 1
+_TYPE_MASK = (1 << _TYPE_BITS) - 1
+
+# Numeric condition values share a bucket within a factor of this ratio
+CONDITION_BUCKET_RATIO = 1.25
+
+NO_YEAR = -1
+
+# Default ROI (%) above which a project counts as high-ROI
+HIGH_ROI = 25.0
+
+
+class _Growable:
+    """Append-only NumPy buffer with amortized doubling."""
+
+    def __init__(self, dtype, fill):
+        self._data = np.empty(16, dtype=dtype)
+        self._fill = fill
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self._data):
+            grown = np.empty(2 * len(self._data), dtype=self._data.dtype)
+            grown[:self.size] = self._data
+            self._data = grown
+        self._data[self.size] = self._fill if value is None else value
+        self.size += 1
+
+    def __setitem__(self, i, value):
+        self._data[i] = value
+
+    @property
+    def array(self):
+        return self._data[:self.size]
+
+
+def condition_bucket(factor, text):
+    """Node key of the condition bucket for one ``then_conditions`` entry, or None."""
+    parsed = parse_condition(factor, text)
+    if parsed is None:
+        return None
+    if parsed.unit == NO_UNIT or parsed.value <= 0:
+        return ("condition", factor, "none", 0)
+    if parsed.unit == "score":
+        return ("condition", factor, "score", int(parsed.value))
+    bucket = int(round(math.log(parsed.value) / math.log(CONDITION_BUCKET_RATIO)))
+    return ("condition", factor, parsed.unit, bucket)
+
+
+class KnowledgeGraph:
+    """Typed, undirected graph in CSR form with staged incremental inserts.
+
+    Node keys are tuples such as ``("country", "Turkey")`` or
+    ``("project", "Turkey", "Kırıkkale Wind Farm")``; queries take and return
+    integer node ids, mapped with ``node_id`` / ``key``.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []
+        self._index = {}
+        self._types = _Growable(np.int8, -1)
+        self._years = _Growable(np.int16, NO_YEAR)
+        self._values = _Growable(np.float64, np.nan)
+        self._edge_keys = np.empty(0, dtype=np.int64)
+        self._staged = []
+        self._csr = None
+
+    # Construction
+
+    def add_node(self, key, node_type, year=None, value=None):
+        """Id of ``key``, adding it if new; ``year`` / ``value`` update existing nodes."""
+        with self._lock:
+            node = self._index.get(key)
+            if node is None:
+                node = len(self._keys)
+                if node > _NODE_MASK:
+                    raise OverflowError("Knowledge graph node limit reached")
+                self._keys.append(key)
+                self._index[key] = node
+                self._types.append(node_type)
+                self._years.append(year)
+                self._values.append(value)
+                self._csr = None
+            else:
+                if year is not None:
+                    self._years[node] = year
+                if value is not None:
+                    self._values[node] = value
+            return node
+
+    def add_edge(self, u, v, edge_type):
+        self.add_edges([u], [v], edge_type)
+
+    def add_edges(self, us, vs, edge_types):
+        """Stage undirected edges; ``edge_types`` may be one type or one per edge."""
+        us = np.asarray(us, dtype=np.int64)
+        vs = np.asarray(vs, dtype=np.int64)
+        types = np.broadcast_to(np.asarray(edge_types, dtype=np.int64), us.shape)
+        with self._lock:
+            # Both directions, so every node's neighbours are one CSR row
+            self._staged.append(np.concatenate([
+                (us << (_NODE_BITS + _TYPE_BITS)) | (vs << _TYPE_BITS) | types,
+                (vs << (_NODE_BITS + _TYPE_BITS)) | (us << _TYPE_BITS) | types,
+            ]))
+            self._csr = None
+
+    def _compact(self):
+        with self._lock:
+            if self._csr is not None:
+                return self._csr
+            if self._staged:
+                # The stable sort merges the sorted keys with the sorted
+                # staged run in linear time; duplicates are then dropped
+                staged = np.sort(np.concatenate(self._staged))
+                merged = np.sort(np.concatenate([self._edge_keys, staged]), kind="stable")
+                self._staged = []
+                keep = np.ones(len(merged), dtype=bool)
+                keep[1:] = merged[1:] != merged[:-1]
+                self._edge_keys = merged[keep]
+            sources = self._edge_keys >> (_NODE_BITS + _TYPE_BITS)
+            indptr = np.zeros(len(self._keys) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=len(self._keys)), out=indptr[1:])
+            indices = ((self._edge_keys >> _TYPE_BITS) & _NODE_MASK).astype(np.int32)
+            edge_types = (self._edge_keys & _TYPE_MASK).astype(np.int8)
+            self._csr = (indptr, indices, edge_types)
+            return self._csr
+
+    # Lookups
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def n_edges(self):
+        """Undirected edge count."""
+        return len(self._compact()[1]) // 2
+
+    def node_id(self, key):
+        return self._index.get(key)
+
+    def key(self, node):
+        return self._keys[node]
+
+    @property
+    def node_types(self):
+        return self._types.array
+
+    @property
+    def years(self):
+        return self._years.array
+
+    @property
+    def values(self):
+        return self._values.array
+
+    def nbytes(self):
+        """Bytes held by the adjacency and node attribute arrays."""
+        indptr, indices, edge_types = self._compact()
+        return (
+            self._edge_keys.nbytes + indptr.nbytes + indices.nbytes + edge_types.nbytes
+            + self._types.array.nbytes + self._years.array.nbytes + self._values.array.nbytes
+        )
+
+    def summary(self):
+        node_counts = np.bincount(self.node_types, minlength=len(NODE_TYPES))
+        edge_counts = np.bincount(self._compact()[2], minlength=len(EDGE_TYPES)) // 2
+        return {
+            "nodes": dict(zip(NODE_TYPES, node_counts.tolist())),
+            "edges": dict(zip(EDGE_TYPES, edge_counts.tolist())),
+        }
+
+    # Traversal
+
+    def _expand(self, frontier, edge_types=None):
+        """(neighbour, source) pairs for every edge leaving ``frontier``."""
+        indptr, indices, types = self._compact()
+        starts = indptr[frontier]
+        lengths = indptr[frontier + 1] - starts
+        total = int(lengths.sum())
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        neighbours = indices[offsets].astype(np.int64)
+        sources = np.repeat(frontier, lengths)
+        if edge_types is not None:
+            allowed = np.isin(types[offsets], edge_types)
+            neighbours, sources = neighbours[allowed], sources[allowed]
+        return neighbours, sources
+
+    def neighbors(self, node, edge_types=None, node_type=None):
+        neighbours, _ = self._expand(np.array([node], dtype=np.int64), edge_types)
+        if node_type is not None:
+            neighbours = neighbours[self.node_types[neighbours] == node_type]
+        return np.unique(neighbours)
+
+    def k_hop(self, sources, k, edge_types=None):
+        """(node ids, hop distances) of every node within ``k`` hops, sources included at 0."""
+        sources = np.unique(np.atleast_1d(np.asarray(sources, dtype=np.int64)))
+        distance = np.full(len(self), -1, dtype=np.int32)
+        distance[sources] = 0
+        frontier = sources
+        for hop in range(1, k + 1):
+            if not len(frontier):
+                break
+            neighbours, _ = self._expand(frontier, edge_types)
+            neighbours = np.unique(neighbours)
+            frontier = neighbours[distance[neighbours] < 0]
+            distance[frontier] = hop
+        reached = np.flatnonzero(distance >= 0)
+        return reached, distance[reached]
+
+    def shortest_path(self, source, target, edge_types=None, max_hops=None):
+        """Node ids on a shortest path from ``source`` to ``target``, or None."""
+        parent = np.full(len(self), -1, dtype=np.int64)
+        parent[source] = source
+        frontier = np.array([source], dtype=np.int64)
+        hops = 0
+        while len(frontier) and parent[target] < 0 and (max_hops is None or hops < max_hops):
+            neighbours, sources = self._expand(frontier, edge_types)
+            new = parent[neighbours] < 0
+            neighbours, sources = neighbours[new], sources[new]
+            # First discovery of each node sets its parent
+            neighbours, first = np.unique(neighbours, return_index=True)
+            parent[neighbours] = sources[first]
+            frontier = neighbours
+            hops += 1
+        if parent[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        return path[::-1]
+
+    # Domain queries
+
+    def projects_in(self, countries):
+        """Project ids located in ``countries`` (directly or through their regions)."""
+        reached, _ = self.k_hop(countries, 2, [HAS_REGION, HAS_PROJECT])
+        return reached[self.node_types[reached] == PROJECT]
+
+    def preceding_regulations(self, country, min_roi=HIGH_ROI, hops=1):
+        """Regulations that preceded high-ROI projects in neighbouring countries.
+
+        For every project with ROI >= ``min_roi`` in a country within ``hops``
+        borders of ``country``, lists the project's own regulatory events and
+        its country's standalone events (e.g. gazette entries not tied to any
+        project) dated no later than the project's start year.
+        """
+        origin = self.node_id(("country", country))
+        if origin is None:
+            return []
+        reached, _ = self.k_hop(origin, hops, [BORDERS])
+        projects = self.projects_in(reached[reached != origin])
+        projects = projects[self.values[projects] >= min_roi]
+        if not len(projects):
+            return []
+
+        # Own events: one (regulation, project) pair per regulated_by edge
+        regulations, owners = self._expand(projects, [REGULATED_BY])
+        pairs = [(regulations, owners)]
+        # Standalone country events: issued by a project's country, with no project attached
+        project_countries = np.array([self.node_id(("country", self.key(p)[1])) for p in projects], dtype=np.int64)
+        issued, issuers = self._expand(np.unique(project_countries), [ISSUED])
+        _, attached = self._expand(issued, [REGULATED_BY])
+        standalone = ~np.isin(issued, attached)
+        issued, issuers = issued[standalone], issuers[standalone]
+        for country_node in np.unique(issuers):
+            events = issued[issuers == country_node]
+            owners = projects[project_countries == country_node]
+            pairs.append((np.tile(events, len(owners)), np.repeat(owners, len(events))))
+        regulations = np.concatenate([r for r, _ in pairs])
+        owners = np.concatenate([o for _, o in pairs])
+
+        years = self.years
+        keep = (years[regulations] != NO_YEAR) & (years[regulations] <= years[owners])
+        regulations, owners = regulations[keep], owners[keep]
+        order = np.lexsort((years[regulations], owners))
+        results = []
+        for regulation, project in zip(regulations[order].tolist(), owners[order].tolist()):
+            project_key = self.key(project)
+            results.append({
+                "country": project_key[1],
+                "project": project_key[2],
+                "roi": float(self.values[project]),
+                "project_year": int(years[project]),
+                "regulation": self.key(regulation)[3],
+                "regulation_year": int(years[regulation]),
+            })
+        return results
+
+    def describe(self, node):
+        """Readable label for a node id."""
+        key = self.key(node)
+        kind = key[0]
+        if kind in ("country",):
+            return key[1]
+        if kind == "region":
+            return f"{key[2]} ({key[1]})"
+        if kind == "project":
+            return key[2]
+        if kind == "regulation":
+            return f"{key[3]} ({key[2]})"
+        factor, unit, bucket = key[1:]
+        if unit == "none":
+            return f"{factor}: none"
+        if unit == "score":
+            return f"{factor}: level {bucket}"
+        return f"{factor}: ~{CONDITION_BUCKET_RATIO ** bucket:,.3g} {unit}"
+
+    # Loading
+
+    def add_country(self, country, data):
+        node = self.add_node(("country", country), COUNTRY)
+        regions = [
+            self.add_node(("region", country, region), REGION) for region in (data.get("regions") or {})
+        ]
+        if regions:
+            self.add_edges(np.full(len(regions), node), regions, HAS_REGION)
+        return node
+
+    def add_regulation(self, country, year, event):
+        node = self.add_node(("regulation", country, int(year), event), REGULATION, year=int(year))
+        self.add_edge(self.add_node(("country", country), COUNTRY), node, ISSUED)
+        return node
+
+    def add_project(self, country, name, project, countries):
+        node = self.add_node(
+            ("project", country, name), PROJECT, year=project.get("year"), value=project.get("total_roi")
+        )
+        region = project.get("region")
+        if region in (countries.get(country, {}).get("regions") or {}):
+            self.add_edge(self.add_node(("region", country, region), REGION), node, HAS_PROJECT)
+        else:
+            self.add_edge(self.add_node(("country", country), COUNTRY), node, HAS_PROJECT)
+        events = [
+            self.add_regulation(country, event["year"], event["event"])
+            for event in project.get("regulatory_evolution", ())
+        ]
+        if events:
+            self.add_edges(np.full(len(events), node), events, REGULATED_BY)
+        conditions = [
+            self.add_node(bucket, CONDITION)
+            for bucket in (condition_bucket(factor, text) for factor, text in project.get("then_conditions", {}).items())
+            if bucket is not None
+        ]
+        if conditions:
+            self.add_edges(np.full(len(conditions), node), conditions, HAS_CONDITION)
+        return node
+
+    def add_borders(self, borders):
+        pairs = [
+            (self.add_node(("country", a), COUNTRY), self.add_node(("country", b), COUNTRY)) for a, b in borders
+        ]
+        if pairs:
+            us, vs = zip(*pairs)
+            self.add_edges(us, vs, BORDERS)
+
+
+def build_knowledge_graph(countries, projects, borders=(), regulatory_events=()):
+    """Graph of ``countries``, nested ``projects`` records, ``borders`` and extra dated events.
+
+    ``regulatory_events`` are dicts with ``country``, ``year`` and ``event``
+    such as ingested gazette events.
+    """
+    graph = KnowledgeGraph()
+    for country, data in countries.items():
+        graph.add_country(country, data)
+    graph.add_borders(borders)
+    for country, country_projects in projects.items():
+        for name, project in country_projects.items():
+            graph.add_project(country, name, project, countries)
+    for event in regulatory_events:
+        if event.get("country"):
+            graph.add_regulation(event["country"], event["year"], event["event"])
+    return graph
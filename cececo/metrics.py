@@ -0,0 +1,196 @@
+"""Per-section timing spans with rolling latency percentiles and exporters.
+
+``profiler.span(name)`` times a block of the app (the sidebar, a tab, a
+chart, the map, a data lookup) and ``profiler.timed(name)`` a whole
+function. Each section keeps its last ``WINDOW`` latencies in a ring
+buffer, from which ``summary`` reports p50/p95/p99 for the process.
+
+The outermost span on a thread is the "rerun": a full script run, or a
+fragment running on its own. When it ends, the rerun can be appended to a
+JSON Lines log (one line with every span of the rerun) and the
+Prometheus text file rewritten, e.g. for node_exporter's textfile
+collector.
+
+Profiling is off unless ``CECECO_PROFILE`` is set. While it is off,
+``span`` returns a shared no-op context manager and ``timed`` calls
+straight through, so instrumented code costs one attribute check.
+
+Environment:
+
+- ``CECECO_PROFILE=1`` enables collection (and the app's debug panel);
+- ``CECECO_METRICS_PROM=/path/cececo.prom`` writes the Prometheus text file;
+- ``CECECO_METRICS_LOG=/path/reruns.jsonl`` appends one JSON line per rerun.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+
+import numpy as np
+
+# Latencies kept per section for the percentiles
+WINDOW = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+_NULL_SPAN = nullcontext()
+
+
+class SectionStats:
+    """Ring buffer of one section's latest latencies plus lifetime count and sum."""
+
+    def __init__(self, window=WINDOW):
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def window(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._exit(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Profiler:
+    """Process-wide registry of section latencies."""
+
+    def __init__(self, enabled=False, window=WINDOW, prometheus_path=None, log_path=None):
+        self.enabled = enabled
+        self.window = window
+        self.prometheus_path = prometheus_path
+        self.log_path = log_path
+        self._sections = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name):
+        """Context manager timing the block as section ``name``."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of the function as section ``name``."""
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Span(self, name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _enter(self):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            local.spans = []
+            local.started_at = time.time()
+        local.depth = depth + 1
+
+    def _exit(self, name, seconds):
+        local = self._local
+        local.depth -= 1
+        local.spans.append((name, seconds))
+        self.record(name, seconds)
+        if local.depth == 0:
+            self._finish_rerun(name, local.started_at, local.spans)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._sections.get(name)
+            if stats is None:
+                stats = self._sections[name] = SectionStats(self.window)
+            stats.add(seconds)
+
+    def _finish_rerun(self, root, started_at, spans):
+        if self.log_path:
+            line = json.dumps({
+                "time": round(started_at, 3),
+                "rerun": root,
+                "spans": [{"section": name, "ms": round(seconds * 1000, 3)} for name, seconds in spans],
+            }, ensure_ascii=False)
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+
+    def summary(self):
+        """Per-section count, lifetime mean and rolling p50/p95/p99, in milliseconds."""
+        with self._lock:
+            sections = {name: (stats.count, stats.total, stats.window().copy())
+                        for name, stats in self._sections.items()}
+        rows = []
+        for name, (count, total, window) in sorted(sections.items()):
+            p50, p95, p99 = np.quantile(window, QUANTILES) * 1000
+            rows.append({
+                "section": name,
+                "count": count,
+                "mean_ms": total / count * 1000,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+            })
+        return rows
+
+    def prometheus_text(self):
+        """The section latencies in the Prometheus text exposition format (a summary metric)."""
+        with self._lock:
+            sections = {name: (stats.count, stats.total, stats.window().copy())
+                        for name, stats in self._sections.items()}
+        lines = [
+            f"# HELP cececo_section_seconds App section latency; quantiles over the last {self.window} runs.",
+            "# TYPE cececo_section_seconds summary",
+        ]
+        for name, (count, total, window) in sorted(sections.items()):
+            label = f'section="{_escape(name)}"'
+            for quantile, value in zip(QUANTILES, np.quantile(window, QUANTILES)):
+                lines.append(f'cececo_section_seconds{{{label},quantile="{quantile}"}} {value:.6g}')
+            lines.append(f"cececo_section_seconds_sum{{{label}}} {total:.6g}")
+            lines.append(f"cececo_section_seconds_count{{{label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write ``prometheus_text()`` to ``path``, replacing it atomically."""
+        staging = f"{path}.{uuid.uuid4().hex}"
+        with open(staging, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(staging, path)
+
+    def reset(self):
+        with self._lock:
+            self._sections.clear()
+
+
+profiler = Profiler(
+    enabled=os.environ.get("CECECO_PROFILE", "") not in ("", "0"),
+    prometheus_path=os.environ.get("CECECO_METRICS_PROM") or None,
+    log_path=os.environ.get("CECECO_METRICS_LOG") or None,
+)
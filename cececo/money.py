@@ -0,0 +1,192 @@
+"""FX and inflation normalization of catalog money amounts.
+
+Catalog amounts are nominal: a project's ``investment`` is in US dollars of
+its project year and its cash flows in dollars of each operating year (the
+first reported year following the project year). To compare projects from
+different years and countries, amounts are restated in a ``Basis``: either
+constant prices of a base year (deflated with the basis currency's CPI) or
+nominal, and in US dollars or a local currency (converted at the flow
+year's average rate).
+
+The lookup tables live in a directory with two CSV files. Each has a
+``year`` column and one column per currency code, and lines starting with
+``#`` are comments:
+
+- ``fx.csv``: local currency units per US dollar, annual averages;
+- ``cpi.csv``: consumer price index of each currency area.
+
+``MoneyTables`` holds them as (year x currency) arrays. ``normalize_catalog``
+restates every project's investment and cash flows in one vectorized pass,
+and the engine memoizes the result per catalog, tables version and basis.
+Years outside the tables use the nearest year in them.
+"""
+
+import csv
+import math
+import os
+from functools import cached_property
+from typing import NamedTuple
+
+import numpy as np
+
+from cececo.conditions import CURRENT_YEAR
+from cececo.projection import parse_investment
+
+FX_FILE = "fx.csv"
+CPI_FILE = "cpi.csv"
+REPORTING_CURRENCY = "USD"
+
+
+class Basis(NamedTuple):
+    """Currency and price basis money amounts are stated in."""
+    currency: str = REPORTING_CURRENCY
+    # Constant prices of ``base_year`` when True, otherwise nominal
+    real: bool = True
+    base_year: int = CURRENT_YEAR
+
+    @property
+    def label(self):
+        return f"constant {self.base_year} {self.currency}" if self.real else f"nominal {self.currency}"
+
+    @property
+    def unit(self):
+        """Axis label for amounts in millions, e.g. "Million TRY, 2024 prices"."""
+        return f"Million {self.currency}, {self.base_year} prices" if self.real else f"Million {self.currency}, nominal"
+
+
+NOMINAL_USD = Basis(real=False)
+
+
+def _read_table(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(line for line in f if line.strip() and not line.startswith("#")))
+    header, rows = rows[0], rows[1:]
+    if header[0] != "year":
+        raise ValueError(f"{path} must start with a 'year' column")
+    years = np.array([int(row[0]) for row in rows], dtype=np.int32)
+    values = np.array([[float(value) if value else np.nan for value in row[1:]] for row in rows])
+    return years, tuple(header[1:]), values
+
+
+def tables_version(path):
+    """(mtime_ns, size) of both table files, or None if either is missing."""
+    try:
+        return tuple((stat.st_mtime_ns, stat.st_size)
+                     for stat in (os.stat(os.path.join(path, name)) for name in (FX_FILE, CPI_FILE)))
+    except FileNotFoundError:
+        return None
+
+
+def load_tables(path):
+    """``MoneyTables`` from the ``fx.csv`` and ``cpi.csv`` in ``path``."""
+    version = tables_version(path)
+    fx_years, fx_currencies, fx = _read_table(os.path.join(path, FX_FILE))
+    cpi_years, cpi_currencies, cpi = _read_table(os.path.join(path, CPI_FILE))
+    if not np.array_equal(fx_years, cpi_years) or np.any(np.diff(fx_years) != 1):
+        raise ValueError(f"{path}: fx.csv and cpi.csv must cover the same consecutive years")
+    if fx_currencies != cpi_currencies:
+        raise ValueError(f"{path}: fx.csv and cpi.csv must have the same currency columns")
+    return MoneyTables(fx_years, fx_currencies, fx, cpi, version)
+
+
+class MoneyTables:
+    """Year x currency FX rates (units per USD) and price indices."""
+
+    def __init__(self, years, currencies, fx, cpi, version=None):
+        self.years = np.asarray(years, dtype=np.int32)
+        self.currencies = tuple(currencies)
+        self.fx = np.asarray(fx, dtype=np.float64)
+        self.cpi = np.asarray(cpi, dtype=np.float64)
+        self.version = version
+        self._column = {currency: i for i, currency in enumerate(self.currencies)}
+
+    def __contains__(self, currency):
+        return currency in self._column
+
+    def _rows(self, years):
+        return np.clip(np.asarray(years) - self.years[0], 0, len(self.years) - 1)
+
+    def column(self, currency):
+        try:
+            return self._column[currency]
+        except KeyError:
+            raise ValueError(f"No FX and CPI tables for currency {currency!r}") from None
+
+    def rate(self, year, currency):
+        """Units of ``currency`` per US dollar in ``year``."""
+        return float(self.fx[self._rows(year), self.column(currency)])
+
+    def factors(self, years, basis):
+        """Multipliers from nominal USD of ``years`` (any array shape) to ``basis``."""
+        rows = self._rows(years)
+        column = self.column(basis.currency)
+        factors = self.fx[rows, column]
+        if basis.real:
+            cpi = self.cpi[:, column]
+            factors = factors * (cpi[self._rows(basis.base_year)] / cpi[rows])
+        return factors
+
+
+class NormalizedCatalog:
+    """Investment and cash flows of every catalog project restated in one ``Basis``.
+
+    Arrays follow the catalog's project order; cash flows are (project x
+    year x field) like ``ProjectCatalog.cash_flows``.
+    """
+
+    def __init__(self, catalog, basis, investment, cash_flows, project_factor, current_factor=1.0):
+        self.catalog = catalog
+        self.basis = basis
+        self.investment = investment
+        self.cash_flows = cash_flows
+        # Basis value of one nominal USD of each project's year, and of the current year
+        self.project_factor = project_factor
+        self.current_factor = current_factor
+
+    def cash_flow(self, country, project_name):
+        """(years x field) restated cash flows of one project, or None."""
+        i = self.catalog.index.get((country, project_name))
+        if i is None:
+            return None
+        return self.cash_flows[i, :self.catalog.n_years[i]]
+
+    @cached_property
+    def totals(self):
+        """(project x field) sums of the restated cash flows over each project's years."""
+        return np.nansum(self.cash_flows, axis=1)
+
+    def cash_flow_totals(self, country, project_name):
+        """(revenue, cost, profit) totals of one project's restated cash flows, or None."""
+        i = self.catalog.index.get((country, project_name))
+        return None if i is None else tuple(float(total) for total in self.totals[i])
+
+    def project_investment(self, country, project_name):
+        i = self.catalog.index.get((country, project_name))
+        return math.nan if i is None else float(self.investment[i])
+
+    def price_ratio(self, country, project_name):
+        """Basis value of a current-year dollar over that of a project-year dollar."""
+        i = self.catalog.index.get((country, project_name))
+        return 1.0 if i is None else float(self.current_factor / self.project_factor[i])
+
+
+def _parse_investment(text):
+    try:
+        return parse_investment(text)
+    except ValueError:
+        return math.nan
+
+
+def normalize_catalog(catalog, tables, basis):
+    """``NormalizedCatalog`` of ``catalog`` in ``basis``; nominal USD shares the catalog's arrays."""
+    investment = np.array([_parse_investment(record.get("investment")) for record in catalog.records])
+    if basis.currency == REPORTING_CURRENCY and not basis.real:
+        return NormalizedCatalog(catalog, basis, investment, catalog.cash_flows, np.ones(len(catalog)))
+    project_factor = tables.factors(catalog.years, basis)
+    # Reported year n is the n-th year after the project year
+    flow_years = catalog.years[:, None] + np.arange(1, catalog.cash_flows.shape[1] + 1)
+    cash_flows = catalog.cash_flows * tables.factors(flow_years, basis)[:, :, None]
+    return NormalizedCatalog(
+        catalog, basis, investment * project_factor, cash_flows, project_factor,
+        float(tables.factors(CURRENT_YEAR, basis))
+    )
@@ -0,0 +1,281 @@
+"""Multi-agent pipeline runner.
+
+The agents of the AI Simulation tab form a small dependency DAG. A
+``PipelineRunner`` executes it on a background asyncio loop, running
+independent agents concurrently, and exposes each run's progress through a
+thread-safe ``PipelineRun`` that the UI can poll without blocking. Finished
+runs are cached per key so revisiting a selection returns instantly.
+"""
+
+import asyncio
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+COMPLETE = "complete"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class AgentStep:
+    agent: str
+    action: str
+    # Called as run(context, dependency_results) on a worker thread
+    run: Callable[[Dict[str, Any], Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+# Mock agents. Each receives the run context and the results of the agents it
+# depends on; they stand in for the real LLM-backed agents, which ask the
+# model through the context's "agent_client" (a cececo.agents.AgentClient).
+def _research(context, deps):
+    project = context.get("source_project") or {}
+    return {
+        "regulatory_events": list(project.get("regulatory_evolution", [])),
+        "gazette_events": list(context.get("gazette_events") or []),
+        "current_conditions": dict(context.get("current_conditions") or {}),
+    }
+
+
+def _parse(context, deps):
+    project = context.get("source_project") or {}
+    then = dict(project.get("then_conditions", {}))
+    now = deps["Researcher Agent"]["current_conditions"]
+    return {
+        "then": then,
+        "now": now,
+        "shared_factors": [factor for factor in then if factor in now],
+    }
+
+
+def _build_graph(context, deps):
+    project = context.get("source_project") or {}
+    project_name = context.get("source_project_name")
+    graph = context.get("knowledge_graph")
+    edges = []
+    if project:
+        edges.append((context.get("source_country"), project.get("region")))
+        edges.append((project.get("region"), project_name))
+        for event in deps["Researcher Agent"]["regulatory_events"]:
+            edges.append((project_name, event["event"]))
+    for event in deps["Researcher Agent"]["gazette_events"]:
+        edges.append((event.get("country"), event["event"]))
+    result = {"edges": edges}
+    if graph is not None:
+        source = graph.node_id(("project", context.get("source_country"), project_name))
+        target = graph.node_id(("country", context.get("selected_country")))
+        path = graph.shortest_path(source, target) if source is not None and target is not None else None
+        result.update(
+            nodes=len(graph),
+            graph_edges=graph.n_edges,
+            path=[graph.describe(node) for node in path or ()],
+            precedents=graph.preceding_regulations(context.get("selected_country")),
+        )
+    return result
+
+
+def _analyze_gaps(context, deps):
+    parsed = deps["Data Parser"]
+    missing = [factor for factor in parsed["then"] if factor not in parsed["now"]]
+    return {"missing_factors": missing, "shared_factors": parsed["shared_factors"]}
+
+
+def _score_similarity(context, deps):
+    # The context's "similarity" is the SimilarityMatrix score of the pair
+    score = context.get("similarity")
+    return {
+        component: math.nan if score is None else getattr(score, component)
+        for component in ("regulatory", "economic", "geographic")
+    }
+
+
+# Condition factors a policy transfer can change, as swept by cececo.sensitivity
+POLICY_FACTORS = ("Tax Incentive", "YEKDEM Incentive")
+
+
+def _expected_impact(sensitivity):
+    """Median ROI gain, in percentage points, from the best policy lever at the end of its range."""
+    if sensitivity is None:
+        return None
+    gains = [
+        max(row["at_low"], row["at_high"]) - sensitivity.base["roi"]
+        for row in sensitivity.tornado("roi") if row["factor"] in POLICY_FACTORS
+    ]
+    return round(max(gains), 1) if gains else None
+
+
+POLICY_PROMPT = (
+    "Recommend one policy change that would let the source project be replicated in the target country, "
+    "given the regulatory factors the target lacks. Answer in one short sentence."
+)
+
+
+def _transfer_policy(context, deps):
+    gaps = deps["Gap Analysis Agent"]["missing_factors"]
+    recommendation = "Implement adapted feed-in tariff system"
+    # With a model client in the context the recommendation comes from the model
+    client = context.get("agent_client")
+    if client is not None:
+        recommendation = client.call("Policy Transfer Agent", POLICY_PROMPT, {
+            "source_country": context.get("source_country"),
+            "source_project": context.get("source_project_name"),
+            "target_country": context.get("selected_country"),
+            "energy_type": context.get("energy_type"),
+            "missing_factors": gaps,
+        })["text"]
+    return {
+        "policy_gap": "Missing equivalent incentive program" if gaps else "No major policy gap",
+        "recommendation": recommendation,
+        "expected_impact": _expected_impact(context.get("sensitivity")),
+    }
+
+
+AGENT_STEPS = (
+    AgentStep("Researcher Agent", "Scanning Official Gazettes", _research),
+    AgentStep("Data Parser", "Extracting regulatory data", _parse, ("Researcher Agent",)),
+    AgentStep("Knowledge Graph Builder", "Building relationship graph", _build_graph,
+              ("Researcher Agent", "Data Parser")),
+    AgentStep("Gap Analysis Agent", "Comparing regulations", _analyze_gaps, ("Data Parser",)),
+    AgentStep("Similarity Engine", "Calculating cosine similarity", _score_similarity, ("Data Parser",)),
+    AgentStep("Policy Transfer Agent", "Simulating policy transfer", _transfer_policy,
+              ("Knowledge Graph Builder", "Gap Analysis Agent", "Similarity Engine")),
+)
+
+
+def _topological_order(steps):
+    by_name = {step.agent: step for step in steps}
+    if len(by_name) != len(steps):
+        raise ValueError("Agent names in a pipeline must be unique")
+    ordered, visiting, visited = [], set(), set()
+
+    def visit(step):
+        if step.agent in visited:
+            return
+        if step.agent in visiting:
+            raise ValueError(f"Dependency cycle through agent '{step.agent}'")
+        visiting.add(step.agent)
+        for dependency in step.depends_on:
+            if dependency not in by_name:
+                raise ValueError(f"Agent '{step.agent}' depends on unknown agent '{dependency}'")
+            visit(by_name[dependency])
+        visiting.discard(step.agent)
+        visited.add(step.agent)
+        ordered.append(step)
+
+    for step in steps:
+        visit(step)
+    return tuple(ordered)
+
+
+class PipelineRun:
+    """Progress and results of one pipeline execution, safe to read from any thread."""
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.results: Dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+        self._status = {step.agent: PENDING for step in steps}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _update(self, agent, status, result=None):
+        with self._lock:
+            self._status[agent] = status
+            if status == COMPLETE:
+                self.results[agent] = result
+
+    def _finish(self, error=None):
+        self.error = error
+        self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    @property
+    def status(self):
+        with self._lock:
+            return dict(self._status)
+
+    @property
+    def progress(self):
+        status = self.status
+        return sum(state == COMPLETE for state in status.values()) / len(status)
+
+    def active_steps(self):
+        status = self.status
+        return [step for step in self.steps if status[step.agent] == IN_PROGRESS]
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+
+class PipelineRunner:
+    """Runs agent DAGs on a daemon asyncio loop and caches finished runs per key."""
+
+    def __init__(self, steps=AGENT_STEPS, simulated_latency=0.0, max_cached_runs=256):
+        self.steps = _topological_order(tuple(steps))
+        self.simulated_latency = simulated_latency
+        self.max_cached_runs = max_cached_runs
+        self._runs: "OrderedDict[Hashable, PipelineRun]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="cececo-pipeline", daemon=True)
+        self._thread.start()
+
+    def submit(self, key: Hashable, context: Dict[str, Any]) -> PipelineRun:
+        """Return the cached or in-flight run for ``key``, starting one if needed."""
+        with self._lock:
+            run = self._runs.get(key)
+            if run is not None and not run.failed:
+                self._runs.move_to_end(key)
+                return run
+            run = PipelineRun(self.steps)
+            self._runs[key] = run
+            self._evict()
+        asyncio.run_coroutine_threadsafe(self._execute(run, context), self._loop)
+        return run
+
+    def _evict(self):
+        finished = [key for key, run in self._runs.items() if run.done]
+        for key in finished[:max(0, len(self._runs) - self.max_cached_runs)]:
+            del self._runs[key]
+
+    async def _execute(self, run, context):
+        tasks = {}
+
+        async def run_step(step):
+            dependency_results = await asyncio.gather(*(tasks[name] for name in step.depends_on))
+            run._update(step.agent, IN_PROGRESS)
+            try:
+                if self.simulated_latency:
+                    await asyncio.sleep(self.simulated_latency)
+                result = await asyncio.to_thread(step.run, context, dict(zip(step.depends_on, dependency_results)))
+            except BaseException:
+                run._update(step.agent, FAILED)
+                raise
+            run._update(step.agent, COMPLETE, result)
+            return result
+
+        for step in self.steps:
+            tasks[step.agent] = asyncio.ensure_future(run_step(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception as exc:
+            for task in tasks.values():
+                task.cancel()
+            run._finish(exc)
+        else:
+            run._finish()
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=1)
@@ -0,0 +1,384 @@
+"""Budget-constrained selection of project transfers.
+
+Usage::
+
+    python -m cececo.portfolio --budget 1500 --energy-type "Wind Energy"
+    python -m cececo.portfolio --candidates results.parquet --budget 5000 --output portfolio.csv
+
+A candidate is one source project built again at one target site (a
+country or one of its regions). It costs the project's ``investment``
+(in constant current-year dollars, see ``cececo.money``) and is expected
+to earn its projected median ROI on that. ``optimize`` chooses
+the set of candidates with the largest expected return that:
+
+- fits the capital budget;
+- builds each source project at most once per target country (the
+  country's regions are alternatives);
+- keeps any one country's share of the budget under a limit;
+- uses only candidates whose transferability similarity and probability
+  of a negative NPV are within the risk limits.
+
+This is a 0/1 knapsack with side constraints. With SciPy installed it is
+solved as a MILP (HiGHS), and the greedy solution below is kept if the
+solver times out with something worse. Without SciPy, and for
+``method="greedy"``, candidates are added by expected return per dollar.
+The result is then repaired: it is compared against starting from the
+best single candidate, and one-for-one swaps that raise the return are
+applied until none is left. Both the ranking and the swap search are
+vectorized, so thousands of candidates take milliseconds.
+
+Candidates come from ``cececo.engine.portfolio_candidates`` or from the
+rows written by ``cececo.batch``.
+"""
+
+import argparse
+import csv
+import math
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+METHODS = ("auto", "greedy", "milp")
+# Improving swaps tried after the greedy fill
+MAX_SWAPS = 200
+
+
+class Candidates:
+    """Candidate transfers as parallel arrays.
+
+    ``keys`` are (source_country, source_project, target_country,
+    target_region) tuples; costs are in millions of USD and ROI in percent.
+    """
+
+    def __init__(self, keys, cost, roi_p10, roi_p50, loss_probability, similarity):
+        self.keys = list(keys)
+        self.cost = np.asarray(cost, dtype=np.float64)
+        self.roi_p10 = np.asarray(roi_p10, dtype=np.float64)
+        self.roi_p50 = np.asarray(roi_p50, dtype=np.float64)
+        self.loss_probability = np.asarray(loss_probability, dtype=np.float64)
+        self.similarity = np.asarray(similarity, dtype=np.float64)
+        self.expected_return = self.cost * self.roi_p50 / 100.0
+        self.countries, country = np.unique([key[2] for key in self.keys], return_inverse=True)
+        self.country = country.astype(np.int32)
+        groups = {}
+        self.group = np.array([groups.setdefault(key[:3], len(groups)) for key in self.keys], dtype=np.int32)
+        self.n_groups = len(groups)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Candidates from ``cececo.batch`` rows plus an ``investment`` column in millions of USD.
+
+        Rows without a projected ROI are skipped. A region of "" (as read
+        back from CSV) is the country as a whole.
+        """
+        keys, cost, roi_p10, roi_p50, loss, similarity = [], [], [], [], [], []
+        for row in rows:
+            p50 = _number(row.get("roi_p50"))
+            if math.isnan(p50):
+                continue
+            keys.append((row["source_country"], row["source_project"], row["target_country"],
+                         row.get("target_region") or None))
+            cost.append(_number(row["investment"]))
+            roi_p10.append(_number(row.get("roi_p10")))
+            roi_p50.append(p50)
+            loss.append(1.0 - _number(row.get("prob_npv_positive")))
+            similarity.append(_number(row.get("similarity_overall")))
+        return cls(keys, cost, roi_p10, roi_p50, loss, similarity)
+
+    def eligible(self, budget, min_similarity=0.0, max_loss_probability=1.0, max_country_cost=math.inf):
+        """Mask of candidates that pass the risk limits and fit the budget on their own."""
+        with np.errstate(invalid="ignore"):
+            return (
+                (self.cost > 0)
+                & (self.expected_return > 0)
+                & (self.cost <= min(budget, max_country_cost))
+                & (self.similarity >= min_similarity)
+                & (self.loss_probability <= max_loss_probability)
+            )
+
+
+def _number(value):
+    if value is None or value == "":
+        return math.nan
+    return float(value)
+
+
+@dataclass(frozen=True, eq=False)
+class Portfolio:
+    candidates: Candidates
+    # Indices of the chosen candidates
+    chosen: np.ndarray
+    budget: float
+    method: str
+    seconds: float
+
+    @property
+    def cost(self):
+        return float(self.candidates.cost[self.chosen].sum())
+
+    @property
+    def expected_return(self):
+        return float(self.candidates.expected_return[self.chosen].sum())
+
+    @property
+    def roi(self):
+        """Expected return over the capital deployed, in percent."""
+        cost = self.cost
+        return self.expected_return / cost * 100.0 if cost else math.nan
+
+    def transfers(self):
+        """One dict per chosen transfer, highest expected return first."""
+        c = self.candidates
+        order = self.chosen[np.argsort(-c.expected_return[self.chosen], kind="stable")]
+        return [
+            {
+                "source_country": c.keys[i][0],
+                "source_project": c.keys[i][1],
+                "target_country": c.keys[i][2],
+                "target_region": c.keys[i][3],
+                "investment": float(c.cost[i]),
+                "expected_return": float(c.expected_return[i]),
+                "roi_p50": float(c.roi_p50[i]),
+                "roi_p10": float(c.roi_p10[i]),
+                "loss_probability": float(c.loss_probability[i]),
+                "similarity": float(c.similarity[i]),
+            }
+            for i in order
+        ]
+
+    def country_totals(self):
+        """Transfers, investment, expected return and budget share per target country."""
+        c = self.candidates
+        n = len(c.countries)
+        country = c.country[self.chosen]
+        count = np.bincount(country, minlength=n)
+        cost = np.bincount(country, c.cost[self.chosen], minlength=n)
+        value = np.bincount(country, c.expected_return[self.chosen], minlength=n)
+        return [
+            {
+                "country": str(c.countries[k]),
+                "transfers": int(count[k]),
+                "investment": float(cost[k]),
+                "expected_return": float(value[k]),
+                "roi": float(value[k] / cost[k] * 100.0),
+                "budget_share": float(cost[k] / self.budget) if self.budget else math.nan,
+            }
+            for k in np.argsort(-cost, kind="stable")
+            if count[k]
+        ]
+
+
+class _Selection:
+    """Chosen set with the budget, per-country spend and used groups it consumes."""
+
+    def __init__(self, candidates, budget, max_country_cost):
+        self.c = candidates
+        self.budget = budget
+        self.max_country_cost = max_country_cost
+        self.spent = 0.0
+        self.country_spent = np.zeros(len(candidates.countries))
+        self.group_used = np.zeros(candidates.n_groups, dtype=bool)
+        self.member = np.zeros(len(candidates), dtype=bool)
+
+    def fits(self, i):
+        c = self.c
+        # A small tolerance keeps exact fills from failing on rounding
+        return (not self.group_used[c.group[i]]
+                and self.spent + c.cost[i] <= self.budget * (1 + 1e-12)
+                and self.country_spent[c.country[i]] + c.cost[i] <= self.max_country_cost * (1 + 1e-12))
+
+    def add(self, i):
+        c = self.c
+        self.spent += c.cost[i]
+        self.country_spent[c.country[i]] += c.cost[i]
+        self.group_used[c.group[i]] = True
+        self.member[i] = True
+
+    def remove(self, i):
+        c = self.c
+        self.spent -= c.cost[i]
+        self.country_spent[c.country[i]] -= c.cost[i]
+        self.group_used[c.group[i]] = False
+        self.member[i] = False
+
+    def fill(self, order):
+        """Add candidates in ``order`` while they fit."""
+        smallest = self.c.cost[order].min() if len(order) else math.inf
+        for i in order:
+            if self.budget - self.spent < smallest:
+                break
+            if not self.member[i] and self.fits(i):
+                self.add(i)
+
+    def value(self):
+        return float(self.c.expected_return[self.member].sum())
+
+    def best_swap(self, eligible):
+        """(out, in) swap that raises the return the most, or None."""
+        c = self.c
+        best, best_gain = None, 0.0
+        for i in np.flatnonzero(self.member):
+            # Resources left if i were dropped
+            budget_room = self.budget - self.spent + c.cost[i]
+            country_room = self.max_country_cost - self.country_spent
+            country_room[c.country[i]] += c.cost[i]
+            group_free = ~self.group_used
+            group_free[c.group[i]] = True
+            fits = (eligible & ~self.member & group_free[c.group]
+                    & (c.cost <= budget_room * (1 + 1e-12))
+                    & (c.cost <= country_room[c.country] * (1 + 1e-12)))
+            if not fits.any():
+                continue
+            gains = np.where(fits, c.expected_return - c.expected_return[i], -np.inf)
+            j = int(np.argmax(gains))
+            if gains[j] > best_gain:
+                best, best_gain = (i, j), gains[j]
+        return best
+
+
+def _greedy(candidates, eligible, budget, max_country_cost, max_swaps=MAX_SWAPS):
+    c = candidates
+    order = np.flatnonzero(eligible)
+    order = order[np.argsort(-c.expected_return[order] / c.cost[order], kind="stable")]
+    selection = _Selection(c, budget, max_country_cost)
+    selection.fill(order)
+    if len(order):
+        # Ratio order can leave most of the budget idle behind one large,
+        # very profitable candidate; starting from that candidate covers it
+        alternative = _Selection(c, budget, max_country_cost)
+        alternative.add(order[np.argmax(c.expected_return[order])])
+        alternative.fill(order)
+        if alternative.value() > selection.value():
+            selection = alternative
+    for _ in range(max_swaps):
+        swap = selection.best_swap(eligible)
+        if swap is None:
+            break
+        selection.remove(swap[0])
+        selection.add(swap[1])
+        selection.fill(order)
+    return np.flatnonzero(selection.member)
+
+
+def _milp(candidates, eligible, budget, max_country_cost, time_limit):
+    """Exact selection with SciPy's MILP solver, or None when SciPy is missing or finds nothing."""
+    try:
+        from scipy.optimize import Bounds, LinearConstraint, milp
+        from scipy.sparse import coo_array
+    except ImportError:
+        return None
+    c = candidates
+    index = np.flatnonzero(eligible)
+    m = len(index)
+    if not m:
+        return index
+    countries, country_row = np.unique(c.country[index], return_inverse=True)
+    groups, group_row = np.unique(c.group[index], return_inverse=True)
+    columns = np.arange(m)
+    # Row 0 is the budget, then one row per country and one per group
+    rows = np.concatenate([np.zeros(m, dtype=np.int64), 1 + country_row, 1 + len(countries) + group_row])
+    data = np.concatenate([c.cost[index], c.cost[index], np.ones(m)])
+    matrix = coo_array((data, (rows, np.tile(columns, 3))), shape=(1 + len(countries) + len(groups), m)).tocsr()
+    upper = np.concatenate([[budget], np.full(len(countries), min(max_country_cost, budget)), np.ones(len(groups))])
+    result = milp(
+        -c.expected_return[index],
+        integrality=np.ones(m),
+        bounds=Bounds(0, 1),
+        constraints=LinearConstraint(matrix, -np.inf, upper),
+        options={"time_limit": time_limit},
+    )
+    if result.x is None:
+        return None
+    return index[result.x > 0.5]
+
+
+def optimize(candidates, budget, min_similarity=0.0, max_loss_probability=1.0, max_country_share=1.0,
+             method="auto", time_limit=10.0):
+    """The ``Portfolio`` with the largest expected return within the budget and risk limits.
+
+    ``min_similarity`` is in percent, ``max_loss_probability`` the largest
+    accepted probability of a negative NPV per transfer and
+    ``max_country_share`` the largest share of the budget in one target
+    country. ``method`` is "greedy", "milp" (requires SciPy) or "auto"
+    (MILP when SciPy is installed, kept only if it beats the greedy
+    solution).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}")
+    started = time.perf_counter()
+    max_country_cost = budget * max_country_share
+    eligible = candidates.eligible(budget, min_similarity, max_loss_probability, max_country_cost)
+    chosen = used = None
+    if method != "greedy":
+        chosen = _milp(candidates, eligible, budget, max_country_cost, time_limit)
+        if chosen is None and method == "milp":
+            raise RuntimeError("The MILP method requires SciPy 1.9 or later")
+        used = "milp"
+    if method != "milp":
+        greedy = _greedy(candidates, eligible, budget, max_country_cost)
+        if chosen is None or candidates.expected_return[greedy].sum() > candidates.expected_return[chosen].sum():
+            chosen, used = greedy, "greedy"
+    return Portfolio(candidates, np.sort(chosen), float(budget), used, time.perf_counter() - started)
+
+
+def _read_rows(path):
+    if str(path).endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Reading Parquet requires pyarrow; install it or pass a .csv file") from None
+        return pq.read_table(path).to_pylist()
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Choose the project transfers to fund within a capital budget.")
+    parser.add_argument("--budget", type=float, required=True, help="capital budget in millions of USD")
+    parser.add_argument("--candidates", help="cececo.batch output (.csv or .parquet); default: score the catalog")
+    parser.add_argument("--energy-type", default=None, help="energy type when scoring the catalog")
+    parser.add_argument("--min-similarity", type=float, default=0.0, help="minimum similarity in percent")
+    parser.add_argument("--max-loss", type=float, default=1.0, help="maximum probability of a negative NPV")
+    parser.add_argument("--max-country-share", type=float, default=1.0, help="maximum budget share per country")
+    parser.add_argument("--method", choices=METHODS, default="auto")
+    parser.add_argument("--output", "-o", help="write the chosen transfers to this CSV file")
+    args = parser.parse_args(argv)
+
+    from cececo import engine
+
+    if args.candidates:
+        # Investments in the projections' basis, like the ROI in the rows
+        normalized = engine.get_normalized_catalog(engine.PROJECTION_BASIS)
+        rows = _read_rows(args.candidates)
+        if args.energy_type:
+            rows = [row for row in rows if row.get("energy_type") == args.energy_type]
+        for row in rows:
+            row["investment"] = normalized.project_investment(row["source_country"], row["source_project"])
+        candidates = Candidates.from_rows(rows)
+    else:
+        candidates = engine.portfolio_candidates(args.energy_type)
+    portfolio = optimize(candidates, args.budget, args.min_similarity, args.max_loss, args.max_country_share,
+                         args.method)
+
+    print(f"{len(portfolio.chosen)} of {len(candidates):,} transfers chosen by {portfolio.method} "
+          f"in {portfolio.seconds * 1000:.1f} ms: ${portfolio.cost:,.1f}M of ${portfolio.budget:,.1f}M, "
+          f"expected return ${portfolio.expected_return:,.1f}M ({portfolio.roi:.1f}%)")
+    for total in portfolio.country_totals():
+        print(f"  {total['country']:<14}{total['transfers']:>4} transfers  ${total['investment']:>10,.1f}M  "
+              f"return ${total['expected_return']:>9,.1f}M  {total['budget_share']:>6.1%} of budget")
+    if args.output:
+        transfers = portfolio.transfers()
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(transfers[0]) if transfers else ["source_country"])
+            writer.writeheader()
+            writer.writerows(transfers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""Monte Carlo projection of a source project's performance in a target country.
+
+A project's reported cash flows are re-run under the target country's
+current conditions: steel prices scale the capex, the tax-incentive
+schedule sets the tax paid per year, the interest rate is the discount
+rate, the local currency's historical drift erodes the FX-exposed share
+of revenue and the energy-yield ratio of the target site scales revenue.
+Revenue, cost, capex, discount-rate and FX uncertainty are sampled for
+every scenario at once as ``(paths x years)`` arrays, with the revenue
+spread widening as transferability similarity drops. ``run_projection``
+is seeded and memoized per inputs, so a rerun with the same selection
+returns the cached distributions.
+
+``simulate_scenarios`` runs many variants of one projection (differing
+only in ``SCENARIO_FIELDS``) as a single ``(years x scenarios x paths)``
+computation on common random numbers, so differences between scenarios
+come from their inputs rather than sampling noise.
+"""
+
+import re
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from cececo.catalog import COST, REVENUE
+from cececo.conditions import CURRENT_YEAR
+
+DEFAULT_PATHS = 100_000
+DEFAULT_LIFETIME_YEARS = 20
+
+# Share of capex driven by steel (towers, nacelles, foundations)
+STEEL_SHARE_OF_CAPEX = 0.35
+CORPORATE_TAX_RATE = 0.20
+# Share of revenue earned in local currency and exposed to depreciation
+REVENUE_FX_EXPOSURE = 0.5
+
+REVENUE_LEVEL_SIGMA = 0.05
+REVENUE_TRANSFER_SIGMA = 0.25
+REVENUE_YEAR_SIGMA = 0.05
+COST_SIGMA = 0.08
+CAPEX_SIGMA = 0.05
+DISCOUNT_RATE_SD = 0.02
+FX_DRIFT_SD = 0.05
+
+# ProjectionInputs fields that may differ between the scenarios of one batch
+SCENARIO_FIELDS = ("steel_ratio", "relief_years_now", "discount_rate", "fx_drift", "similarity", "yield_ratio")
+# Largest (years x scenarios x paths) array built at once by simulate_scenarios
+MAX_SCENARIO_ELEMENTS = 1 << 22
+
+_MONEY = re.compile(r"\$\s*(\d[\d,]*(?:\.\d+)?)\s*([MB])?", re.IGNORECASE)
+
+
+def parse_investment(text):
+    """Investment string such as ``"$180M"`` in millions of USD."""
+    match = _MONEY.search(text or "")
+    if not match:
+        raise ValueError(f"Unrecognized investment amount: {text!r}")
+    amount = float(match.group(1).replace(",", ""))
+    scale = {"M": 1.0, "B": 1000.0}.get((match.group(2) or "").upper(), 1e-6)
+    return amount * scale
+
+
+@dataclass(frozen=True)
+class ProjectionInputs:
+    """Hashable description of one projection; cash flows in millions of USD."""
+    revenues: Tuple[float, ...]
+    costs: Tuple[float, ...]
+    investment: float
+    base_roi: float
+    steel_ratio: float = 1.0
+    relief_years_then: float = 0.0
+    relief_years_now: float = 0.0
+    discount_rate: float = 0.10
+    fx_drift: float = 0.0
+    similarity: float = 100.0
+    # Target-site annual energy relative to the source project's site
+    yield_ratio: float = 1.0
+    lifetime_years: int = DEFAULT_LIFETIME_YEARS
+
+
+@dataclass(frozen=True, eq=False)
+class ProjectionResult:
+    npv: np.ndarray
+    irr: np.ndarray
+    roi: np.ndarray
+    # Cumulative net cash flow P10/P50/P90 per year, year 0 being the capex
+    fan_years: np.ndarray
+    fan: np.ndarray
+    # Percentiles by (metric, q); results are memoized and read on every rerun
+    _percentiles: dict = field(default_factory=dict, init=False, repr=False)
+
+    @property
+    def n_paths(self):
+        return len(self.npv)
+
+    def percentiles(self, metric, q=(10, 50, 90)):
+        """Percentiles of ``metric`` over the paths where it is defined (NaN if none), computed once per ``q``."""
+        key = (metric, tuple(q))
+        percentiles = self._percentiles.get(key)
+        if percentiles is None:
+            values = getattr(self, metric)
+            values = values[np.isfinite(values)]
+            percentiles = (
+                tuple(np.nan for _ in q) if not len(values) else tuple(float(v) for v in np.percentile(values, q))
+            )
+            self._percentiles[key] = percentiles
+        return percentiles
+
+    def probability_positive_npv(self):
+        return float(np.mean(self.npv > 0))
+
+
+def _lognormal(rng, sigma, size):
+    # Mean-one multiplicative shocks
+    return np.exp(rng.normal(-0.5 * sigma ** 2, sigma, size))
+
+
+def _extend(values, lifetime_years):
+    # Years past the reported history repeat the last reported year
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) >= lifetime_years:
+        return values
+    return np.concatenate([values, np.repeat(values[-1], lifetime_years - len(values))])
+
+
+def _after_tax(pretax, relief_years, years):
+    relief = np.clip(relief_years - (years - 1), 0.0, 1.0)
+    return pretax - CORPORATE_TAX_RATE * np.maximum(pretax, 0.0) * (1.0 - relief)
+
+
+def _present_value(cash, x):
+    """Sum over t of cash[t] * x**(t+1) by Horner's rule.
+
+    ``cash`` is (years x ...) so each step reads one contiguous row.
+    """
+    value = np.zeros(cash.shape[1:])
+    for row in cash[::-1]:
+        value *= x
+        value += row
+    return value * x
+
+
+def _irr(capex, cash, iterations=32):
+    """Per-path IRR by bisection on log(1 / (1 + irr)) over (-90%, 1000%).
+
+    Paths whose cash flows never pay back the capex at any rate in range
+    (no sign change) get NaN.
+    """
+    lo = np.full(len(capex), np.log(1 / 11.0))
+    hi = np.full(len(capex), np.log(1 / 0.1))
+    # The present value grows with x when the flows are net positive
+    rising = _present_value(cash, np.exp(hi)) > capex
+    bracketed = rising & (_present_value(cash, np.exp(lo)) < capex)
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        above = _present_value(cash, np.exp(mid)) > capex
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+    return np.where(bracketed, np.exp(-0.5 * (lo + hi)) - 1.0, np.nan)
+
+
+def simulate_projection(inputs: ProjectionInputs, n_paths=DEFAULT_PATHS, seed=0) -> ProjectionResult:
+    rng = np.random.default_rng(seed)
+    reported = len(inputs.revenues)
+    base_revenue = _extend(inputs.revenues, inputs.lifetime_years)[:, None] * inputs.yield_ratio
+    base_cost = _extend(inputs.costs, inputs.lifetime_years)[:, None]
+    years = np.arange(1, len(base_revenue) + 1, dtype=np.float64)[:, None]
+    # Arrays are (years x paths) so per-year operations stay contiguous
+    size = (len(years), n_paths)
+
+    # Lower similarity means less confidence the source's revenue carries over
+    transfer_gap = 1.0 - np.clip(inputs.similarity, 0.0, 100.0) / 100.0
+    level_sigma = REVENUE_LEVEL_SIGMA + REVENUE_TRANSFER_SIGMA * transfer_gap
+    revenue = base_revenue * _lognormal(rng, level_sigma, n_paths) * _lognormal(rng, REVENUE_YEAR_SIGMA, size)
+    fx_drift = np.maximum(rng.normal(inputs.fx_drift, FX_DRIFT_SD, n_paths), -0.5)
+    revenue *= 1.0 - REVENUE_FX_EXPOSURE + REVENUE_FX_EXPOSURE * np.exp(-years * np.log1p(fx_drift))
+    cost = base_cost * _lognormal(rng, COST_SIGMA, n_paths)
+    cash = _after_tax(revenue - cost, inputs.relief_years_now, years)
+
+    capex_multiplier = 1.0 + STEEL_SHARE_OF_CAPEX * (inputs.steel_ratio - 1.0)
+    capex = inputs.investment * capex_multiplier * _lognormal(rng, CAPEX_SIGMA, n_paths)
+    discount_rate = np.maximum(rng.normal(inputs.discount_rate, DISCOUNT_RATE_SD, n_paths), 0.0)
+
+    npv = _present_value(cash, 1.0 / (1.0 + discount_rate)) - capex
+    irr = _irr(capex, cash)
+
+    # ROI is anchored to the reported ROI over the reported years
+    base_cash = _after_tax(np.subtract(inputs.revenues, inputs.costs), inputs.relief_years_then, years[:reported, 0])
+    roi = inputs.base_roi * (cash[:reported].sum(axis=0) / base_cash.sum()) * (inputs.investment / capex)
+
+    cumulative = np.concatenate([-capex[None, :], cash]).cumsum(axis=0)
+    fan = np.percentile(cumulative, (10, 50, 90), axis=1)
+    return ProjectionResult(npv, irr * 100.0, roi, np.arange(len(years) + 1), fan)
+
+
+@dataclass(frozen=True, eq=False)
+class ScenarioResult:
+    """NPV and ROI per (scenario x path), every scenario on the same random draws."""
+    npv: np.ndarray
+    roi: np.ndarray
+
+    @property
+    def n_paths(self):
+        return self.npv.shape[1]
+
+    def percentiles(self, metric, q=50):
+        """Percentile(s) of ``metric`` per scenario, over the paths where it is defined."""
+        with np.errstate(invalid="ignore"):
+            return np.nanpercentile(getattr(self, metric), q, axis=1)
+
+    def probability_positive_npv(self):
+        return np.mean(self.npv > 0, axis=1)
+
+
+def simulate_scenarios(scenarios, n_paths=DEFAULT_PATHS, seed=0, max_elements=MAX_SCENARIO_ELEMENTS):
+    """NPV and ROI of every ``ProjectionInputs`` in ``scenarios`` as one array computation.
+
+    The scenarios may differ only in ``SCENARIO_FIELDS``. They share one
+    set of random draws, the same ``simulate_projection`` makes for the
+    seed, so a scenario equal to a memoized projection reproduces its NPV
+    and ROI paths. Scenarios are evaluated in blocks of at most
+    ``max_elements`` (years x scenarios x paths) values.
+    """
+    base = scenarios[0]
+    shared = [field.name for field in fields(ProjectionInputs) if field.name not in SCENARIO_FIELDS]
+    for inputs in scenarios[1:]:
+        for name in shared:
+            if getattr(inputs, name) != getattr(base, name):
+                raise ValueError(f"Scenarios must share {name!r}; only {', '.join(SCENARIO_FIELDS)} may differ")
+    steel_ratio, relief_now, discount_rate, fx_drift, similarity, yield_ratio = (
+        np.array([getattr(inputs, name) for inputs in scenarios], dtype=np.float64)[:, None]
+        for name in SCENARIO_FIELDS
+    )
+
+    # Draws in the order simulate_projection makes them; normal(loc, scale)
+    # is loc + scale * standard_normal, so per-scenario locations and
+    # scales apply to the standard draws afterwards
+    rng = np.random.default_rng(seed)
+    reported = len(base.revenues)
+    base_revenue = _extend(base.revenues, base.lifetime_years)[:, None, None]
+    base_cost = _extend(base.costs, base.lifetime_years)[:, None]
+    years = np.arange(1, len(base_revenue) + 1, dtype=np.float64)[:, None]
+    level_draw = rng.standard_normal(n_paths)
+    year_shock = _lognormal(rng, REVENUE_YEAR_SIGMA, (len(years), n_paths))[:, None, :]
+    fx_draw = rng.standard_normal(n_paths)
+    # Cost does not depend on the scenario
+    cost = (base_cost * _lognormal(rng, COST_SIGMA, n_paths))[:, None, :]
+    capex_shock = _lognormal(rng, CAPEX_SIGMA, n_paths)
+    discount_draw = rng.standard_normal(n_paths)
+    base_cash = _after_tax(np.subtract(base.revenues, base.costs), base.relief_years_then, years[:reported, 0])
+
+    npv = np.empty((len(scenarios), n_paths))
+    roi = np.empty((len(scenarios), n_paths))
+    block = max(1, max_elements // (len(years) * n_paths))
+    for start in range(0, len(scenarios), block):
+        part = slice(start, start + block)
+        # Arrays are (years x scenarios x paths) so per-year operations stay contiguous
+        transfer_gap = 1.0 - np.clip(similarity[part], 0.0, 100.0) / 100.0
+        level_sigma = REVENUE_LEVEL_SIGMA + REVENUE_TRANSFER_SIGMA * transfer_gap
+        level = np.exp(-0.5 * level_sigma ** 2 + level_sigma * level_draw)
+        revenue = base_revenue * yield_ratio[part] * level * year_shock
+        drift = np.maximum(fx_drift[part] + FX_DRIFT_SD * fx_draw, -0.5)
+        revenue *= 1.0 - REVENUE_FX_EXPOSURE + REVENUE_FX_EXPOSURE * np.exp(-years[:, :, None] * np.log1p(drift))
+        cash = _after_tax(revenue - cost, relief_now[part], years[:, :, None])
+
+        capex = base.investment * (1.0 + STEEL_SHARE_OF_CAPEX * (steel_ratio[part] - 1.0)) * capex_shock
+        discount = np.maximum(discount_rate[part] + DISCOUNT_RATE_SD * discount_draw, 0.0)
+        npv[part] = _present_value(cash, 1.0 / (1.0 + discount)) - capex
+        roi[part] = base.base_roi * (cash[:reported].sum(axis=0) / base_cash.sum()) * (base.investment / capex)
+    return ScenarioResult(npv, roi)
+
+
+@lru_cache(maxsize=16)
+def run_projection(inputs: ProjectionInputs, n_paths=DEFAULT_PATHS, seed=0) -> ProjectionResult:
+    """Memoized ``simulate_projection``."""
+    return simulate_projection(inputs, n_paths, seed)
+
+
+def currency_drift(factor_table, projects, currency_unit):
+    """Mean annual change of a currency pair from project-year to current observations."""
+    now_rates = [
+        factor_table.lookup(row, "Currency Rate")
+        for row in factor_table.country_rows.values()
+    ]
+    now_rates = [value for value, unit in now_rates if unit == currency_unit]
+    drifts = []
+    for (country, project_name), row in factor_table.project_rows.items():
+        then_rate, unit = factor_table.lookup(row, "Currency Rate")
+        years = CURRENT_YEAR - projects[country][project_name]["year"]
+        if unit != currency_unit or years <= 0:
+            continue
+        for now_rate in now_rates:
+            drifts.append((now_rate / then_rate) ** (1.0 / years) - 1.0)
+    return float(np.mean(drifts)) if drifts else 0.0
+
+
+def projection_inputs(factor_table, projects, source_country, project_name, target_country, similarity,
+                      cash_flows=None, yield_ratio=1.0, investment=None, price_ratio=1.0) -> ProjectionInputs:
+    """Projection inputs for moving ``project_name`` into ``target_country``.
+
+    ``cash_flows`` is the project's (years x field) catalog array; without it
+    the cash flows and total ROI are read from the record's ``profit_loss``.
+    ``yield_ratio`` is the target site's annual energy over the source's.
+    When the cash flows and ``investment`` are restated in constant prices
+    (``cececo.money``), ``price_ratio`` is the restated value of a current
+    dollar over that of a project-year dollar; it keeps the steel price
+    change, quoted in nominal dollars, from counting inflation twice.
+    """
+    project = projects[source_country][project_name]
+    if cash_flows is None:
+        profit_loss = project["profit_loss"]
+        year_keys = sorted((key for key in profit_loss if key.startswith("year_")), key=lambda key: int(key[5:]))
+        revenues = tuple(profit_loss[key]["revenue"] for key in year_keys)
+        costs = tuple(profit_loss[key]["cost"] for key in year_keys)
+        base_roi = profit_loss["total_roi"]
+    else:
+        revenues = tuple(float(value) for value in cash_flows[:, REVENUE])
+        costs = tuple(float(value) for value in cash_flows[:, COST])
+        base_roi = project["total_roi"]
+    then_row = factor_table.project_row(source_country, project_name)
+    now_row = factor_table.country_row(target_country)
+
+    steel_then, steel_then_unit = factor_table.lookup(then_row, "Steel Price")
+    steel_now, steel_now_unit = factor_table.lookup(now_row, "Steel Price")
+    steel_ratio = steel_now / steel_then * price_ratio if steel_then_unit == steel_now_unit and steel_then > 0 else 1.0
+
+    relief_then = factor_table.lookup(then_row, "Tax Incentive")[0]
+    relief_now = factor_table.lookup(now_row, "Tax Incentive")[0]
+    interest_now = factor_table.lookup(now_row, "Interest Rate")[0]
+    currency_unit = factor_table.lookup(now_row, "Currency Rate")[1]
+
+    return ProjectionInputs(
+        revenues=revenues,
+        costs=costs,
+        investment=parse_investment(project["investment"]) if investment is None else float(investment),
+        base_roi=float(base_roi),
+        steel_ratio=float(steel_ratio),
+        relief_years_then=0.0 if np.isnan(relief_then) else relief_then,
+        relief_years_now=0.0 if np.isnan(relief_now) else relief_now,
+        discount_rate=0.10 if np.isnan(interest_now) else interest_now / 100.0,
+        fx_drift=currency_drift(factor_table, projects, currency_unit) if currency_unit else 0.0,
+        similarity=float(similarity),
+        yield_ratio=float(yield_ratio),
+    )
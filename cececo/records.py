@@ -0,0 +1,136 @@
+"""Validated, read-only records compiled from the reference data.
+
+``compile_reference`` checks ``CECECO_COUNTRIES`` and ``CURRENT_CONDITIONS``
+once, when the engine is imported, and turns them into frozen slotted
+records with the lookups the UI needs precomputed: country and region
+indexes and the source countries eligible for each target. Malformed data
+raises ``DataError`` naming the offending entry, so a bad edit fails at
+startup rather than mid-rerun. Projects are not compiled here; they are
+served by the catalog (``cececo.catalog``).
+"""
+
+import math
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+
+class DataError(ValueError):
+    """The reference data does not match the expected schema."""
+
+
+@dataclass(frozen=True, slots=True)
+class Region:
+    name: str
+    country: str
+    lat: float
+    lon: float
+    projects: int
+
+
+@dataclass(frozen=True, slots=True)
+class Country:
+    name: str
+    code: str
+    currency: str
+    color: str
+    lat: float
+    lon: float
+    # Regions by name, in data order
+    regions: Mapping[str, Region]
+
+    @property
+    def region_names(self):
+        return tuple(self.regions)
+
+
+@dataclass(frozen=True, slots=True)
+class Reference:
+    """Compiled reference data; every attribute is read-only."""
+
+    countries: Mapping[str, Country]
+    conditions: Mapping[str, Mapping[str, str]]
+
+    @property
+    def country_names(self):
+        return tuple(self.countries)
+
+    def source_countries(self, project_countries):
+        """{target: eligible source countries} for sources with projects in ``project_countries``.
+
+        A country is never its own source; the order follows the country data.
+        """
+        sources = tuple(name for name in self.countries if name in project_countries)
+        return MappingProxyType({
+            target: tuple(name for name in sources if name != target) for target in self.countries
+        })
+
+
+def _require(mapping, key, kind, where):
+    if not isinstance(mapping, dict):
+        raise DataError(f"{where}: expected a mapping, got {type(mapping).__name__}")
+    if key not in mapping:
+        raise DataError(f"{where}: missing '{key}'")
+    value = mapping[key]
+    if kind is float:
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise DataError(f"{where}['{key}']: expected a finite number, got {value!r}")
+        return float(value)
+    if kind is int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise DataError(f"{where}['{key}']: expected an integer, got {value!r}")
+        return value
+    if not isinstance(value, kind):
+        raise DataError(f"{where}['{key}']: expected {kind.__name__}, got {value!r}")
+    return value
+
+
+def _coordinates(data, where):
+    lat = _require(data, "lat", float, where)
+    lon = _require(data, "lon", float, where)
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        raise DataError(f"{where}: coordinates ({lat}, {lon}) out of range")
+    return lat, lon
+
+
+def _text_mapping(data, where):
+    if not isinstance(data, dict):
+        raise DataError(f"{where}: expected a mapping, got {type(data).__name__}")
+    for factor, text in data.items():
+        if not isinstance(factor, str) or not isinstance(text, str):
+            raise DataError(f"{where}[{factor!r}]: expected text, got {text!r}")
+    return MappingProxyType(dict(data))
+
+
+def _compile_country(name, data):
+    where = f"CECECO_COUNTRIES[{name!r}]"
+    lat, lon = _coordinates(data, where)
+    regions = {}
+    for region_name, region in _require(data, "regions", dict, where).items():
+        region_where = f"{where}['regions'][{region_name!r}]"
+        regions[region_name] = Region(
+            region_name, name, *_coordinates(region, region_where), _require(region, "projects", int, region_where)
+        )
+    return Country(
+        name,
+        _require(data, "code", str, where),
+        _require(data, "currency", str, where),
+        _require(data, "color", str, where),
+        lat,
+        lon,
+        MappingProxyType(regions),
+    )
+
+
+def compile_reference(countries, conditions):
+    """Validate the reference dictionaries and compile them into a ``Reference``."""
+    compiled = {name: _compile_country(name, data) for name, data in countries.items()}
+    for country in conditions:
+        if country not in compiled:
+            raise DataError(f"CURRENT_CONDITIONS[{country!r}]: unknown country")
+    return Reference(
+        MappingProxyType(compiled),
+        MappingProxyType({
+            country: _text_mapping(data, f"CURRENT_CONDITIONS[{country!r}]") for country, data in conditions.items()
+        }),
+    )
@@ -0,0 +1,217 @@
+"""Regulatory impact classification and a per-country regulatory time series.
+
+Regulatory events carry a free-text ``impact`` ("High incentive support",
+"Reduced rates, still favorable"). ``ImpactClassifier`` scores them with a
+precompiled rule set into an ``Impact`` of (level, direction), memoizing
+each distinct text; texts no rule matches can be handed to a pluggable
+``model`` callable in one batch. ``RegulatoryIndex`` classifies every event
+once at build time and stores them sorted by (country, year) with a
+cumulative favorability curve, so timelines and "as of year X" lookups
+are array slices and binary searches.
+"""
+
+import re
+from typing import NamedTuple
+
+import numpy as np
+
+LOW, MODERATE, HIGH = 1, 2, 3
+IMPACT_LEVELS = {LOW: "Low", MODERATE: "Moderate", HIGH: "High"}
+
+FAVORABLE = 1
+UNFAVORABLE = -1
+
+# Checked from the highest level down; the first matching level wins
+IMPACT_RULES = (
+    (HIGH, (
+        r"high", r"extend(?:ed|s)?", r"feed-in", r"guarantee[sd]?", r"foundation",
+        r"tax (?:incentive|reduction|exemption|holiday)", r"priority dispatch",
+    )),
+    (MODERATE, (
+        r"moderate", r"improv\w*", r"faster", r"easier", r"simplif\w*", r"additional",
+        r"auction\w*", r"tenders?", r"competitive", r"targets?", r"commitment", r"certificates?",
+        r"amend\w*", r"updated?",
+    )),
+)
+
+# Events that withdraw or cut support count against favorability
+UNFAVORABLE_PATTERNS = (
+    r"(?:reduced|lower(?:ed)?|cut)\s+(?:rates?|tariffs?|support|incentives?)",
+    r"repeal\w*", r"abolish\w*", r"suspend\w*", r"moratorium", r"expir\w*", r"restrict\w*",
+)
+
+# Text that says outright the framework stays favorable overrides the
+# unfavorable patterns: "Reduced rates, still favorable" trims support
+# without turning the regime against investors
+FAVORABLE_OVERRIDE_PATTERNS = (
+    r"(?:still|remains?|remaining|stays?)\s+(?:favou?rable|positive|attractive)",
+)
+
+
+def _compile(patterns):
+    return re.compile(r"\b(?:" + "|".join(patterns) + r")\b", re.IGNORECASE)
+
+
+class Impact(NamedTuple):
+    level: int
+    direction: int
+
+    @property
+    def label(self):
+        return IMPACT_LEVELS[self.level]
+
+    @property
+    def favorability(self):
+        return self.level * self.direction
+
+
+class ImpactClassifier:
+    """Rule-based impact scorer with a per-text memo.
+
+    ``model``, if given, is called once per batch with the texts no rule
+    matched and returns one ``Impact`` per text; without it they score
+    ``Impact(LOW, FAVORABLE)``.
+    """
+
+    def __init__(self, rules=IMPACT_RULES, unfavorable=UNFAVORABLE_PATTERNS, favorable=FAVORABLE_OVERRIDE_PATTERNS,
+                 model=None):
+        self._rules = [(level, _compile(patterns)) for level, patterns in rules]
+        self._unfavorable = _compile(unfavorable)
+        self._favorable = _compile(favorable)
+        self._model = model
+        self._memo = {}
+
+    def _match(self, text):
+        """Impact from the rules, or None when no level rule matches."""
+        unfavorable = self._unfavorable.search(text) and not self._favorable.search(text)
+        direction = UNFAVORABLE if unfavorable else FAVORABLE
+        for level, pattern in self._rules:
+            if pattern.search(text):
+                return Impact(level, direction)
+        return None if self._model is not None else Impact(LOW, direction)
+
+    def classify(self, text):
+        return self.classify_many([text])[0]
+
+    def classify_many(self, texts):
+        """One ``Impact`` per text; each distinct text is scored once per classifier."""
+        unseen = [text for text in dict.fromkeys(texts) if text not in self._memo]
+        unmatched = []
+        for text in unseen:
+            impact = self._match(text)
+            if impact is None:
+                unmatched.append(text)
+            else:
+                self._memo[text] = impact
+        if unmatched:
+            for text, impact in zip(unmatched, self._model(unmatched)):
+                self._memo[text] = Impact(*impact)
+        return [self._memo[text] for text in texts]
+
+
+def event_text(event):
+    """Text an event is classified on: its title and impact description."""
+    return f"{event.get('event', '')}. {event.get('impact', '')}"
+
+
+class RegulatoryIndex:
+    """Classified regulatory events sorted by (country, year).
+
+    Every event dict gains ``level``, ``impact_label``, ``favorability``
+    and ``cumulative`` (the country's running favorability including this
+    event). Events repeated across projects are stored once per country.
+    """
+
+    def __init__(self, events, classifier=None):
+        classifier = classifier or ImpactClassifier()
+        unique = {}
+        for event in events:
+            if event.get("country") and event.get("year") is not None:
+                unique.setdefault((event["country"], int(event["year"]), event["event"]), event)
+        ordered = sorted(
+            unique.values(), key=lambda event: (event["country"], int(event["year"]), event.get("date") or "")
+        )
+        impacts = classifier.classify_many([event_text(event) for event in ordered])
+
+        self.years = np.array([int(event["year"]) for event in ordered], dtype=np.int32)
+        self.levels = np.array([impact.level for impact in impacts], dtype=np.int8)
+        self.favorability = np.array([impact.favorability for impact in impacts], dtype=np.int32)
+        self.cumulative = np.empty(len(ordered), dtype=np.int32)
+        self._slices = {}
+        start = 0
+        for i in range(1, len(ordered) + 1):
+            if i == len(ordered) or ordered[i]["country"] != ordered[start]["country"]:
+                self._slices[ordered[start]["country"]] = slice(start, i)
+                np.cumsum(self.favorability[start:i], out=self.cumulative[start:i])
+                start = i
+        self._events = [
+            {
+                **event,
+                "level": impact.level,
+                "impact_label": impact.label,
+                "favorability": impact.favorability,
+                "cumulative": int(cumulative),
+            }
+            for event, impact, cumulative in zip(ordered, impacts, self.cumulative)
+        ]
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def countries(self):
+        return list(self._slices)
+
+    def _slice(self, country):
+        return self._slices.get(country, slice(0, 0))
+
+    def events(self, country, until=None):
+        """Classified events for ``country``, oldest first, optionally up to year ``until``."""
+        span = self._slice(country)
+        if until is not None:
+            span = slice(span.start, span.start + int(np.searchsorted(self.years[span], until, side="right")))
+        return self._events[span]
+
+    def timeline(self, country):
+        """(years, impact levels) of ``country``'s events."""
+        span = self._slice(country)
+        return self.years[span], self.levels[span]
+
+    def favorability_curve(self, country):
+        """(years, cumulative favorability at the end of each year) for ``country``."""
+        span = self._slice(country)
+        years = self.years[span]
+        if not len(years):
+            return years, self.cumulative[span]
+        # Last event of each year
+        last = np.flatnonzero(np.append(years[1:] != years[:-1], True))
+        return years[last], self.cumulative[span][last]
+
+    def as_of(self, country, year):
+        """Regulatory state of ``country`` at the end of ``year``.
+
+        Returns the cumulative favorability, the number of events so far and
+        the latest event (None before the first one).
+        """
+        span = self._slice(country)
+        count = int(np.searchsorted(self.years[span], year, side="right"))
+        latest = self._events[span.start + count - 1] if count else None
+        return {
+            "favorability": latest["cumulative"] if latest else 0,
+            "events": count,
+            "latest": latest,
+        }
+
+
+def regulatory_events(projects, gazette_events=()):
+    """Event dicts from nested ``projects`` records plus ingested gazette events.
+
+    Project events are tagged with their country and project as ``source``;
+    gazette events keep their own fields with source ``"Official Gazette"``.
+    """
+    for country, country_projects in projects.items():
+        for name, project in country_projects.items():
+            for event in project.get("regulatory_evolution") or ():
+                yield {**event, "country": country, "source": name}
+    for event in gazette_events:
+        yield {**event, "source": "Official Gazette"}
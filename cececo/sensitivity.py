@@ -0,0 +1,249 @@
+"""Sensitivity of a projected transfer to each target-country condition factor.
+
+Usage::
+
+    python -m cececo.sensitivity --source-country Turkey --source-project "Kırıkkale Wind Farm"
+    python -m cececo.sensitivity --source-country Turkey --source-project "Kırıkkale Wind Farm" --output tornado.csv
+
+Every condition factor with a channel into the projection is swept over a
+range around the target's current value while the others stay put:
+
+- "Interest Rate": the discount rate;
+- "Steel Price": the steel share of capex;
+- "Tax Incentive": the full-relief tax years;
+- "Currency Rate": the local currency's annual drift against the dollar,
+  which erodes the FX-exposed share of revenue;
+- "Wind Speed": the target site's mean wind speed, through the wind yield
+  model (wind projects only);
+- "YEKDEM Incentive": the feed-in tariff, which scales revenue (targets
+  with a tariff only).
+
+Qualitative factors ("Government Support", "Regulatory Framework") have
+no channel into the projection and are left out.
+
+Every (factor x step) scenario of every target is one ``ProjectionInputs``
+variant, and all of them are evaluated together by
+``simulate_scenarios`` on common random numbers. ``Sensitivity.tornado``
+ranks the factors by how far the median NPV (or ROI) moves between the
+ends of their ranges.
+"""
+
+import argparse
+import csv
+import math
+import sys
+from dataclasses import dataclass, replace
+from typing import NamedTuple
+
+import numpy as np
+
+from cececo.projection import simulate_scenarios
+
+DEFAULT_STEPS = 5
+
+
+class Factor(NamedTuple):
+    name: str
+    # Unit of the swept value as shown
+    unit: str
+    # Ends of the sweep: multiples of the current value, or offsets when not relative
+    low: float
+    high: float
+    relative: bool = True
+
+
+FACTORS = (
+    Factor("Interest Rate", "%", 0.5, 1.5),
+    Factor("Steel Price", "USD/ton", 0.7, 1.3),
+    Factor("Tax Incentive", "relief years", -2.0, 2.0, relative=False),
+    Factor("Currency Rate", "% drift/year", -5.0, 5.0, relative=False),
+    Factor("Wind Speed", "m/s", 0.85, 1.15),
+    Factor("YEKDEM Incentive", "USD/kWh", 0.7, 1.3),
+)
+
+
+def factor_values(factor, current, steps=DEFAULT_STEPS):
+    """``steps`` evenly spaced values of ``factor`` over its range around ``current``."""
+    if factor.relative:
+        values = current * np.linspace(factor.low, factor.high, steps)
+    else:
+        values = current + np.linspace(factor.low, factor.high, steps)
+    # Drift may be negative (appreciation); rates, prices and years may not
+    return values if factor.name == "Currency Rate" else np.maximum(values, 0.0)
+
+
+def _sweep(inputs, factor, current, values, wind_energy):
+    """``inputs`` with ``factor`` moved from ``current`` to each of ``values``."""
+    if factor == "Interest Rate":
+        return [replace(inputs, discount_rate=value / 100.0) for value in values]
+    if factor == "Steel Price":
+        return [replace(inputs, steel_ratio=inputs.steel_ratio * value / current) for value in values]
+    if factor == "Tax Incentive":
+        return [replace(inputs, relief_years_now=value) for value in values]
+    if factor == "Currency Rate":
+        return [replace(inputs, fx_drift=value / 100.0) for value in values]
+    if factor == "Wind Speed":
+        energy = wind_energy(np.append(values, current))
+        return [replace(inputs, yield_ratio=inputs.yield_ratio * ratio) for ratio in energy[:-1] / energy[-1]]
+    if factor == "YEKDEM Incentive":
+        return [replace(inputs, yield_ratio=inputs.yield_ratio * value / current) for value in values]
+    raise ValueError(f"No sensitivity channel for factor {factor!r}")
+
+
+@dataclass(frozen=True, eq=False)
+class Sensitivity:
+    """Projected outcomes of one transfer with each factor swept over its range.
+
+    ``values`` and the metric arrays are (factors x steps); ``base`` holds
+    each metric at the current conditions.
+    """
+    factors: tuple
+    units: tuple
+    current: np.ndarray
+    values: np.ndarray
+    npv: np.ndarray
+    roi: np.ndarray
+    probability_positive: np.ndarray
+    base: dict
+    n_paths: int
+
+    def swing(self, metric="npv"):
+        """Absolute change of ``metric`` between the ends of each factor's range."""
+        outcome = getattr(self, metric)
+        return np.abs(outcome[:, -1] - outcome[:, 0])
+
+    def tornado(self, metric="npv"):
+        """One row per factor, largest swing first."""
+        outcome = getattr(self, metric)
+        swing = self.swing(metric)
+        return [
+            {
+                "factor": self.factors[i],
+                "unit": self.units[i],
+                "current": float(self.current[i]),
+                "low": float(self.values[i, 0]),
+                "high": float(self.values[i, -1]),
+                "at_low": float(outcome[i, 0]),
+                "at_high": float(outcome[i, -1]),
+                "swing": float(swing[i]),
+            }
+            for i in np.argsort(-swing, kind="stable")
+        ]
+
+
+def sensitivity_scenarios(inputs, conditions, steps=DEFAULT_STEPS, factors=FACTORS, wind_energy=None):
+    """Swept factors, their values and the scenario inputs for one transfer.
+
+    ``conditions`` maps factor names to the target's current values in the
+    factors' units; factors missing from it are skipped. ``wind_energy``
+    maps an array of mean wind speeds to annual energy at the target site
+    and is required to sweep "Wind Speed". The scenarios are the base
+    inputs followed by each factor's steps in order.
+    """
+    swept, values, scenarios = [], [], [inputs]
+    for factor in factors:
+        current = conditions.get(factor.name)
+        if current is None or not math.isfinite(current):
+            continue
+        if factor.relative and current <= 0:
+            continue
+        if factor.name == "Wind Speed" and wind_energy is None:
+            continue
+        grid = factor_values(factor, current, steps)
+        swept.append(factor)
+        values.append(grid)
+        scenarios.extend(_sweep(inputs, factor.name, current, [float(value) for value in grid], wind_energy))
+    return swept, np.array(values).reshape(len(swept), steps), scenarios
+
+
+def analyze(targets, steps=DEFAULT_STEPS, n_paths=2000, seed=0, factors=FACTORS):
+    """``Sensitivity`` per key of ``targets`` from one batched simulation.
+
+    ``targets`` maps any key (e.g. a target country) to ``(inputs,
+    conditions, wind_energy)`` as taken by ``sensitivity_scenarios``; all
+    targets must be transfers of the same source project.
+    """
+    layouts, scenarios = {}, []
+    for key, (inputs, conditions, wind_energy) in targets.items():
+        swept, values, target_scenarios = sensitivity_scenarios(inputs, conditions, steps, factors, wind_energy)
+        layouts[key] = (swept, values, len(scenarios), conditions)
+        scenarios.extend(target_scenarios)
+    if not scenarios:
+        return {}
+    result = simulate_scenarios(scenarios, n_paths, seed)
+    outcomes = {
+        "npv": result.percentiles("npv"),
+        "roi": result.percentiles("roi"),
+        "probability_positive": result.probability_positive_npv(),
+    }
+    sensitivities = {}
+    for key, (swept, values, start, conditions) in layouts.items():
+        grid = slice(start + 1, start + 1 + len(swept) * steps)
+        sensitivities[key] = Sensitivity(
+            factors=tuple(factor.name for factor in swept),
+            units=tuple(factor.unit for factor in swept),
+            current=np.array([conditions[factor.name] for factor in swept]),
+            values=values,
+            base={metric: float(outcome[start]) for metric, outcome in outcomes.items()},
+            n_paths=n_paths,
+            **{metric: outcome[grid].reshape(len(swept), steps) for metric, outcome in outcomes.items()},
+        )
+    return sensitivities
+
+
+COLUMNS = ("target_country", "factor", "unit", "current", "low", "high", "npv_low", "npv_high", "npv_swing",
+           "roi_low", "roi_high", "roi_swing")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tornado sensitivities of one source project in every target.")
+    parser.add_argument("--source-country", required=True)
+    parser.add_argument("--source-project", required=True)
+    parser.add_argument("--energy-type", help='"Energy Type" label whose yield scales revenue, e.g. "Wind Energy"')
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="values per factor range")
+    parser.add_argument("--paths", type=int, default=2000, help="Monte Carlo paths per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="Monte Carlo seed")
+    parser.add_argument("--output", "-o", help="write one row per target and factor to this CSV file")
+    args = parser.parse_args(argv)
+
+    from cececo import engine
+
+    sensitivities = engine.sensitivity_batch(
+        args.source_country, args.source_project, args.energy_type, args.steps, args.paths, args.seed
+    )
+    if not sensitivities:
+        print(f"No projection for {args.source_project} ({args.source_country}) in any target country")
+        return 1
+    rows = []
+    for country, sensitivity in sensitivities.items():
+        print(f"{country}: median NPV {sensitivity.base['npv']:,.1f}M, ROI {sensitivity.base['roi']:.1f}%")
+        index = {factor: i for i, factor in enumerate(sensitivity.factors)}
+        roi_swing = sensitivity.swing("roi")
+        for row in sensitivity.tornado("npv"):
+            i = index[row["factor"]]
+            print(f"  {row['factor']:<18}{row['low']:>10.4g} → {row['high']:<10.4g}{row['unit']:<14}"
+                  f"NPV {row['at_low']:>9,.1f} → {row['at_high']:>9,.1f}M  (swing {row['swing']:,.1f}M)")
+            rows.append({
+                "target_country": country,
+                "factor": row["factor"],
+                "unit": row["unit"],
+                "current": row["current"],
+                "low": row["low"],
+                "high": row["high"],
+                "npv_low": row["at_low"],
+                "npv_high": row["at_high"],
+                "npv_swing": row["swing"],
+                "roi_low": float(sensitivity.roi[i, 0]),
+                "roi_high": float(sensitivity.roi[i, -1]),
+                "roi_swing": float(roi_swing[i]),
+            })
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Transferability similarity between source projects and target countries.
+
+Each project's then-conditions and each country's current conditions are
+taken from the parsed ``FactorTable``, standardized per factor and oriented
+so that positive always means "better for a project". Cosine similarity
+over all factors and over the regulatory and economic factor groups is
+computed for every (project, country) pair in one matrix product.
+Geographic similarity decays with the great-circle distance between each
+project's site and each country. ``cececo.engine`` memoizes the matrix
+per catalog version.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from cececo.conditions import NO_UNIT
+from cececo.spatial import haversine_km
+
+REGULATORY_FACTORS = ("Regulatory Framework", "YEKDEM Incentive", "Government Support", "Tax Incentive")
+ECONOMIC_FACTORS = ("Steel Price", "Interest Rate", "Currency Rate")
+# Distance at which geographic similarity falls to 1/e (about 37%)
+GEOGRAPHIC_SCALE_KM = 2000.0
+
+
+class SimilarityScore(NamedTuple):
+    overall: float
+    regulatory: float
+    economic: float
+    geographic: float
+
+
+class FactorScaling(NamedTuple):
+    """Per-factor standardization: comparable unit code, mean and standard deviation."""
+    units: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+
+
+def factor_scaling(factor_table) -> FactorScaling:
+    """Mean and std of each factor over the values in its dominant unit.
+
+    Factors without usable values, or whose values are all equal, get a
+    std of 0 and are left out of comparisons.
+    """
+    values = factor_table.values
+    no_unit = factor_table.units.index(NO_UNIT)
+    n_factors = values.shape[1]
+    dominant_units = np.full(n_factors, no_unit, dtype=np.int16)
+    means = np.zeros(n_factors)
+    stds = np.zeros(n_factors)
+    for j in range(n_factors):
+        column = values[:, j]
+        units = factor_table.unit_codes[:, j]
+        present = np.isfinite(column)
+        if not present.any():
+            continue
+        # Only values in the column's dominant unit are comparable with each other
+        unit_counts = np.bincount(units[present & (units != no_unit)], minlength=len(factor_table.units))
+        dominant_units[j] = unit_counts.argmax() if unit_counts.any() else no_unit
+        usable = present & ((units == dominant_units[j]) | (units == no_unit))
+        means[j] = column[usable].mean()
+        stds[j] = column[usable].std()
+    return FactorScaling(dominant_units, means, stds)
+
+
+def _standardize(factor_table, scaling=None):
+    """Z-score each factor column, oriented by its direction; missing -> 0."""
+    scaling = scaling or factor_scaling(factor_table)
+    values = factor_table.values
+    no_unit = factor_table.units.index(NO_UNIT)
+    usable = (
+        np.isfinite(values)
+        & ((factor_table.unit_codes == scaling.units) | (factor_table.unit_codes == no_unit))
+        & (scaling.std > 0)
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scaled = (values - scaling.mean) / scaling.std * factor_table.directions
+    return np.where(usable, scaled, 0.0)
+
+
+def _cosine(project_features, country_features):
+    project_norms = np.linalg.norm(project_features, axis=1, keepdims=True)
+    country_norms = np.linalg.norm(country_features, axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine = (project_features / project_norms) @ (country_features / country_norms).T
+    # Map [-1, 1] onto a 0-100% score
+    return np.clip(50.0 * (cosine + 1.0), 0.0, 100.0)
+
+
+class SimilarityMatrix:
+    """Overall, regulatory, economic and geographic similarity for all project x country pairs.
+
+    Scores are percentages; condition-based scores of pairs whose target
+    country has no current conditions are NaN, as are geographic scores
+    of projects or countries without a location.
+    """
+
+    def __init__(self, projects, countries, overall, regulatory, economic, geographic):
+        self.projects = projects
+        self.countries = countries
+        self.overall = overall
+        self.regulatory = regulatory
+        self.economic = economic
+        self.geographic = geographic
+        self.project_index = {project: i for i, project in enumerate(projects)}
+        self.country_index = {country: j for j, country in enumerate(countries)}
+
+    def score(self, source_country, project_name, target_country) -> SimilarityScore:
+        i = self.project_index.get((source_country, project_name))
+        j = self.country_index.get(target_country)
+        if i is None or j is None:
+            return SimilarityScore(np.nan, np.nan, np.nan, np.nan)
+        return SimilarityScore(float(self.overall[i, j]), float(self.regulatory[i, j]), float(self.economic[i, j]),
+                               float(self.geographic[i, j]))
+
+
+def geographic_similarity(project_locations, country_locations):
+    """(project x country) percentages from (lat, lon) pairs, decaying with distance."""
+    projects = np.asarray(project_locations, dtype=np.float64).reshape(-1, 2)
+    countries = np.asarray(country_locations, dtype=np.float64).reshape(-1, 2)
+    distances = haversine_km(projects[:, :1], projects[:, 1:], countries[:, 0], countries[:, 1])
+    return 100.0 * np.exp(-distances / GEOGRAPHIC_SCALE_KM)
+
+
+def compute_similarity_matrix(factor_table, countries, project_locations=None) -> SimilarityMatrix:
+    """Similarity of every factor-table project to every country in ``countries``.
+
+    ``countries`` maps names to data with ``lat``/``lon``; ``project_locations``
+    maps (country, project name) to (lat, lon). Without locations the
+    geographic scores are NaN.
+    """
+    features = _standardize(factor_table)
+    projects = tuple(factor_table.project_rows)
+    project_rows = np.array([factor_table.project_rows[p] for p in projects], dtype=np.intp)
+    countries_data, countries = countries, tuple(countries)
+    # Countries without current conditions keep all-NaN columns
+    known = [j for j, country in enumerate(countries) if country in factor_table.country_rows]
+    country_rows = np.array([factor_table.country_rows[countries[j]] for j in known], dtype=np.intp)
+
+    def block(factors=None):
+        if factors is None:
+            columns = np.arange(len(factor_table.factors))
+        else:
+            columns = np.array([factor_table.factor_index[f] for f in factors if f in factor_table.factor_index], dtype=np.intp)
+        scores = np.full((len(projects), len(countries)), np.nan)
+        if len(columns) and len(known) and len(projects):
+            scores[:, known] = _cosine(features[np.ix_(project_rows, columns)], features[np.ix_(country_rows, columns)])
+        return scores
+
+    geographic = np.full((len(projects), len(countries)), np.nan)
+    if project_locations is not None:
+        geographic = geographic_similarity(
+            [project_locations.get(project, (np.nan, np.nan)) for project in projects],
+            [(countries_data[country].get("lat", np.nan), countries_data[country].get("lon", np.nan))
+             for country in countries],
+        )
+    return SimilarityMatrix(projects, countries, block(), block(REGULATORY_FACTORS), block(ECONOMIC_FACTORS),
+                            geographic)
+
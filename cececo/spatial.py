@@ -0,0 +1,172 @@
+"""Grid spatial index over map sites (countries, regions and project sites).
+
+Sites are bucketed into a uniform lat/lon grid and stored sorted by cell
+id (row-major), so the cells of any bounding box form one contiguous run
+of ids per grid row. A box query is a pair of ``searchsorted`` calls per
+row; nearest-site lookups search a growing box around the query point and
+finish with one exact haversine pass over the candidates. ``clusters``
+aggregates the sites in view into zoom-dependent grid cells, so the map
+only ever serializes a bounded number of markers.
+"""
+
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+COUNTRY, REGION, PROJECT = range(3)
+SITE_KINDS = ("country", "region", "project")
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+# Slippy-map tiles are 256 px wide; clusters span about this many pixels
+TILE_PIXELS = 256
+CLUSTER_PIXELS = 64
+
+
+class Cluster(NamedTuple):
+    lat: float
+    lon: float
+    count: int
+    # Index of one site in the cluster (the only one when count == 1)
+    site: int
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def cluster_degrees(zoom):
+    """Grid cell size in degrees that spans ``CLUSTER_PIXELS`` at a Leaflet zoom level."""
+    return 360.0 / (2 ** zoom) * CLUSTER_PIXELS / TILE_PIXELS
+
+
+class SiteIndex:
+    """Uniform-grid index over site coordinates.
+
+    ``keys`` identify the sites (e.g. ``("region", "Turkey", "İzmir")``) and
+    ``kinds`` hold COUNTRY, REGION or PROJECT; queries return positions into
+    these arrays.
+    """
+
+    def __init__(self, keys, kinds, lats, lons, cell_degrees=0.25):
+        self.keys = list(keys)
+        self.kinds = np.asarray(kinds, dtype=np.int8)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_degrees = cell_degrees
+        self.n_rows = int(math.ceil(180.0 / cell_degrees)) + 1
+        self.n_cols = int(math.ceil(360.0 / cell_degrees)) + 1
+        cells = self._rows(self.lats) * self.n_cols + self._cols(self.lons)
+        self._order = np.argsort(cells, kind="stable")
+        self._cells = cells[self._order]
+
+    @classmethod
+    def from_sites(cls, sites, cell_degrees=0.25):
+        """Index ``(key, kind, lat, lon)`` tuples."""
+        sites = list(sites)
+        if not sites:
+            return cls([], [], [], [], cell_degrees)
+        keys, kinds, lats, lons = zip(*sites)
+        return cls(keys, kinds, lats, lons, cell_degrees)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _rows(self, lats):
+        return np.clip(np.floor((np.asarray(lats) + 90.0) / self.cell_degrees), 0, self.n_rows - 1).astype(np.int64)
+
+    def _cols(self, lons):
+        return np.clip(np.floor((np.asarray(lons) + 180.0) / self.cell_degrees), 0, self.n_cols - 1).astype(np.int64)
+
+    def _box(self, south, west, north, east):
+        """Positions of the sites in every grid cell touching the box (a superset)."""
+        rows = np.arange(self._rows(south), self._rows(north) + 1)
+        col_lo, col_hi = self._cols(west), self._cols(east)
+        starts = np.searchsorted(self._cells, rows * self.n_cols + col_lo)
+        stops = np.searchsorted(self._cells, rows * self.n_cols + col_hi + 1)
+        lengths = stops - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        return self._order[offsets]
+
+    def within(self, south, west, north, east, kinds=None):
+        """Positions of the sites inside the bounding box, optionally of the given kinds."""
+        candidates = self._box(south, west, north, east)
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        inside = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+        if kinds is not None:
+            inside &= np.isin(self.kinds[candidates], kinds)
+        return candidates[inside]
+
+    def nearest(self, lat, lon, kinds=None):
+        """(position, distance in km) of the site nearest to ``(lat, lon)``, or None if empty."""
+        if not len(self):
+            return None
+        radius = self.cell_degrees
+        while True:
+            candidates = self._box(lat - radius, lon - radius, lat + radius, lon + radius)
+            if kinds is not None:
+                candidates = candidates[np.isin(self.kinds[candidates], kinds)]
+            if len(candidates) or radius >= 360.0:
+                break
+            radius *= 2
+        if not len(candidates):
+            return None
+        distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        best = float(distances.min())
+        # A site outside the searched box could still be closer than the best
+        # candidate; widen the box to cover the best distance and search once more
+        max_lat = min(abs(lat) + best / KM_PER_DEGREE, 89.0)
+        needed = best / (KM_PER_DEGREE * math.cos(math.radians(max_lat)))
+        if needed > radius:
+            candidates = self._box(lat - needed, lon - needed, lat + needed, lon + needed)
+            if kinds is not None:
+                candidates = candidates[np.isin(self.kinds[candidates], kinds)]
+            distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        i = int(np.argmin(distances))
+        return int(candidates[i]), float(distances[i])
+
+    def clusters(self, positions, cell_degrees):
+        """Group ``positions`` into grid cells of ``cell_degrees``; one ``Cluster`` per occupied cell.
+
+        Cluster coordinates are the mean of their sites.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return []
+        lats, lons = self.lats[positions], self.lons[positions]
+        cells = (
+            np.floor((lats + 90.0) / cell_degrees).astype(np.int64) * int(math.ceil(360.0 / cell_degrees) + 1)
+            + np.floor((lons + 180.0) / cell_degrees).astype(np.int64)
+        )
+        unique, first, inverse, counts = np.unique(cells, return_index=True, return_inverse=True, return_counts=True)
+        mean_lats = np.bincount(inverse, lats, len(unique)) / counts
+        mean_lons = np.bincount(inverse, lons, len(unique)) / counts
+        return [
+            Cluster(float(lat), float(lon), int(count), int(positions[i]))
+            for lat, lon, count, i in zip(mean_lats, mean_lons, counts, first)
+        ]
+
+
+def map_sites(countries, projects, locate):
+    """``(key, kind, lat, lon)`` for every country, region and project.
+
+    ``locate(country, project)`` gives a project's (lat, lon); sites with
+    unknown coordinates are skipped. Regions come before projects so a
+    project placed exactly on its region resolves to the region.
+    """
+    for country, data in countries.items():
+        yield ("country", country), COUNTRY, data["lat"], data["lon"]
+        for region, location in (data.get("regions") or {}).items():
+            yield ("region", country, region), REGION, location["lat"], location["lon"]
+    for country, country_projects in projects.items():
+        for name, project in country_projects.items():
+            lat, lon = locate(country, project)
+            if not (math.isnan(lat) or math.isnan(lon)):
+                yield ("project", country, name), PROJECT, lat, lon
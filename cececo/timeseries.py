@@ -0,0 +1,397 @@
+"""As-of time series of country conditions.
+
+Each (country, factor) pair is a series of dated observations: the parsed
+numeric value and unit of a condition string, plus the original text where
+there is one. Dates are month ordinals (``year * 12 + month - 1``). All
+series are stored back to back in flat columns sorted by (series, date),
+with ``offsets`` marking where each series starts, so an as-of lookup is a
+binary search over one series and a date range is a slice.
+
+On disk a store is a directory holding ``conditions.json`` (series keys,
+offsets, units and texts) and one ``.npy`` file per column, replaced
+atomically like the project catalog and memory-mapped on load.
+``ConditionStoreCache`` reloads the store when the manifest changes.
+
+Usage::
+
+    python -m cececo.timeseries build data/conditions
+    python -m cececo.timeseries build /tmp/conditions --synthetic-years 50
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import sys
+import uuid
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from cececo.catalog import CatalogCache
+from cececo.conditions import CURRENT_YEAR, FACTOR_DIRECTIONS, NO_UNIT, compare_values, parse_condition
+
+MANIFEST = "conditions.json"
+COLUMNS = ("dates", "values", "units", "texts")
+
+# Month of the year conditions dated only by year are observed in
+OBSERVATION_MONTH = 1
+
+NO_TEXT = -1
+
+_DATE = re.compile(r"^\s*(\d{4})(?:-(\d{1,2}))?(?:-\d{1,2})?\s*$")
+
+
+def month_ordinal(date, end_of_year=True):
+    """Month ordinal of a year, ``"YYYY"``, ``"YYYY-MM"``, ``"YYYY-MM-DD"`` or date.
+
+    A bare year means December of that year when ``end_of_year`` is set, so
+    "as of 2019" includes everything observed during 2019, and January
+    otherwise.
+    """
+    if isinstance(date, (datetime.date, datetime.datetime)):
+        return date.year * 12 + date.month - 1
+    if isinstance(date, (int, np.integer)):
+        return int(date) * 12 + (11 if end_of_year else 0)
+    match = _DATE.match(str(date))
+    if not match:
+        raise ValueError(f"Unrecognized date: {date!r}")
+    year, month = match.groups()
+    if month is None:
+        return int(year) * 12 + (11 if end_of_year else 0)
+    return int(year) * 12 + int(month) - 1
+
+
+def format_month(ordinal):
+    year, month = divmod(int(ordinal), 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def format_value(value, unit):
+    """Display text for a parsed value without an original condition string."""
+    if unit == NO_UNIT:
+        return "None"
+    if unit == "%":
+        return f"{value:g}%"
+    if unit == "m/s":
+        return f"{value:g} m/s"
+    if unit == "score":
+        return f"Level {value:g}"
+    if unit == "relief-years":
+        return f"{value:g} full tax-relief years"
+    if unit.startswith("USD/"):
+        return f"${value:,.0f}/{unit[4:]}"
+    if "/" in unit:
+        quote, base = unit.split("/", 1)
+        return f"1 {base} = {value:g} {quote}"
+    return f"{value:g} {unit}"
+
+
+class Observation(NamedTuple):
+    date: int
+    value: float
+    unit: str
+    text: str
+
+    @property
+    def month(self):
+        return format_month(self.date)
+
+
+class ConditionStore:
+    """Read-only (country, factor) condition series in flat, date-sorted columns."""
+
+    def __init__(self, keys, offsets, dates, values, unit_codes, text_codes, units, texts, version=None, source=None):
+        self.keys = keys
+        self.offsets = offsets
+        self.dates = dates
+        self.values = values
+        self.unit_codes = unit_codes
+        self.text_codes = text_codes
+        self.units = units
+        self.texts = texts
+        self.version = version
+        # Version of the data the store was derived from, if it was derived
+        self.source = source
+        self.index = {key: i for i, key in enumerate(keys)}
+        self._factors = {}
+        for country, factor in keys:
+            self._factors.setdefault(country, []).append(factor)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def countries(self):
+        return list(self._factors)
+
+    def factors(self, country):
+        return self._factors.get(country, [])
+
+    def date_range(self):
+        """(first, last) month ordinal over all series, or None when empty."""
+        if not len(self.dates):
+            return None
+        starts, stops = self.offsets[:-1], self.offsets[1:] - 1
+        present = stops >= starts
+        return int(self.dates[starts[present]].min()), int(self.dates[stops[present]].max())
+
+    def _span(self, country, factor):
+        i = self.index.get((country, factor))
+        if i is None:
+            return 0, 0
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def _observation(self, i):
+        unit = self.units[self.unit_codes[i]]
+        value = float(self.values[i])
+        code = int(self.text_codes[i])
+        text = self.texts[code] if code != NO_TEXT else format_value(value, unit)
+        return Observation(int(self.dates[i]), value, unit, text)
+
+    def as_of(self, country, factor, date) -> Optional[Observation]:
+        """Latest observation of ``factor`` in ``country`` at or before ``date``."""
+        start, stop = self._span(country, factor)
+        position = start + int(np.searchsorted(self.dates[start:stop], month_ordinal(date), side="right"))
+        return self._observation(position - 1) if position > start else None
+
+    def conditions_as_of(self, country, date):
+        """{factor: Observation} for every factor of ``country`` observed by ``date``."""
+        conditions = {}
+        for factor in self.factors(country):
+            observation = self.as_of(country, factor, date)
+            if observation is not None:
+                conditions[factor] = observation
+        return conditions
+
+    def series(self, country, factor, start=None, end=None):
+        """(month ordinals, values) of one series between ``start`` and ``end`` inclusive (views)."""
+        lo, hi = self._span(country, factor)
+        dates = self.dates[lo:hi]
+        first = 0 if start is None else int(np.searchsorted(dates, month_ordinal(start, end_of_year=False)))
+        last = len(dates) if end is None else int(np.searchsorted(dates, month_ordinal(end), side="right"))
+        return dates[first:last], self.values[lo + first:lo + last]
+
+    def compare(self, then_country, then_date, now_country, now_date):
+        """Then -> now change for each factor observed on both sides.
+
+        Returns dicts with ``factor``, ``then`` / ``now`` observations and
+        the change code (IMPROVED, DETERIORATED, UNCHANGED or NaN), compared
+        the same way as ``FactorTable.compare``.
+        """
+        then = self.conditions_as_of(then_country, then_date)
+        now = self.conditions_as_of(now_country, now_date)
+        shared = [factor for factor in then if factor in now]
+        if not shared:
+            return []
+        unit_codes = {unit: i for i, unit in enumerate(self.units)}
+        codes = compare_values(
+            np.array([then[factor].value for factor in shared]),
+            np.array([unit_codes[then[factor].unit] for factor in shared]),
+            np.array([now[factor].value for factor in shared]),
+            np.array([unit_codes[now[factor].unit] for factor in shared]),
+            np.array([FACTOR_DIRECTIONS.get(factor, 0) for factor in shared], dtype=np.float64),
+            unit_codes[NO_UNIT],
+        )
+        return [
+            {"factor": factor, "then": then[factor], "now": now[factor], "change": code}
+            for factor, code in zip(shared, codes)
+        ]
+
+
+def store_from_observations(observations):
+    """Build a ``ConditionStore`` from ``(country, factor, date, value, unit, text)`` tuples.
+
+    ``text`` may be None. Later observations of the same series and month
+    replace earlier ones.
+    """
+    latest = {}
+    for country, factor, date, value, unit, text in observations:
+        latest[(country, factor, month_ordinal(date, end_of_year=False))] = (float(value), unit, text)
+
+    keys = list(dict.fromkeys((country, factor) for country, factor, _ in latest))
+    key_index = {key: i for i, key in enumerate(keys)}
+    ordered = sorted(latest.items(), key=lambda item: (key_index[item[0][:2]], item[0][2]))
+    units = [NO_UNIT]
+    texts = {}
+    unit_codes = np.empty(len(ordered), dtype=np.int16)
+    text_codes = np.empty(len(ordered), dtype=np.int32)
+    for i, (_, (_, unit, text)) in enumerate(ordered):
+        if unit not in units:
+            units.append(unit)
+        unit_codes[i] = units.index(unit)
+        text_codes[i] = NO_TEXT if text is None else texts.setdefault(text, len(texts))
+    counts = np.bincount([key_index[key[:2]] for key, _ in ordered], minlength=len(keys))
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return ConditionStore(
+        tuple(keys),
+        offsets,
+        np.array([key[2] for key, _ in ordered], dtype=np.int32),
+        np.array([value for _, (value, _, _) in ordered], dtype=np.float64),
+        unit_codes,
+        text_codes,
+        tuple(units),
+        tuple(texts),
+    )
+
+
+def condition_observations(projects, current_conditions, current_year=CURRENT_YEAR):
+    """Observations from projects' then-conditions (at the project year) and the current snapshot."""
+    for country, country_projects in projects.items():
+        for project in country_projects.values():
+            for factor, text in (project.get("then_conditions") or {}).items():
+                parsed = parse_condition(factor, text)
+                if parsed is not None:
+                    yield country, factor, int(project["year"]), parsed.value, parsed.unit, text
+    for country, conditions in current_conditions.items():
+        for factor, text in conditions.items():
+            parsed = parse_condition(factor, text)
+            if parsed is not None:
+                yield country, factor, current_year, parsed.value, parsed.unit, text
+
+
+def synthetic_observations(current_conditions, years, end_year=CURRENT_YEAR, seed=0, countries=None):
+    """Monthly random-walk histories over ``years`` years ending at each current condition.
+
+    ``countries`` without current conditions borrow another country's
+    conditions as their end point.
+    """
+    rng = np.random.default_rng(seed)
+    months = np.arange((end_year - years + 1) * 12, end_year * 12 + OBSERVATION_MONTH)
+    templates = list(current_conditions.values())
+    for i, country in enumerate(countries or current_conditions):
+        conditions = current_conditions.get(country) or templates[i % len(templates)]
+        for factor, text in conditions.items():
+            parsed = parse_condition(factor, text)
+            if parsed is None or parsed.unit == NO_UNIT:
+                continue
+            # Walk backwards from today's value in log space
+            steps = rng.normal(0, 0.02, len(months))
+            path = parsed.value * np.exp(np.concatenate([np.cumsum(steps[::-1])[::-1][1:], [0.0]]))
+            if parsed.unit == "score":
+                path = np.clip(np.round(path), 1, 5)
+            for month, value in zip(months, path):
+                yield country, factor, format_month(month), round(float(value), 4), parsed.unit, None
+
+
+def write_store(store, path, source=None):
+    """Write ``store`` to the directory ``path``, replacing any previous version atomically.
+
+    ``source``, the version of the data the store was derived from, is kept
+    in the manifest and comes back as ``ConditionStore.source``.
+    """
+    os.makedirs(path, exist_ok=True)
+    token = uuid.uuid4().hex
+    arrays = {}
+    for column, array in zip(COLUMNS, (store.dates, store.values, store.unit_codes, store.text_codes)):
+        arrays[column] = f"{column}-{token}.npy"
+        np.save(os.path.join(path, arrays[column]), np.ascontiguousarray(array))
+
+    manifest = {
+        "arrays": arrays,
+        "series": [{"country": country, "factor": factor} for country, factor in store.keys],
+        "offsets": [int(offset) for offset in store.offsets],
+        "units": list(store.units),
+        "texts": list(store.texts),
+        "source": None if source is None else list(source),
+    }
+    staging = os.path.join(path, f".{MANIFEST}.{token}")
+    with open(staging, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(staging, os.path.join(path, MANIFEST))
+
+    # Arrays of replaced versions stay readable through existing mappings on POSIX
+    current = set(arrays.values())
+    for name in os.listdir(path):
+        if name.endswith(".npy") and name.split("-", 1)[0] in COLUMNS and name not in current:
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+
+
+def store_version(path):
+    """(mtime_ns, size) of the store manifest, or None if there is no store."""
+    try:
+        stat = os.stat(os.path.join(path, MANIFEST))
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_store(path):
+    """Load the store in ``path`` with its columns memory-mapped read-only."""
+    version = store_version(path)
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    columns = [np.load(os.path.join(path, manifest["arrays"][column]), mmap_mode="r") for column in COLUMNS]
+    return ConditionStore(
+        tuple((entry["country"], entry["factor"]) for entry in manifest["series"]),
+        np.array(manifest["offsets"], dtype=np.int64),
+        *columns,
+        tuple(manifest["units"]),
+        tuple(manifest["texts"]),
+        version=version,
+        source=None if manifest.get("source") is None else tuple(manifest["source"]),
+    )
+
+
+class ConditionStoreCache(CatalogCache):
+    """Process-wide current condition store for ``path``, reloaded when its manifest changes.
+
+    A store written by ``bootstrap`` records ``source_version()`` and is
+    rebuilt when that changes (e.g. the catalog it was derived from).
+    Stores written by ``build`` or other tools carry no source and are
+    kept as they are.
+    """
+
+    _version = staticmethod(store_version)
+    _load = staticmethod(load_store)
+
+    def __init__(self, path, bootstrap=None, source_version=None, check_interval=1.0):
+        super().__init__(path, bootstrap, check_interval)
+        self._source_version = source_version
+
+    def _write(self, store, path):
+        write_store(store, path, source=None if self._source_version is None else self._source_version())
+
+    def get(self) -> ConditionStore:
+        store = super().get()
+        if self._source_version is None or store.source is None or store.source == self._source_version():
+            return store
+        with self._lock:
+            # Another caller may have rebuilt it meanwhile
+            if self._catalog is store:
+                self._write(self._bootstrap(), self.path)
+                self._checked_at = 0.0
+        return super().get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a CECECO-SIM condition time-series store.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="write a store directory")
+    build.add_argument("path", help="store directory")
+    build.add_argument("--synthetic-years", type=int, metavar="N",
+                       help="add N years of synthetic monthly history before the current conditions")
+    build.add_argument("--seed", type=int, default=0, help="synthetic data seed")
+    args = parser.parse_args(argv)
+
+    from cececo.data import CECECO_COUNTRIES, CURRENT_CONDITIONS, MOCK_PROJECTS
+
+    observations = list(condition_observations(MOCK_PROJECTS, CURRENT_CONDITIONS))
+    if args.synthetic_years:
+        # Real snapshots last, so they win over synthetic values in their month
+        observations = list(synthetic_observations(
+            CURRENT_CONDITIONS, args.synthetic_years, seed=args.seed, countries=list(CECECO_COUNTRIES)
+        )) + observations
+    store = store_from_observations(observations)
+    write_store(store, args.path)
+    print(f"Wrote {len(store):,} observations in {len(store.keys)} series to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())